@@ -0,0 +1,574 @@
+# catalog_ingest.py
+# Batched catalog ingestion shared by the elastic/ingest-*.py scripts.
+# Products are embedded many texts per OpenAI request and written through the
+# Elasticsearch streaming/parallel bulk helpers, with per-document error
+# reporting and a docs/sec summary at the end. Large JSONL/CSV catalogs are
+# streamed through the same pipeline in fixed-size windows, with a line-offset
+# checkpoint written after each window so interrupted imports can resume. Products
+# of a window that failed to embed or index go to a retry file next to the
+# checkpoint, and a resumed run ingests them again first.
+#
+# Documents are keyed by product_id and carry a content_hash of their embedding
+# text, so incremental syncs only re-embed products whose text changed, update
+# the other fields in place and delete products that left the source.
+#
+# Every embeddings request goes through the shared EmbeddingWorkerPool (RPM/TPM
+# token buckets, adaptive concurrency, retries on 429/5xx), and batches of a bulk
+# load are embedded concurrently on its worker threads.
+#
+# With a dedup threshold, near-duplicate listings (MinHash/LSH over the embedding
+# text, see dedup.py) skip the embeddings request: they are indexed with a copy of
+# the canonical product's vector and dup_of set to its product_id. Clusters form
+# within one run; when a canonical product changes text or is deleted, its
+# duplicates are re-clustered or embedded on their own.
+import csv
+import hashlib
+import json
+import os
+import time
+from itertools import islice
+
+from elasticsearch import helpers
+
+from clients import get_openai_client
+from dedup import DedupIndex
+from embedding_pool import get_embedding_pool
+from index_profiles import IndexProfile, get_profile, product_mapping
+
+# Model, dimensions and vector mapping come from the active index profile
+# (VECTOR_INDEX_PROFILE), so ingestion and query embeddings always agree
+PROFILE = get_profile()
+EMBEDDING_MODEL = PROFILE.model
+PRODUCT_MAPPING = product_mapping(PROFILE)
+
+
+def ensure_index(es, index_name: str, mapping: dict = PRODUCT_MAPPING):
+    if es.indices.exists(index=index_name):
+        print(f"Index '{index_name}' exists.")
+        return
+    es.indices.create(index=index_name, body=mapping)
+    print(f"Index '{index_name}' created.")
+
+
+def embedding_text(product: dict) -> str:
+    return f"{product['category']}. {product['description']}"
+
+
+def content_hash(product: dict) -> str:
+    return hashlib.sha256(embedding_text(product).encode("utf-8")).hexdigest()
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def embed_texts(texts: list, model: str = EMBEDDING_MODEL, client=None) -> list:
+    """
+    Embeds many texts with a single API request, preserving input order (raw model vectors).
+    The request is rate-limited and retried by the shared embedding pool; when it
+    still fails the error is raised, never replaced by a placeholder vector.
+    """
+    client = client or get_openai_client()
+
+    def request(batch):
+        response = client.embeddings.create(input=batch, model=model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    return get_embedding_pool().call(request, texts)
+
+
+def embed_batch(texts: list, model: str = EMBEDDING_MODEL, client=None, profile=None) -> list:
+    """Like embed_texts, with each vector shaped for the index profile (truncated / normalized)."""
+    profile = profile or PROFILE
+    return [profile.prepare(vector) for vector in embed_texts(texts, model=model, client=client)]
+
+
+class IngestStats:
+    # Only the first errors are kept in memory; the rest are printed and counted
+    MAX_KEPT_ERRORS = 1000
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.indexed = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+        # Set to a set by callers that need every failed product_id of a step
+        self.failed_ids = None
+
+    def fail(self, product_id, reason):
+        self.error_count += 1
+        if self.failed_ids is not None:
+            self.failed_ids.add(product_id)
+        if len(self.errors) < self.MAX_KEPT_ERRORS:
+            self.errors.append({"product_id": product_id, "error": str(reason)})
+        print(f"Failed to ingest product '{product_id}': {reason}")
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        rate = self.indexed / self.elapsed if self.elapsed else 0.0
+        summary = (f"Indexed {self.indexed} documents ({self.updated} updated, {self.unchanged} unchanged, "
+                   f"{self.deleted} deleted), {self.error_count} errors "
+                   f"in {self.elapsed:.1f}s ({rate:.1f} docs/sec)")
+        if self.duplicates:
+            summary += f", {self.duplicates} near-duplicates reused an embedding"
+        return summary
+
+
+def generate_actions(products, index_name: str, stats: IngestStats, embed_batch_size: int = 100,
+                     model: str = EMBEDDING_MODEL, dedup: DedupIndex = None, profile: IndexProfile = None):
+    """
+    Lazily turns products into bulk index actions. Batches are embedded concurrently
+    by the embedding pool's workers and yielded in input order. Products of a batch
+    whose embedding request fails are reported, never indexed with a placeholder vector.
+
+    :param dedup: Optional DedupIndex; near-duplicates reuse their canonical product's vector
+    :param profile: Index profile the vectors are shaped for (default: the active profile)
+    """
+    def embed(split):
+        unique, _ = split
+        return embed_batch([embedding_text(p) for p in unique], model=model, profile=profile) if unique else []
+
+    # Splitting runs lazily on this thread, so the DedupIndex is never shared across workers
+    splits = (_split_duplicates(batch, dedup, stats) for batch in batched(products, embed_batch_size))
+    pool = get_embedding_pool()
+    for (unique, duplicates), embeddings in pool.map_ordered(embed, splits):
+        yield from _index_actions(unique, embeddings, index_name, stats, dedup)
+        yield from _duplicate_actions(duplicates, index_name, stats, dedup)
+
+
+def _embed_and_index(batch: list, index_name: str, stats: IngestStats, model: str, dedup: DedupIndex = None,
+                     profile: IndexProfile = None):
+    unique, duplicates = _split_duplicates(batch, dedup, stats)
+    if unique:
+        try:
+            embeddings = embed_batch([embedding_text(p) for p in unique], model=model, profile=profile)
+        except Exception as e:
+            embeddings = e
+        yield from _index_actions(unique, embeddings, index_name, stats, dedup)
+    yield from _duplicate_actions(duplicates, index_name, stats, dedup)
+
+
+# Helper: products to embed, and near-duplicates of an earlier product (with dup_of set)
+def _split_duplicates(batch: list, dedup: DedupIndex, stats: IngestStats):
+    if dedup is None:
+        return batch, []
+    unique, duplicates = [], []
+    for product in batch:
+        canonical = dedup.add(product["product_id"], embedding_text(product))
+        if canonical == product["product_id"]:
+            unique.append(product)
+        else:
+            duplicates.append({**product, "dup_of": canonical})
+            stats.duplicates += 1
+    return unique, duplicates
+
+
+# Helper: near-duplicates are indexed with their canonical product's vector (no embedding call)
+def _duplicate_actions(duplicates: list, index_name: str, stats: IngestStats, dedup: DedupIndex):
+    for product in duplicates:
+        embedding = dedup.vector(product["dup_of"])
+        if embedding is None:
+            stats.fail(product["product_id"], f"canonical product '{product['dup_of']}' has no embedding")
+            continue
+        yield {
+            "_op_type": "index",
+            "_index": index_name,
+            "_id": product["product_id"],
+            "_source": {**product, "content_hash": content_hash(product), "embedding": embedding},
+        }
+
+
+# Helper: bulk actions for an embedded batch, or failures when embedding raised
+def _index_actions(batch: list, embeddings, index_name: str, stats: IngestStats, dedup: DedupIndex = None):
+    if isinstance(embeddings, Exception):
+        for product in batch:
+            stats.fail(product.get("product_id"), f"embedding error: {embeddings}")
+        return
+
+    for product, embedding in zip(batch, embeddings):
+        if dedup is not None:
+            dedup.set_vector(product["product_id"], embedding)
+        yield {
+            "_op_type": "index",
+            "_index": index_name,
+            "_id": product["product_id"],
+            "_source": {**product, "content_hash": content_hash(product), "embedding": embedding},
+        }
+
+
+def generate_sync_actions(es, products, index_name: str, stats: IngestStats, seen_ids: set,
+                          embed_batch_size: int = 100, model: str = EMBEDDING_MODEL, dedup: DedupIndex = None,
+                          changed_ids: set = None, profile: IndexProfile = None):
+    """
+    Like generate_actions, but compares each batch with the indexed documents first:
+    - new products or changed embedding text: re-embedded and re-indexed
+    - other fields changed (price, name, ...): partial update, embedding kept
+    - identical: skipped
+    Every product_id seen is added to seen_ids for the delete pass, and every
+    re-indexed one to changed_ids (see generate_dependent_actions).
+    """
+    # With dedup, unchanged canonical products hand their stored vector to new duplicates
+    source_excludes = None if dedup is not None else ["embedding"]
+    for batch in batched(products, embed_batch_size):
+        ids = [p["product_id"] for p in batch]
+        try:
+            response = es.mget(index=index_name, ids=ids, source_excludes=source_excludes)
+            existing = {doc["_id"]: doc["_source"] for doc in response["docs"] if doc.get("found")}
+        except Exception as e:
+            print(f"Lookup error, re-embedding batch: {e}")
+            existing = {}
+
+        to_embed = []
+        for product in batch:
+            seen_ids.add(product["product_id"])
+            doc = {**product, "content_hash": content_hash(product)}
+            current = existing.get(product["product_id"])
+            if current is None or current.get("content_hash") != doc["content_hash"]:
+                to_embed.append(product)
+                if changed_ids is not None:
+                    changed_ids.add(product["product_id"])
+                continue
+            if dedup is not None and not current.get("dup_of") and current.get("embedding"):
+                # Unchanged canonical products seed clusters for the new ones; duplicates
+                # never do, so a cluster cannot chain through them
+                if dedup.add(product["product_id"], embedding_text(product)) == product["product_id"]:
+                    dedup.set_vector(product["product_id"], current["embedding"])
+            current = {key: value for key, value in current.items() if key not in ("dup_of", "embedding")}
+            if current != doc:
+                yield {"_op_type": "update", "_index": index_name, "_id": product["product_id"], "doc": doc}
+            else:
+                stats.unchanged += 1
+
+        yield from _embed_and_index(to_embed, index_name, stats, model, dedup, profile)
+
+
+def generate_delete_actions(es, index_name: str, seen_ids: set, deleted_ids: set = None):
+    """Yields delete actions for indexed documents whose product_id is not in seen_ids."""
+    for doc in helpers.scan(es, index=index_name, query={"query": {"match_all": {}}}, _source=False):
+        if doc["_id"] not in seen_ids:
+            if deleted_ids is not None:
+                deleted_ids.add(doc["_id"])
+            yield {"_op_type": "delete", "_index": index_name, "_id": doc["_id"]}
+
+
+def generate_dependent_actions(es, index_name: str, canonical_ids: set, stats: IngestStats, skip_ids: set = (),
+                               embed_batch_size: int = 100, model: str = EMBEDDING_MODEL, dedup: DedupIndex = None,
+                               profile: IndexProfile = None):
+    """
+    Re-indexes the near-duplicates of canonical products that changed text or were
+    deleted, since their copied vector and dup_of are stale. With a DedupIndex they
+    may join another cluster; otherwise each one is embedded on its own.
+
+    :param canonical_ids: Product ids re-embedded or deleted in this run
+    :param skip_ids: Product ids already re-indexed or deleted in this run
+    """
+    def dependents():
+        for ids in batched(sorted(canonical_ids), 1000):
+            for doc in helpers.scan(es, index=index_name, query={"query": {"terms": {"dup_of": ids}}},
+                                    source_excludes=["embedding"]):
+                if doc["_id"] not in skip_ids:
+                    yield {key: value for key, value in doc["_source"].items() if key not in ("content_hash", "dup_of")}
+
+    for batch in batched(dependents(), embed_batch_size):
+        yield from _embed_and_index(batch, index_name, stats, model, dedup, profile)
+
+
+def indexed_documents(es, index_name: str):
+    """Yields the indexed product documents with their embedding (e.g. for LocalVectorEngine.build)."""
+    for doc in helpers.scan(es, index=index_name, query={"query": {"match_all": {}}}):
+        yield {key: value for key, value in doc["_source"].items() if key != "content_hash"}
+
+
+def run_bulk(es, actions, stats: IngestStats, chunk_size: int, thread_count: int):
+    if thread_count > 1:
+        results = helpers.parallel_bulk(es, actions, thread_count=thread_count, chunk_size=chunk_size,
+                                        raise_on_error=False, raise_on_exception=False)
+    else:
+        results = helpers.streaming_bulk(es, actions, chunk_size=chunk_size,
+                                         raise_on_error=False, raise_on_exception=False)
+
+    for ok, item in results:
+        op_type = next(iter(item))
+        if ok:
+            if op_type == "update":
+                stats.updated += 1
+            elif op_type == "delete":
+                stats.deleted += 1
+            else:
+                stats.indexed += 1
+        else:
+            info = next(iter(item.values()))
+            if op_type == "delete" and info.get("status") == 404:
+                # Already gone (e.g. a replayed change-feed delete)
+                continue
+            product_id = (info.get("data") or {}).get("product_id", info.get("_id"))
+            stats.fail(product_id, info.get("error"))
+
+
+def bulk_index(es, products, index_name: str, embed_batch_size: int = 100, chunk_size: int = 500,
+               thread_count: int = 1, model: str = EMBEDDING_MODEL, dedup_threshold: float = None) -> IngestStats:
+    """
+    Embeds and bulk-indexes an iterable of products.
+
+    :param es: Elasticsearch client
+    :param products: Iterable (or generator) of product dicts
+    :param index_name: Target index
+    :param embed_batch_size: Texts per embeddings API request
+    :param chunk_size: Documents per bulk request
+    :param thread_count: > 1 uses parallel_bulk with that many threads
+    :param dedup_threshold: MinHash similarity above which listings share one embedding (None = off)
+    :return: IngestStats with counters and per-document errors
+    """
+    stats = IngestStats()
+    dedup = DedupIndex(dedup_threshold) if dedup_threshold else None
+    actions = generate_actions(products, index_name, stats, embed_batch_size, model, dedup)
+    run_bulk(es, actions, stats, chunk_size, thread_count)
+
+    es.indices.refresh(index=index_name)
+    print(stats.summary())
+    return stats
+
+
+def sync_catalog(es, products, index_name: str, delete_missing: bool = True, embed_batch_size: int = 100,
+                 chunk_size: int = 500, thread_count: int = 1, model: str = EMBEDDING_MODEL,
+                 dedup_threshold: float = None) -> IngestStats:
+    """
+    Incrementally syncs the index with a full catalog: only changed products are
+    re-embedded, and with delete_missing, products absent from the source are deleted.
+
+    :return: IngestStats with indexed/updated/unchanged/deleted counters
+    """
+    stats = IngestStats()
+    seen_ids, changed_ids, deleted_ids = set(), set(), set()
+    dedup = DedupIndex(dedup_threshold) if dedup_threshold else None
+    actions = generate_sync_actions(es, products, index_name, stats, seen_ids, embed_batch_size, model, dedup,
+                                    changed_ids)
+    run_bulk(es, actions, stats, chunk_size, thread_count)
+
+    if delete_missing:
+        es.indices.refresh(index=index_name)
+        run_bulk(es, generate_delete_actions(es, index_name, seen_ids, deleted_ids), stats, chunk_size, thread_count)
+
+    # Duplicates of re-embedded or deleted canonical products
+    if changed_ids or deleted_ids:
+        es.indices.refresh(index=index_name)
+        actions = generate_dependent_actions(es, index_name, changed_ids | deleted_ids, stats,
+                                             changed_ids | deleted_ids, embed_batch_size, model, dedup)
+        run_bulk(es, actions, stats, chunk_size, thread_count)
+
+    es.indices.refresh(index=index_name)
+    print(stats.summary())
+    return stats
+
+
+REQUIRED_FIELDS = ("product_id", "name", "category", "description")
+
+
+def validate_product(product: dict) -> dict:
+    """
+    Checks required fields and normalizes types of a raw catalog record.
+
+    :raises ValueError: When a required field is missing or the price is invalid
+    """
+    if not isinstance(product, dict):
+        raise ValueError(f"expected an object, got {type(product).__name__}")
+    missing = [field for field in REQUIRED_FIELDS if not product.get(field)]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+
+    product = {key: value for key, value in product.items() if value not in (None, "")}
+    if "price" in product:
+        try:
+            product["price"] = float(product["price"])
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid price: {product['price']!r}")
+
+    # CSV files carry features as a "|"-separated string
+    if isinstance(product.get("features"), str):
+        product["features"] = [f.strip() for f in product["features"].split("|") if f.strip()]
+    return product
+
+
+def read_catalog(path: str, start_line: int = 0):
+    """
+    Streams raw records from a JSONL or CSV file, one at a time.
+
+    :param path: Catalog file (.jsonl / .json lines or .csv)
+    :param start_line: Number of records to skip (from a checkpoint)
+    :return: Generator of (record_number, record_or_exception); records are always dicts
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            records = csv.DictReader(f)
+            for line_no, record in enumerate(records):
+                if line_no >= start_line:
+                    yield line_no, record
+        else:
+            for line_no, line in enumerate(f):
+                if line_no < start_line or not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, ValueError(f"invalid JSON: {e}")
+                    continue
+                # Every consumer reads fields by name: arrays and scalars are rejected here
+                if isinstance(record, dict):
+                    yield line_no, record
+                else:
+                    yield line_no, ValueError(f"expected a JSON object, got {type(record).__name__}")
+
+
+def load_checkpoint(checkpoint_path: str) -> int:
+    try:
+        with open(checkpoint_path) as f:
+            return json.load(f)["line"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return 0
+
+
+def save_checkpoint(checkpoint_path: str, line: int, stats: IngestStats):
+    # Write-then-rename so a crash never leaves a truncated checkpoint
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"line": line, "indexed": stats.indexed, "errors": stats.error_count}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def read_retry_file(retry_path: str) -> list:
+    """Products saved by an earlier run because they failed to embed or index."""
+    try:
+        with open(retry_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def write_retry_file(retry_path: str, products: list, append: bool = True):
+    if append:
+        with open(retry_path, "a", encoding="utf-8") as f:
+            for product in products:
+                f.write(json.dumps(product) + "\n")
+        return
+    # Write-then-rename so the previous retry list survives a crash
+    tmp_path = f"{retry_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for product in products:
+            f.write(json.dumps(product) + "\n")
+    os.replace(tmp_path, retry_path)
+
+
+def ingest_file(es, path: str, index_name: str, checkpoint_path: str = None, resume: bool = True,
+                window_size: int = 5000, embed_batch_size: int = 100, chunk_size: int = 500,
+                thread_count: int = 1, model: str = EMBEDDING_MODEL, incremental: bool = False,
+                delete_missing: bool = False, dedup_threshold: float = None,
+                profile: IndexProfile = None) -> IngestStats:
+    """
+    Streams a catalog file through parse -> validate -> embed -> bulk index.
+
+    Memory is bounded by window_size: each window is fully indexed before the
+    checkpoint (next record number) is saved and the next window is read. Products
+    that failed to embed or index are saved to "<checkpoint>.retry.jsonl" first,
+    so the checkpoint never skips them: a resumed run ingests them again.
+
+    :param es: Elasticsearch client
+    :param path: JSONL or CSV catalog file
+    :param index_name: Target index
+    :param checkpoint_path: Checkpoint file, defaults to "<path>.checkpoint"
+    :param resume: Start from the saved checkpoint instead of the beginning
+    :param window_size: Records processed between checkpoints
+    :param incremental: Skip products whose content hash is unchanged (see sync_catalog)
+    :param delete_missing: With incremental, delete indexed products absent from the file
+        (only on a run that covers the whole file, never on a resumed one)
+    :param dedup_threshold: MinHash similarity above which listings share one embedding (None = off)
+    :param profile: Index profile of the target index (default: the active profile); its
+        model replaces model, so a new index is never filled with another profile's vectors
+    :return: IngestStats for this run
+    """
+    if profile is not None:
+        model = profile.model
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+    retry_path = f"{checkpoint_path}.retry.jsonl"
+    start_line = load_checkpoint(checkpoint_path) if resume else 0
+    if start_line:
+        print(f"Resuming '{path}' from record {start_line}")
+
+    stats = IngestStats()
+    seen_ids, changed_ids, deleted_ids = set(), set(), set()
+    dedup = DedupIndex(dedup_threshold) if dedup_threshold else None
+
+    # Helper: embeds and indexes products, returning the ones that failed
+    def index_products(products: list) -> list:
+        if incremental:
+            actions = generate_sync_actions(es, products, index_name, stats, seen_ids, embed_batch_size, model, dedup,
+                                            changed_ids, profile)
+        else:
+            actions = generate_actions(products, index_name, stats, embed_batch_size, model, dedup, profile)
+        stats.failed_ids = set()
+        try:
+            run_bulk(es, actions, stats, chunk_size, thread_count)
+            failed_ids = stats.failed_ids
+        finally:
+            stats.failed_ids = None
+        return [product for product in products if product["product_id"] in failed_ids]
+
+    retry = read_retry_file(retry_path) if resume else []
+    if retry:
+        print(f"Retrying {len(retry)} products that failed in an earlier run")
+        write_retry_file(retry_path, index_products(retry), append=False)
+    elif os.path.exists(retry_path):
+        os.remove(retry_path)
+
+    for window in batched(read_catalog(path, start_line), window_size):
+        products = []
+        for line_no, record in window:
+            if isinstance(record, Exception):
+                stats.fail(f"line {line_no}", record)
+                continue
+            try:
+                products.append(validate_product(record))
+            except ValueError as e:
+                stats.fail(record.get("product_id") or f"line {line_no}", e)
+
+        failed = index_products(products)
+        if failed:
+            # Saved before the checkpoint moves past them
+            write_retry_file(retry_path, failed)
+
+        next_line = window[-1][0] + 1
+        save_checkpoint(checkpoint_path, next_line, stats)
+        print(f"Checkpoint at record {next_line}: {stats.summary()}")
+
+    if incremental and delete_missing:
+        if start_line:
+            print("Resumed run: skipping deletion of missing products.")
+        else:
+            es.indices.refresh(index=index_name)
+            run_bulk(es, generate_delete_actions(es, index_name, seen_ids, deleted_ids), stats, chunk_size,
+                     thread_count)
+
+    # Duplicates of re-embedded or deleted canonical products (see sync_catalog)
+    if changed_ids or deleted_ids:
+        es.indices.refresh(index=index_name)
+        actions = generate_dependent_actions(es, index_name, changed_ids | deleted_ids, stats,
+                                             changed_ids | deleted_ids, embed_batch_size, model, dedup, profile)
+        run_bulk(es, actions, stats, chunk_size, thread_count)
+
+    es.indices.refresh(index=index_name)
+    print(stats.summary())
+    retry = read_retry_file(retry_path)
+    if retry:
+        print(f"{len(retry)} products failed and were saved to '{retry_path}'; rerun to retry them.")
+    return stats
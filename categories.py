@@ -0,0 +1,201 @@
+# categories.py
+# Category resolver shared by the tools. Free-text category arguments ("phones",
+# "smartphone", "Smartphnes", "all categories") are mapped onto the canonical
+# category names used by Elasticsearch, Neo4j and the promotion catalog, in order:
+#   1. exact match of the normalized text, or of a word / word pair in it
+#   2. synonym table (also maps every "all" variant to ALL_CATEGORIES)
+#   3. trigram index: best Jaccard similarity over candidates sharing a trigram
+#   4. edit distance 1 as a last resort for short typos
+# The tools turn the result into a hard filter, so a wrong category is worse than
+# none: a phrase naming two categories ("mobile games") and a fuzzy match that
+# fits two categories equally well both resolve to None.
+# Results are memoized, so repeated arguments resolve in constant time.
+import re
+import threading
+from functools import lru_cache
+from typing import Optional
+
+ALL_CATEGORIES = "all"
+
+# Categories of the seed catalog (elastic/ingest-*.py, neo4j/data)
+KNOWN_CATEGORIES = (
+    "Accessories", "E-readers", "Electronics", "Footwear", "Gaming", "Health",
+    "Laptops", "Musical Instruments", "Smartphones", "Sports",
+)
+
+CATEGORY_SYNONYMS = {
+    "all": ALL_CATEGORIES, "all categories": ALL_CATEGORIES, "any": ALL_CATEGORIES,
+    "everything": ALL_CATEGORIES, "all products": ALL_CATEGORIES, "": ALL_CATEGORIES,
+    "phone": "Smartphones", "cell phone": "Smartphones", "mobile": "Smartphones", "cellphone": "Smartphones",
+    "earbuds": "Accessories", "headphones": "Accessories", "earphones": "Accessories",
+    "case": "Accessories", "phone case": "Accessories", "cover": "Accessories", "charger": "Accessories",
+    "shoes": "Footwear", "sneakers": "Footwear", "running shoes": "Footwear",
+    "tv": "Electronics", "television": "Electronics", "electronic": "Electronics",
+    "notebook": "Laptops", "computer": "Laptops",
+    "console": "Gaming", "video games": "Gaming", "games": "Gaming",
+    "ebook": "E-readers", "kindle": "E-readers", "ereader": "E-readers",
+    "fitness": "Sports", "sport": "Sports",
+    "instrument": "Musical Instruments", "guitar": "Musical Instruments",
+    "wellness": "Health",
+}
+
+
+def normalize_category(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int = 2) -> int:
+    """Levenshtein distance, returning limit + 1 once it is certain to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class CategoryResolver:
+    def __init__(self, categories, synonyms: Optional[dict] = None, min_similarity: float = 0.4):
+        """
+        :param categories: Canonical category names
+        :param synonyms: Extra normalized phrase -> canonical name (or ALL_CATEGORIES)
+        :param min_similarity: Minimum trigram Jaccard similarity for a fuzzy match
+        """
+        self.categories = sorted(set(categories))
+        self.min_similarity = min_similarity
+        self.exact = {}
+        for name in self.categories:
+            key = normalize_category(name)
+            self.exact[key] = name
+            # Singular forms: "smartphone", "laptop", "accessory"
+            if key.endswith("ies"):
+                self.exact.setdefault(key[:-3] + "y", name)
+            elif key.endswith("s"):
+                self.exact.setdefault(key[:-1], name)
+        self.synonyms = {normalize_category(k): v for k, v in {**CATEGORY_SYNONYMS, **(synonyms or {})}.items()
+                         if v == ALL_CATEGORIES or v in self.exact.values()}
+
+        # Inverted trigram index over every exact and synonym key
+        self._keys = list(self.exact) + [k for k in self.synonyms if k]
+        self._key_trigrams = [trigrams(key) for key in self._keys]
+        self._index = {}
+        for position, grams in enumerate(self._key_trigrams):
+            for gram in grams:
+                self._index.setdefault(gram, []).append(position)
+        self.resolve = lru_cache(maxsize=4096)(self._resolve)
+
+    # Helper: canonical name of an exact or synonym key
+    def _lookup(self, key: str) -> Optional[str]:
+        if key in self.exact:
+            return self.exact[key]
+        return self.synonyms.get(key)
+
+    def _resolve(self, text: str) -> Optional[str]:
+        """
+        :return: Canonical category name, ALL_CATEGORIES, or None when nothing is close enough
+        """
+        text = normalize_category(text or "")
+        found = self._lookup(text)
+        if found is not None:
+            return found
+
+        # Categories named inside a phrase: "smartphones on sale", "cheap running shoes"
+        words = text.split()
+        found_categories = self._named(words)
+        if found_categories:
+            return self._pick(found_categories)
+
+        # Trigram similarity over candidates sharing at least one trigram
+        grams = trigrams(text)
+        shared = {}
+        for gram in grams:
+            for position in self._index.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        scores = {}
+        for position, common in shared.items():
+            score = common / (len(grams) + len(self._key_trigrams[position]) - common)
+            if score >= self.min_similarity:
+                category = self._lookup(self._keys[position])
+                scores[category] = max(score, scores.get(category, 0.0))
+        if scores:
+            best_score = max(scores.values())
+            return self._unique({category for category, score in scores.items() if score == best_score})
+
+        # Short typos trigrams miss ("lptop"); every word is tried against every key
+        typos = {self._lookup(key) for word in words or [text] for key in self._keys
+                 if len(key) > 4 and edit_distance(word, key, limit=1) <= 1}
+        return self._unique(typos) if typos else None
+
+    # Helper: exact and synonym keys (or their plurals) among the words and word pairs.
+    # A word pair wins over its own words ("phone case" is an accessory)
+    def _named(self, words: list) -> set:
+        found_categories = set()
+        covered = set()
+        for size in (2, 1):
+            for i in range(len(words) - size + 1):
+                if size == 1 and i in covered:
+                    continue
+                key = " ".join(words[i:i + size])
+                found = self._lookup(key)
+                if found is None and key.endswith("s"):
+                    found = self._lookup(key[:-1])
+                if found is not None:
+                    found_categories.add(found)
+                    covered.update(range(i, i + size))
+        return found_categories
+
+    def mentioned(self, text: str) -> Optional[str]:
+        """
+        Category named word for word in a free-text request ("samsung phones with a good
+        camera"), without the fuzzy fallbacks: the words of a search query are not typos.
+
+        :return: Canonical category name, ALL_CATEGORIES, or None when none or several are named
+        """
+        return self._pick(self._named(normalize_category(text or "").split()))
+
+    # Helper: a specific category beats "all"; two specific ones are ambiguous
+    def _pick(self, found_categories: set) -> Optional[str]:
+        specific = found_categories - {ALL_CATEGORIES}
+        if specific:
+            return self._unique(specific)
+        return ALL_CATEGORIES if found_categories else None
+
+    # Helper: the single category of a match, or None when it is ambiguous
+    @staticmethod
+    def _unique(categories: set) -> Optional[str]:
+        return next(iter(categories)) if len(categories) == 1 else None
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_category_resolver() -> CategoryResolver:
+    """Returns the process-wide resolver over the seed categories and the promotion catalog's."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                from promotions import get_promotion_catalog
+
+                categories = {row["category"] for row in get_promotion_catalog().rows}
+                _resolver = CategoryResolver(set(KNOWN_CATEGORIES) | categories)
+    return _resolver
+
+
+def resolve_category(text: str) -> Optional[str]:
+    return get_category_resolver().resolve(text)
+
+
+def category_in_text(text: str) -> Optional[str]:
+    return get_category_resolver().mentioned(text)
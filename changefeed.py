@@ -0,0 +1,452 @@
+# changefeed.py
+# Long-running ingestion daemon that keeps Elasticsearch and Neo4j in sync with an
+# append-only change log. The log is JSONL, one event per line:
+#   {"type": "product_upsert", "product": {...catalog record...}}
+#   {"type": "product_delete", "product_id": "P001", "name": "Galaxy Buds Pro"}
+#   {"type": "purchased", "user_id": "bob", "product_name": "Galaxy Buds Pro"}
+#   {"type": "friends_with", "user_id": "bob", "friend_id": "carol"}
+# with an optional "ts" (epoch seconds or ISO 8601) used for the lag metric.
+#
+# Events are tailed from a byte offset and applied in micro-batches: one sync bulk
+# request stream to Elasticsearch (only changed product texts are re-embedded) and
+# one Neo4j write transaction of UNWIND statements. The offset is checkpointed
+# after both stores have committed without errors (a failed embedding or bulk item
+# fails the batch, which is retried from the same offset), so a restart replays at
+# most one batch.
+# Every write is idempotent (index by product_id, MERGE), so replays are harmless.
+# A batch that keeps failing for another reason than an unavailable store is not
+# retried forever: after max_attempts its failing events (the failed products, or the
+# whole batch when the failure names none) are appended to "<log>.deadletter.jsonl",
+# the rest is applied and the offset moves on. The dead-letter file is itself a
+# change log, so it can be replayed once the cause is fixed.
+#
+# Usage: python changefeed.py changes.jsonl [--once] [--metrics-file metrics.json]
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from elasticsearch import ConnectionError as ElasticConnectionError, ConnectionTimeout
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+from catalog_ingest import (
+    IngestStats, batched, generate_dependent_actions, generate_sync_actions, run_bulk, validate_product
+)
+from clients import get_elasticsearch, get_neo4j_driver
+from graph_bulk_load import FRIENDS_WITH_QUERY, PURCHASED_QUERY, UPSERT_PRODUCTS_QUERY, product_row
+from graph_schema import bootstrap_schema
+
+EVENT_TYPES = ("product_upsert", "product_delete", "purchased", "friends_with")
+
+# Store outages: retried without limit, they say nothing about the events
+TRANSIENT_ERRORS = (ElasticConnectionError, ConnectionTimeout, ServiceUnavailable, SessionExpired, TransientError)
+
+DELETE_PRODUCTS_QUERY = """
+UNWIND $product_ids AS product_id
+MATCH (p:Product {product_id: product_id})
+DETACH DELETE p
+"""
+
+# Products loaded from the seed files have no product_id, only their name
+DELETE_PRODUCTS_BY_NAME_QUERY = """
+UNWIND $names AS name
+MATCH (p:Product {name: name})
+DETACH DELETE p
+"""
+
+
+def event_time(event: dict):
+    """Event timestamp in epoch seconds, or None when the event has no usable "ts"."""
+    ts = event.get("ts")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        try:
+            return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_event(line: str) -> dict:
+    """
+    Parses and validates one change-log line.
+
+    :raises ValueError: On invalid JSON, an unknown type or missing fields
+    """
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}")
+    if not isinstance(event, dict) or event.get("type") not in EVENT_TYPES:
+        raise ValueError(f"unknown event type: {event.get('type') if isinstance(event, dict) else event!r}")
+
+    kind = event["type"]
+    if kind == "product_upsert":
+        event["product"] = validate_product(event.get("product"))
+    elif kind == "product_delete" and not event.get("product_id"):
+        raise ValueError("product_delete needs a product_id")
+    elif kind == "purchased" and not (event.get("user_id") and event.get("product_name")):
+        raise ValueError("purchased needs user_id and product_name")
+    elif kind == "friends_with" and not (event.get("user_id") and event.get("friend_id")):
+        raise ValueError("friends_with needs user_id and friend_id")
+    return event
+
+
+class BatchWriteError(RuntimeError):
+    """A micro-batch whose product writes failed, with the failed product ids."""
+
+    def __init__(self, message: str, product_ids: set):
+        super().__init__(message)
+        self.product_ids = product_ids
+
+
+# Helper: product_id of a product event, None for graph events
+def event_product_id(event: dict):
+    if event["type"] == "product_upsert":
+        return event["product"]["product_id"]
+    return event.get("product_id") if event["type"] == "product_delete" else None
+
+
+def plan_batch(events: list) -> dict:
+    """
+    Groups a micro-batch into per-store writes. Product events are collapsed to
+    the last one per product_id, so an upsert followed by a delete only deletes.
+    """
+    products = {}
+    for event in events:
+        if event["type"] in ("product_upsert", "product_delete"):
+            product_id = event_product_id(event)
+            products.pop(product_id, None)
+            products[product_id] = event
+
+    upserts = [e["product"] for e in products.values() if e["type"] == "product_upsert"]
+    deletes = [e for e in products.values() if e["type"] == "product_delete"]
+    # User ids are stored lowercase, as the social tool queries them
+    return {
+        "upserts": upserts,
+        "deletes": deletes,
+        "friends": [{"user_id": e["user_id"].lower(), "friend_id": e["friend_id"].lower()}
+                    for e in events if e["type"] == "friends_with"],
+        "purchases": [{"user_id": e["user_id"].lower(), "product_name": e["product_name"]}
+                      for e in events if e["type"] == "purchased"],
+    }
+
+
+# Helper: one write transaction for the graph side of a batch
+def write_graph_batch(tx, plan: dict, batch_size: int = 1000):
+    # Products are keyed by name in the graph (see neo4j/ingest-*.py)
+    upserts = [product_row(p) for p in plan["upserts"]]
+    for rows in batched(upserts, batch_size):
+        tx.run(UPSERT_PRODUCTS_QUERY, rows=rows)
+    for rows in batched(plan["friends"], batch_size):
+        tx.run(FRIENDS_WITH_QUERY, rows=rows)
+    for rows in batched(plan["purchases"], batch_size):
+        tx.run(PURCHASED_QUERY, rows=rows)
+    # Deletes last: a product deleted in this batch also loses its new relationships
+    product_ids = [e["product_id"] for e in plan["deletes"]]
+    if product_ids:
+        tx.run(DELETE_PRODUCTS_QUERY, product_ids=product_ids)
+    names = [e["name"] for e in plan["deletes"] if e.get("name")]
+    if names:
+        tx.run(DELETE_PRODUCTS_BY_NAME_QUERY, names=names)
+
+
+class FeedMetrics:
+    def __init__(self):
+        self.started = time.time()
+        self.events = 0
+        self.batches = 0
+        self.invalid = 0
+        self.dead_lettered = 0
+        self.offset = 0
+        self.log_size = 0
+        self.last_event_time = None
+        self.last_batch_seconds = 0.0
+
+    def snapshot(self, stats: IngestStats) -> dict:
+        elapsed = time.time() - self.started
+        lag_bytes = max(0, self.log_size - self.offset)
+        # Caught up means no lag, however old the last event is
+        lag_seconds = 0.0
+        if lag_bytes and self.last_event_time is not None:
+            lag_seconds = max(0.0, time.time() - self.last_event_time)
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "events_per_sec": round(self.events / elapsed, 2) if elapsed else 0.0,
+            "invalid_events": self.invalid,
+            "dead_lettered_events": self.dead_lettered,
+            "errors": stats.error_count,
+            "offset": self.offset,
+            "lag_bytes": lag_bytes,
+            "lag_seconds": round(lag_seconds, 3),
+            "last_batch_seconds": round(self.last_batch_seconds, 3),
+            "indexed": stats.indexed,
+            "updated": stats.updated,
+            "unchanged": stats.unchanged,
+            "deleted": stats.deleted,
+        }
+
+
+class ChangeFeed:
+    def __init__(self, log_path: str, es=None, driver=None, index_name: str = "products",
+                 checkpoint_path: str = None, batch_size: int = 500, flush_interval: float = 1.0,
+                 poll_interval: float = 0.5, metrics_path: str = None, max_attempts: int = 5,
+                 dead_letter_path: str = None):
+        """
+        :param log_path: Append-only JSONL change log
+        :param es: Elasticsearch client (None skips the product index)
+        :param driver: Neo4j driver (None skips the graph)
+        :param checkpoint_path: Offset checkpoint, defaults to "<log_path>.checkpoint"
+        :param batch_size: Maximum events per micro-batch
+        :param flush_interval: Seconds to wait for a batch to fill before applying it
+        :param poll_interval: Seconds between polls of the log once caught up
+        :param metrics_path: Optional JSON file rewritten with the metrics after each batch
+        :param max_attempts: Failed attempts at a batch before its failing events are dead-lettered
+        :param dead_letter_path: Events given up on, defaults to "<log_path>.deadletter.jsonl"
+        """
+        self.log_path = log_path
+        self.es = es
+        self.driver = driver
+        self.index_name = index_name
+        self.checkpoint_path = checkpoint_path or f"{log_path}.checkpoint"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.metrics_path = metrics_path
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path or f"{log_path}.deadletter.jsonl"
+        self.stats = IngestStats()
+        self.metrics = FeedMetrics()
+        self.metrics.offset = self.load_checkpoint()
+        # Failed attempts at the batch starting at the offset
+        self.attempts = 0
+        # Invalid lines before this byte were counted already (a retried batch is re-read)
+        self.counted_offset = self.metrics.offset
+
+    def load_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)["offset"]
+        except (FileNotFoundError, KeyError, ValueError):
+            return 0
+
+    def save_checkpoint(self):
+        # Write-then-rename so a crash never leaves a truncated checkpoint
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": self.metrics.offset, "events": self.metrics.events,
+                       "last_event_time": self.metrics.last_event_time}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def read_batch(self) -> tuple:
+        """
+        Reads up to batch_size complete lines after the committed offset, waiting
+        at most flush_interval for the batch to fill.
+
+        :return: (events, offset after the last line read)
+        """
+        try:
+            self.metrics.log_size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            return [], self.metrics.offset
+        if self.metrics.log_size < self.metrics.offset:
+            print(f"Change log '{self.log_path}' shrank below the checkpoint; restarting from the beginning.")
+            self.metrics.offset = 0
+            self.counted_offset = 0
+
+        events = []
+        offset = self.metrics.offset
+        deadline = time.monotonic() + self.flush_interval
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            while len(events) < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # End of file or a line still being written: wait for more or flush
+                    if not events or time.monotonic() >= deadline:
+                        break
+                    time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+                    f.seek(offset)
+                    continue
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    events.append(parse_event(line.decode("utf-8")))
+                except (ValueError, UnicodeDecodeError) as e:
+                    if offset - len(line) >= self.counted_offset:
+                        self.metrics.invalid += 1
+                        print(f"Skipping invalid change event at byte {offset - len(line)}: {e}")
+        self.metrics.log_size = max(self.metrics.log_size, offset)
+        self.counted_offset = max(self.counted_offset, offset)
+        return events, offset
+
+    def apply(self, events: list):
+        """
+        Applies a micro-batch to both stores.
+
+        :raises BatchWriteError: When a product could not be embedded or written, so the
+            batch is not checkpointed (replaying it is idempotent)
+        :raises Exception: Whatever a store raises when it is unavailable
+        """
+        plan = plan_batch(events)
+        if self.es is not None and (plan["upserts"] or plan["deletes"]):
+            errors_before = self.stats.error_count
+            self.stats.failed_ids = set()
+            try:
+                self.write_products(plan)
+                failed_ids = self.stats.failed_ids
+            finally:
+                self.stats.failed_ids = None
+            if self.stats.error_count > errors_before:
+                raise BatchWriteError(f"{self.stats.error_count - errors_before} product writes failed", failed_ids)
+
+        if self.driver is not None and any(plan[key] for key in ("upserts", "deletes", "friends", "purchases")):
+            with self.driver.session() as session:
+                session.execute_write(write_graph_batch, plan)
+
+    # Helper: the Elasticsearch side of a batch
+    def write_products(self, plan: dict):
+        changed_ids = set()
+        deleted_ids = {e["product_id"] for e in plan["deletes"]}
+        actions = list(generate_sync_actions(self.es, plan["upserts"], self.index_name, self.stats, set(),
+                                             changed_ids=changed_ids))
+        actions += [{"_op_type": "delete", "_index": self.index_name, "_id": product_id}
+                    for product_id in deleted_ids]
+        # Near-duplicates of a re-embedded or deleted product get their own embedding
+        if changed_ids or deleted_ids:
+            skip_ids = deleted_ids | {p["product_id"] for p in plan["upserts"]}
+            actions += list(generate_dependent_actions(self.es, self.index_name, changed_ids | deleted_ids,
+                                                       self.stats, skip_ids))
+        run_bulk(self.es, actions, self.stats, chunk_size=500, thread_count=1)
+
+    def step(self) -> int:
+        """Reads, applies and checkpoints one micro-batch. Returns the number of events applied."""
+        events, offset = self.read_batch()
+        if offset == self.metrics.offset:
+            return 0
+
+        started = time.perf_counter()
+        if events:
+            try:
+                self.apply(events)
+            except TRANSIENT_ERRORS:
+                raise
+            except Exception as e:
+                self.attempts += 1
+                if self.attempts < self.max_attempts:
+                    raise
+                events = self.set_aside(events, e)
+        self.attempts = 0
+        self.metrics.offset = offset
+        self.metrics.events += len(events)
+        self.metrics.batches += 1
+        self.metrics.last_batch_seconds = time.perf_counter() - started
+        timestamps = [t for t in (event_time(e) for e in events) if t is not None]
+        if timestamps:
+            self.metrics.last_event_time = max(timestamps)
+        self.save_checkpoint()
+        self.report()
+        return len(events)
+
+    def set_aside(self, events: list, error: Exception) -> list:
+        """
+        Gives up on the events of a batch that failed max_attempts times: the failed
+        products' events (every event when the error names no product) are appended
+        to the dead-letter file, and the other events are applied.
+
+        :return: The events applied
+        """
+        failed_ids = getattr(error, "product_ids", None)
+        if failed_ids:
+            failing = [e for e in events if event_product_id(e) in failed_ids]
+            remaining = [e for e in events if event_product_id(e) not in failed_ids]
+        else:
+            failing, remaining = events, []
+        if remaining:
+            self.apply(remaining)
+
+        with open(self.dead_letter_path, "a") as f:
+            for event in failing:
+                f.write(json.dumps({**event, "error": str(error)}) + "\n")
+        self.metrics.dead_lettered += len(failing)
+        print(f"Batch failed {self.attempts} times; {len(failing)} events moved to '{self.dead_letter_path}': {error}")
+        return remaining
+
+    def report(self):
+        metrics = self.metrics.snapshot(self.stats)
+        print(f"Applied batch {metrics['batches']}: {metrics['events']} events, "
+              f"lag {metrics['lag_bytes']} bytes / {metrics['lag_seconds']:.1f}s, {metrics['errors']} errors")
+        if self.metrics_path:
+            tmp_path = f"{self.metrics_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(metrics, f)
+            os.replace(tmp_path, self.metrics_path)
+
+    def run(self, once: bool = False, retry_delay: float = 5.0):
+        """
+        Tails the log until interrupted (or, with once, until caught up). A batch that
+        fails is retried from the same offset: without limit while a store is unavailable,
+        max_attempts times otherwise (see set_aside).
+        """
+        print(f"Tailing '{self.log_path}' from byte {self.metrics.offset}")
+        try:
+            while True:
+                try:
+                    applied = self.step()
+                except Exception as e:
+                    print(f"Change batch failed, retrying in {retry_delay:.0f}s: {e}")
+                    time.sleep(retry_delay)
+                    continue
+                if applied == 0 and self.metrics.offset >= self.metrics.log_size:
+                    if once:
+                        break
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print("Stopping change feed.")
+        print(self.stats.summary())
+        return self.metrics.snapshot(self.stats)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply an append-only change log to Elasticsearch and Neo4j.")
+    parser.add_argument("path", help="Change log (.jsonl)")
+    parser.add_argument("--index", default="products", help="Elasticsearch index or alias")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <path>.checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Maximum events per micro-batch")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="Seconds to wait for a batch to fill")
+    parser.add_argument("--metrics-file", default=None, help="JSON file rewritten with lag metrics after each batch")
+    parser.add_argument("--max-attempts", type=int, default=5, help="Failed attempts before a batch's failing events are dead-lettered")
+    parser.add_argument("--dead-letter", default=None, help="Dead-letter file (default: <path>.deadletter.jsonl)")
+    parser.add_argument("--once", action="store_true", help="Exit once the log is fully applied")
+    parser.add_argument("--skip-elastic", action="store_true", help="Only apply graph changes")
+    parser.add_argument("--skip-neo4j", action="store_true", help="Only apply product index changes")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    driver = None if args.skip_neo4j else get_neo4j_driver()
+    if driver is not None:
+        # The UNWIND MERGEs look users and products up by their unique keys
+        bootstrap_schema(driver)
+    feed = ChangeFeed(
+        args.path,
+        es=None if args.skip_elastic else get_elasticsearch(),
+        driver=driver,
+        index_name=args.index,
+        checkpoint_path=args.checkpoint,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        metrics_path=args.metrics_file,
+        max_attempts=args.max_attempts,
+        dead_letter_path=args.dead_letter,
+    )
+    feed.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
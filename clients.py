@@ -0,0 +1,185 @@
+# clients.py
+# Process-wide registry of long-lived backend clients (Elasticsearch, Neo4j, OpenAI).
+# Clients are created lazily on first use, shared by every tool call and closed once
+# at interpreter exit, so each tool hop reuses warm keep-alive connection pools
+# instead of paying a TLS handshake per request.
+import atexit
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_lock = threading.RLock()  # re-entrant: the OpenAI factories resolve the shared HTTP client
+_clients = {}
+
+
+def is_local() -> bool:
+    return os.getenv("LOCAL", "false").lower() == "true"
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _get_or_create(key, factory):
+    # Double-checked locking: the fast path never takes the lock once the client exists
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def _create_elasticsearch():
+    from elasticsearch import Elasticsearch
+
+    pool_params = {
+        "connections_per_node": _int_env("ELASTIC_MAX_CONNECTIONS", 10),
+        "request_timeout": _int_env("ELASTIC_REQUEST_TIMEOUT", 30),
+        "retry_on_timeout": True,
+        "max_retries": 3,
+    }
+
+    if is_local():
+        # Local environment configuration
+        endpoint = os.getenv("ELASTIC_HOST", "https://localhost:9200")
+        username = os.getenv("ELASTIC_USERNAME", "elastic")
+        password = os.getenv("ELASTIC_PASSWORD", "elastic")
+        return Elasticsearch(endpoint, basic_auth=(username, password), verify_certs=False,
+                             ssl_show_warn=False, **pool_params)
+
+    # Azure environment configuration
+    endpoint = os.getenv("ELASTIC_ENDPOINT", "https://elastic-products.es.westus2.azure.elastic-cloud.com")
+    api_key = os.getenv("ELASTIC_API_KEY")
+
+    auth_params = {}
+    if api_key:
+        if ":" in api_key:
+            parts = api_key.split(":")
+            auth_params["api_key"] = (parts[0], parts[1])
+        else:
+            auth_params["headers"] = {"Authorization": f"ApiKey {api_key}"}
+    return Elasticsearch(endpoint, verify_certs=True, **auth_params, **pool_params)
+
+
+def _create_neo4j_driver():
+    from neo4j import GraphDatabase
+
+    if is_local():
+        uri = os.getenv("NEO4J_URI")
+        user = os.getenv("NEO4J_USER")
+        password = os.getenv("NEO4J_PASSWORD")
+    else:
+        uri = os.getenv("NEO4J_URI_AZURE")
+        user = os.getenv("NEO4J_USER_AZURE")
+        password = os.getenv("NEO4J_PASSWORD_AZURE")
+
+    return GraphDatabase.driver(
+        uri,
+        auth=(user, password),
+        max_connection_pool_size=_int_env("NEO4J_MAX_POOL_SIZE", 50),
+        max_connection_lifetime=_int_env("NEO4J_MAX_CONNECTION_LIFETIME", 3600),
+        connection_acquisition_timeout=_int_env("NEO4J_ACQUISITION_TIMEOUT", 60),
+        keep_alive=True,
+    )
+
+
+def _create_http_client():
+    import httpx
+
+    max_connections = _int_env("OPENAI_MAX_CONNECTIONS", 20)
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=_int_env("OPENAI_KEEPALIVE_EXPIRY", 60),
+    )
+    return httpx.Client(limits=limits, timeout=_int_env("OPENAI_REQUEST_TIMEOUT", 60))
+
+
+def get_elasticsearch():
+    """Returns the shared Elasticsearch client."""
+    return _get_or_create("elasticsearch", _create_elasticsearch)
+
+
+def get_neo4j_driver():
+    """Returns the shared Neo4j driver (it owns its own connection pool)."""
+    return _get_or_create("neo4j", _create_neo4j_driver)
+
+
+def get_http_client():
+    """Returns the shared keep-alive HTTP client used by every OpenAI client."""
+    return _get_or_create("http", _create_http_client)
+
+
+def get_openai_client():
+    """Returns the shared OpenAI SDK client (embeddings)."""
+    def factory():
+        import openai
+        return openai.OpenAI(http_client=get_http_client())
+
+    return _get_or_create("openai", factory)
+
+
+def get_chat_model(model: str, temperature: float = 0):
+    """Returns a shared ChatOpenAI instance per (model, temperature)."""
+    def factory():
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, temperature=temperature, http_client=get_http_client())
+
+    return _get_or_create(("chat", model, temperature), factory)
+
+
+def health_check() -> dict:
+    """
+    Checks every backend and reports its status.
+
+    :return: Mapping of backend name to "ok" or the error message
+    """
+    status = {}
+
+    try:
+        status["elasticsearch"] = "ok" if get_elasticsearch().ping() else "unreachable"
+    except Exception as e:
+        status["elasticsearch"] = f"error: {e}"
+
+    try:
+        get_neo4j_driver().verify_connectivity()
+        status["neo4j"] = "ok"
+    except Exception as e:
+        status["neo4j"] = f"error: {e}"
+
+    try:
+        get_openai_client().models.list()
+        status["openai"] = "ok"
+    except Exception as e:
+        status["openai"] = f"error: {e}"
+
+    return status
+
+
+def shutdown():
+    """Closes every client that was created. Safe to call more than once."""
+    with _lock:
+        clients = list(_clients.items())
+        _clients.clear()
+
+    for key, client in clients:
+        # ChatOpenAI instances share the HTTP client, which is closed on its own
+        if isinstance(key, tuple):
+            continue
+        try:
+            client.close()
+        except Exception as e:
+            print(f"Error closing {key} client: {e}")
+
+
+atexit.register(shutdown)
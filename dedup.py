@@ -0,0 +1,131 @@
+# dedup.py
+# Near-duplicate detection for catalog ingestion. Each embedding text gets a
+# MinHash signature over its word shingles; LSH banding buckets signatures so only
+# texts sharing a band are compared. A product whose estimated Jaccard similarity
+# with an earlier one reaches the threshold joins that product's cluster: it is
+# indexed with a copy of the canonical product's vector instead of its own
+# embedding call, with dup_of pointing at the cluster's canonical product_id, and
+# search results are collapsed on dup_of.
+import hashlib
+import re
+from typing import Optional
+
+import numpy as np
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word n-grams of the normalized text (the whole text when it is shorter)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _shingle_hashes(items: set) -> np.ndarray:
+    # Stable across processes, unlike the built-in hash()
+    return np.array([int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=4).digest(), "little")
+                     for item in items], dtype=np.uint64)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = _shingle_hashes(shingles(text))
+        # (a * x + b) mod p for every (permutation, shingle) pair; a, x < 2^32 so uint64 never overflows
+        values = (np.outer(self.a, hashes) + self.b[:, np.newaxis]) % _PRIME
+        return values.min(axis=1)
+
+
+def estimated_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+class DedupIndex:
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 16):
+        """
+        :param threshold: Minimum estimated Jaccard similarity to treat two texts as duplicates
+        :param num_perm: MinHash signature length
+        :param bands: LSH bands (num_perm / bands rows each); more bands = more candidates
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+        self.canonical = {}
+        # Canonical vectors as float32 (what the index stores), copied into duplicates
+        self.vectors = {}
+        self.duplicates = 0
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, text: str, signature: Optional[np.ndarray] = None) -> Optional[str]:
+        """Returns the canonical key of the best matching cluster, or None."""
+        signature = self.hasher.signature(text) if signature is None else signature
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = estimated_jaccard(signature, self.signatures[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def add(self, key: str, text: str) -> str:
+        """
+        Registers a text and returns the canonical key of its cluster: key itself
+        for a new cluster, otherwise the first key seen with a near-identical text.
+        """
+        if key in self.canonical:
+            return self.canonical[key]
+        signature = self.hasher.signature(text)
+        match = self.find(text, signature)
+        if match is not None:
+            self.canonical[key] = self.canonical[match]
+            self.duplicates += 1
+            return self.canonical[key]
+
+        # Only canonical texts are bucketed: duplicates would just repeat their cluster
+        self.canonical[key] = key
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(band_key, []).append(key)
+        return key
+
+    def set_vector(self, key: str, vector: list):
+        """Remembers the embedding of a canonical key for its duplicates."""
+        if self.canonical.get(key) == key:
+            self.vectors[key] = np.asarray(vector, dtype=np.float32)
+
+    def vector(self, key: str) -> Optional[list]:
+        """Embedding of the canonical key, or None when it was not embedded (e.g. it failed)."""
+        vector = self.vectors.get(key)
+        return None if vector is None else vector.tolist()
+
+
+def collapse_duplicates(hits: list) -> list:
+    """Keeps the best-ranked hit of each duplicate cluster (dup_of), preserving order."""
+    seen = set()
+    collapsed = []
+    for hit in hits:
+        group = hit.get("_source", {}).get("dup_of") or hit.get("_id")
+        if group in seen:
+            continue
+        seen.add(group)
+        collapsed.append(hit)
+    return collapsed
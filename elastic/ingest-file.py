@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_elasticsearch
+from catalog_ingest import ensure_index, indexed_documents, ingest_file
+from vector_engine import LocalVectorEngine
+
+load_dotenv()
+
+ELASTIC_INDEX_NAME = "products"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stream a JSONL or CSV product catalog into Elasticsearch.")
+    parser.add_argument("path", help="Catalog file (.jsonl or .csv)")
+    parser.add_argument("--index", default=ELASTIC_INDEX_NAME, help="Target index")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <path>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first record")
+    parser.add_argument("--window-size", type=int, default=5000, help="Records between checkpoints")
+    parser.add_argument("--embed-batch-size", type=int, default=100, help="Texts per embeddings request")
+    parser.add_argument("--bulk-chunk-size", type=int, default=500, help="Documents per bulk request")
+    parser.add_argument("--threads", type=int, default=1, help="Bulk threads (> 1 uses parallel_bulk)")
+    parser.add_argument("--incremental", action="store_true", help="Only re-embed products whose content changed")
+    parser.add_argument("--delete-missing", action="store_true", help="With --incremental, delete products absent from the file")
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="Near-duplicate listings above this MinHash similarity (e.g. 0.85) share one embedding")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # LOCAL=true targets the local cluster, otherwise Azure (same as the tools)
+    es = get_elasticsearch()
+    try:
+        ensure_index(es, args.index)
+    except Exception as e:
+        print(f"Index creation error: {e}")
+        return
+    ingest_file(es, args.path, args.index, checkpoint_path=args.checkpoint, resume=not args.restart,
+                window_size=args.window_size, embed_batch_size=args.embed_batch_size,
+                chunk_size=args.bulk_chunk_size, thread_count=args.threads,
+                incremental=args.incremental, delete_missing=args.delete_missing,
+                dedup_threshold=args.dedup_threshold)
+
+    # Set LOCAL_VECTOR_INDEX to also refresh the embedded vector index (vector_engine.py)
+    local_index_path = os.getenv("LOCAL_VECTOR_INDEX")
+    if local_index_path:
+        engine = LocalVectorEngine.build(indexed_documents(es, args.index), local_index_path)
+        print(f"Local vector index written to '{local_index_path}' ({engine.count} products, {engine.dims} dims).")
+    elif os.getenv("VECTOR_BACKEND", "elastic").lower() == "local":
+        print("Warning: VECTOR_BACKEND=local but LOCAL_VECTOR_INDEX is not set; the local index is not rebuilt.")
+    print("Ingestion complete.")
+
+if __name__ == "__main__":
+    main()
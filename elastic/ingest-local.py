@@ -1,10 +1,20 @@
 import os
+import sys
 import json
+import argparse
 import openai
-import numpy as np
 from elasticsearch import Elasticsearch
 from dotenv import load_dotenv
 
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vector_engine import LocalVectorEngine
+from catalog_ingest import (
+    PROFILE, bulk_index, content_hash, embed_texts, embedding_text, indexed_documents, sync_catalog
+)
+from dedup import DedupIndex
+from index_profiles import product_mapping
+
 load_dotenv()
 
 # Altere o protocolo para HTTPS
@@ -41,25 +51,8 @@ def create_index(es, index_name=ELASTIC_INDEX_NAME):
     if es.indices.exists(index=index_name):
         print(f"Index '{index_name}' exists.")
         return True
-    mapping = {
-        "mappings": {
-            "properties": {
-                "product_id": {"type": "keyword"},
-                "name": {"type": "text"},
-                "description": {"type": "text"},
-                "category": {"type": "keyword"},
-                "brand": {"type": "keyword"},
-                "price": {"type": "float"},
-                "features": {"type": "text"},
-                "embedding": {
-                    "type": "dense_vector",
-                    "dims": 1536,
-                    "index": True,
-                    "similarity": "cosine"
-                }
-            }
-        }
-    }
+    # Vector field (dims, similarity, quantization) follows VECTOR_INDEX_PROFILE
+    mapping = product_mapping(PROFILE)
     try:
         es.indices.create(index=index_name, body=mapping)
         print(f"Index '{index_name}' created.")
@@ -69,27 +62,49 @@ def create_index(es, index_name=ELASTIC_INDEX_NAME):
         return False
 
 def generate_embedding(text, model="text-embedding-ada-002"):
+    # Rate-limited and retried by the shared embedding pool; a failure returns None
+    # so the product is skipped instead of being indexed with a random vector
     try:
-        response = openai.embeddings.create(input=text, model=model)
-        return response.data[0].embedding
+        return embed_texts([text], model=model)[0]
     except Exception as e:
         print("Embedding error:", e)
-        return np.random.rand(1536).tolist()
+        return None
 
-def index_product(es, product, index_name=ELASTIC_INDEX_NAME):
+def index_product(es, product, index_name=ELASTIC_INDEX_NAME, dedup=None):
     print(product)
     text = f"{product['category']}. {product['description']}"
-    product['embedding'] = generate_embedding(text)
+    canonical = dedup.add(product['product_id'], embedding_text(product)) if dedup else product['product_id']
+    if canonical != product['product_id']:
+        # Near-duplicate listing: no embedding call, it shares the canonical product's vector
+        embedding = dedup.vector(canonical)
+        if embedding is None:
+            print(f"Skipping product '{product['name']}': {canonical} has no embedding")
+            return None
+        product['dup_of'] = canonical
+        product['embedding'] = embedding
+        print(f"Product '{product['name']}' is a near-duplicate of {canonical}")
+    else:
+        embedding = generate_embedding(text, model=PROFILE.model)
+        if embedding is None:
+            print(f"Skipping product '{product['name']}': no embedding")
+            return None
+        product['embedding'] = PROFILE.prepare(embedding)
+        if dedup:
+            dedup.set_vector(product['product_id'], product['embedding'])
+    product['content_hash'] = content_hash(product)
+    if es is None:
+        return None
     try:
-        res = es.index(index=index_name, document=product)
+        # product_id as document id: reruns overwrite instead of duplicating
+        res = es.index(index=index_name, id=product['product_id'], document=product)
         print(f"Product '{product['name']}' indexed with ID: {res['_id']}")
         return res['_id']
     except Exception as e:
         print("Indexing error:", e)
         return None
 
-def insert_sample_data(es, index_name=ELASTIC_INDEX_NAME):
-    sample_products = [
+def get_sample_products():
+    return [
         {
             "product_id": "P001",
             "name": "Samsung Galaxy S21",
@@ -176,18 +191,63 @@ def insert_sample_data(es, index_name=ELASTIC_INDEX_NAME):
             "features": ["Tennis Racket", "Precision", "Control", "Lightweight", "Durable"]
         }
     ]
+
+def insert_sample_data(es, index_name=ELASTIC_INDEX_NAME, dedup_threshold=None):
+    sample_products = get_sample_products()
+    dedup = DedupIndex(dedup_threshold) if dedup_threshold else None
     for product in sample_products:
-        index_product(es, product, index_name)
-    es.indices.refresh(index=index_name)
-    print("Sample data inserted and index refreshed.")
+        index_product(es, product, index_name, dedup)
+    if es is not None:
+        es.indices.refresh(index=index_name)
+        print("Sample data inserted and index refreshed.")
+    return sample_products
+
+def build_local_vector_index(products, path):
+    # Same documents as the Elasticsearch index, for the embedded vector_engine backend
+    engine = LocalVectorEngine.build(products, path)
+    print(f"Local vector index written to '{path}' ({engine.count} products, {engine.dims} dims).")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest products into Elasticsearch.")
+    parser.add_argument("--bulk", action="store_true", help="Batch embeddings and use the bulk helpers")
+    parser.add_argument("--embed-batch-size", type=int, default=100, help="Texts per embeddings request")
+    parser.add_argument("--bulk-chunk-size", type=int, default=500, help="Documents per bulk request")
+    parser.add_argument("--threads", type=int, default=1, help="Bulk threads (> 1 uses parallel_bulk)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-embed changed products and delete products no longer in the catalog")
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="Near-duplicate listings above this MinHash similarity (e.g. 0.85) share one embedding")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    # Set LOCAL_VECTOR_INDEX to also (or only) build the embedded vector index
+    local_index_path = os.getenv("LOCAL_VECTOR_INDEX")
     es = connect_to_elasticsearch()
-    if not es:
+    if not es and not local_index_path:
         print("Connection failed.")
         return
-    create_index(es)
-    insert_sample_data(es)
+    if es:
+        create_index(es)
+    if not local_index_path and os.getenv("VECTOR_BACKEND", "elastic").lower() == "local":
+        print("Warning: VECTOR_BACKEND=local but LOCAL_VECTOR_INDEX is not set; the local index is not rebuilt.")
+    if args.incremental and es:
+        sync_catalog(es, get_sample_products(), ELASTIC_INDEX_NAME, delete_missing=True,
+                     embed_batch_size=args.embed_batch_size, chunk_size=args.bulk_chunk_size,
+                     thread_count=args.threads, dedup_threshold=args.dedup_threshold)
+    elif args.bulk and es:
+        bulk_index(es, get_sample_products(), ELASTIC_INDEX_NAME, embed_batch_size=args.embed_batch_size,
+                   chunk_size=args.bulk_chunk_size, thread_count=args.threads,
+                   dedup_threshold=args.dedup_threshold)
+    else:
+        products = insert_sample_data(es, dedup_threshold=args.dedup_threshold)
+        if local_index_path:
+            build_local_vector_index(products, local_index_path)
+        print("Ingestion complete.")
+        return
+    # The bulk paths embed inside catalog_ingest: rebuild from what the index now holds
+    if local_index_path:
+        build_local_vector_index(indexed_documents(es, ELASTIC_INDEX_NAME), local_index_path)
     print("Ingestion complete.")
 
 if __name__ == "__main__":
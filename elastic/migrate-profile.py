@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import argparse
+from elasticsearch import helpers
+from dotenv import load_dotenv
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_elasticsearch
+from catalog_ingest import IngestStats, batched, embed_batch, embed_texts, embedding_text, run_bulk
+from index_profiles import PROFILES, get_profile, measure_recall, product_mapping, score_distribution
+
+load_dotenv()
+
+ELASTIC_INDEX_NAME = "products"
+
+# Queries used for the recall report, on top of a sample of product texts
+EXAMPLE_QUERIES = [
+    "smartphone with good camera",
+    "fitness equipment",
+    "musical instrument for beginners",
+    "laptop for work",
+    "sports product"
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Copy the products index into a new vector index profile and report recall.")
+    parser.add_argument("--profile", required=True, choices=sorted(PROFILES), help="Target index profile")
+    parser.add_argument("--source", default=ELASTIC_INDEX_NAME, help="Source index")
+    parser.add_argument("--source-profile", default="float", choices=sorted(PROFILES), help="Profile of the source index")
+    parser.add_argument("--target", default=None, help="Target index (default: <source>_<profile>)")
+    parser.add_argument("--embed-batch-size", type=int, default=100, help="Texts per embeddings request")
+    parser.add_argument("--bulk-chunk-size", type=int, default=500, help="Documents per bulk request")
+    parser.add_argument("--recall-sample", type=int, default=20, help="Product texts added to the recall queries")
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k")
+    return parser.parse_args()
+
+def migrated_actions(es, source, target, source_profile, target_profile, stats, embed_batch_size,
+                     duplicates=False):
+    """
+    Yields documents for the target index, reusing stored vectors when the model is the same.
+
+    Canonical documents are migrated first. Near-duplicates (dup_of) store a copy of their
+    canonical's vector, so with another model they are not re-embedded: the duplicates pass
+    copies the canonical's new vector from the target index, which must be refreshed by then.
+    A duplicate whose canonical is missing from the target is embedded on its own.
+
+    :param duplicates: False for the canonical documents, True for the near-duplicates
+    """
+    reuse_vectors = source_profile.model == target_profile.model
+    query = {"exists": {"field": "dup_of"}}
+    if not duplicates:
+        query = {"bool": {"must_not": query}}
+    documents = helpers.scan(es, index=source, query={"query": query})
+    for batch in batched(documents, embed_batch_size):
+        sources = [doc["_source"] for doc in batch]
+        embedded = [s for s in sources if "embedding" in s]
+        canonical_vectors = {}
+        if reuse_vectors:
+            vectors = [target_profile.prepare(s["embedding"]) for s in embedded]
+        else:
+            if duplicates and embedded:
+                canonical_ids = sorted({s["dup_of"] for s in embedded})
+                response = es.mget(index=target, ids=canonical_ids, source_includes=["embedding"])
+                canonical_vectors = {doc["_id"]: doc["_source"]["embedding"] for doc in response["docs"]
+                                     if doc.get("found") and "embedding" in doc["_source"]}
+                embedded = [s for s in embedded if s["dup_of"] not in canonical_vectors]
+            try:
+                vectors = embed_batch([embedding_text(s) for s in embedded], model=target_profile.model,
+                                      profile=target_profile) if embedded else []
+            except Exception as e:
+                for doc in batch:
+                    stats.fail(doc["_id"], f"embedding error: {e}")
+                continue
+        vectors = iter(vectors)
+        for doc, source_doc in zip(batch, sources):
+            if source_doc.get("dup_of") in canonical_vectors:
+                source_doc = {**source_doc, "embedding": canonical_vectors[source_doc["dup_of"]]}
+                stats.duplicates += 1
+            elif "embedding" in source_doc:
+                source_doc = {**source_doc, "embedding": next(vectors)}
+            yield {
+                "_op_type": "index",
+                "_index": target,
+                "_id": doc["_id"],
+                "_source": source_doc,
+            }
+
+def main():
+    args = parse_args()
+    source_profile = get_profile(args.source_profile)
+    target_profile = get_profile(args.profile)
+    target = args.target or f"{args.source}_{target_profile.name}"
+    es = get_elasticsearch()
+
+    if es.indices.exists(index=target):
+        print(f"Target index '{target}' already exists.")
+        return
+    es.indices.create(index=target, body=product_mapping(target_profile))
+    print(f"Index '{target}' created with {target_profile}")
+
+    # Canonical documents first, so near-duplicates can copy their new vectors
+    stats = IngestStats()
+    for duplicates in (False, True):
+        actions = migrated_actions(es, args.source, target, source_profile, target_profile, stats,
+                                   args.embed_batch_size, duplicates)
+        run_bulk(es, actions, stats, args.bulk_chunk_size, 1)
+        es.indices.refresh(index=target)
+    print(stats.summary())
+
+    # Vector memory estimate for the HNSW graph inputs (per copy of the data)
+    count = es.count(index=target)["count"]
+    source_mb = count * source_profile.bytes_per_vector() / 1024 / 1024
+    target_mb = count * target_profile.bytes_per_vector() / 1024 / 1024
+    print(f"Vector memory: {source_mb:.1f} MB ({source_profile.name}) -> {target_mb:.1f} MB ({target_profile.name})")
+
+    sample = helpers.scan(es, index=args.source, query={"query": {"match_all": {}}}, _source=["category", "description"])
+    queries = EXAMPLE_QUERIES + [embedding_text(doc["_source"]) for _, doc in zip(range(args.recall_sample), sample)]
+    started = time.perf_counter()
+    scores = []
+    recall = measure_recall(es, args.source, source_profile, target, target_profile, queries,
+                            embed=lambda texts, model: embed_texts(texts, model=model), k=args.k, scores=scores)
+    print(f"Mean recall@{args.k} vs float baseline: {recall:.3f} ({len(queries)} queries, {time.perf_counter() - started:.1f}s)")
+
+    # The search tools drop hits under the profile's min_score_percentage; check it fits this model's scores
+    distribution = score_distribution(scores, cutoff=target_profile.min_score_percentage)
+    if distribution["count"]:
+        print("Top-{} knn scores (%): min {min:.1f}  p10 {p10:.1f}  p25 {p25:.1f}  median {median:.1f}  "
+              "p75 {p75:.1f}  p90 {p90:.1f}  max {max:.1f}".format(args.k, **distribution))
+        print(f"min_score_percentage {target_profile.min_score_percentage} keeps {distribution['kept']:.0%} of them "
+              f"(override with VECTOR_MIN_SCORE_PERCENTAGE)")
+    print(f"To serve it, point the '{ELASTIC_INDEX_NAME}' index at '{target}' and set VECTOR_INDEX_PROFILE={target_profile.name}.")
+
+if __name__ == "__main__":
+    main()
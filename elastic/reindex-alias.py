@@ -0,0 +1,89 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_elasticsearch
+from catalog_ingest import embed_batch, ingest_file
+from index_lifecycle import (
+    alias_targets, check_vector_mapping, create_bulk_load_index, delete_old_indices, finalize_index, serving_settings,
+    swap_alias, versioned_index_name, warm_up
+)
+from index_profiles import PROFILES, get_profile, product_mapping
+
+load_dotenv()
+
+ELASTIC_INDEX_NAME = "products"
+
+WARM_UP_QUERIES = [
+    "smartphone with good camera",
+    "fitness equipment",
+    "musical instrument for beginners",
+    "laptop for work",
+    "sports product"
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the products index into a new version and swap the alias with no downtime.")
+    parser.add_argument("--alias", default=ELASTIC_INDEX_NAME, help="Alias read by the tools")
+    parser.add_argument("--from-file", default=None, help="Rebuild from a JSONL/CSV catalog (default: copy the current index)")
+    parser.add_argument("--profile", default=None, choices=sorted(PROFILES), help="Index profile (default: VECTOR_INDEX_PROFILE)")
+    parser.add_argument("--replace-concrete-index", action="store_true",
+                        help="First migration: delete the plain '<alias>' index in the same atomic swap")
+    parser.add_argument("--keep", type=int, default=1, help="Previous versions kept for rollback")
+    parser.add_argument("--threads", type=int, default=4, help="Bulk threads when loading from a file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    es = get_elasticsearch()
+    profile = get_profile(args.profile)
+    new_index = versioned_index_name(args.alias)
+    settings = serving_settings(es, args.alias)
+
+    if not alias_targets(es, args.alias) and es.indices.exists(index=args.alias) and not args.replace_concrete_index:
+        print(f"'{args.alias}' is a concrete index; rerun with --replace-concrete-index to migrate it to an alias.")
+        return
+
+    if not args.from_file:
+        try:
+            check_vector_mapping(es, args.alias, profile.embedding_field())
+        except ValueError as e:
+            print(f"Reindex aborted: {e}")
+            return
+
+    create_bulk_load_index(es, new_index, product_mapping(profile))
+
+    if args.from_file:
+        ingest_file(es, args.from_file, new_index, checkpoint_path=f"{args.from_file}.{new_index}.checkpoint",
+                    resume=False, thread_count=args.threads, profile=profile)
+    else:
+        # Server-side copy: stored vectors are reused, nothing is re-embedded
+        response = es.options(request_timeout=3600).reindex(
+            source={"index": args.alias}, dest={"index": new_index},
+            wait_for_completion=True, slices="auto"
+        )
+        print(f"Copied {response['created']} documents from '{args.alias}' in {response['took'] / 1000:.1f}s")
+        if response.get("failures"):
+            print(f"Reindex failures: {response['failures']}")
+            return
+
+    finalize_index(es, new_index, settings)
+
+    try:
+        warm_up(es, new_index, embed_batch(WARM_UP_QUERIES, model=profile.model, profile=profile))
+    except Exception as e:
+        print(f"Warm-up skipped: {e}")
+
+    try:
+        swap_alias(es, args.alias, new_index, replace_concrete_index=args.replace_concrete_index)
+    except ValueError as e:
+        print(f"Alias swap aborted: {e}")
+        return
+    delete_old_indices(es, args.alias, keep=args.keep)
+    print("Reindex complete.")
+
+if __name__ == "__main__":
+    main()
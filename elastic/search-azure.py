@@ -35,22 +35,35 @@ def generate_embedding(text, model="text-embedding-ada-002"):
         print(f"Embedding error: {e}")
         return np.random.rand(1536).tolist()
 
-def semantic_search(es, query_text, size=3, min_score_percentage=75):
-    raw_min_score = min_score_percentage / 50.0  
+def semantic_search(es, query_text, size=3, min_score_percentage=75, mode="knn", num_candidates=None):
     query_vector = generate_embedding(query_text)
-    body = {
-        "size": size,
-        "min_score": raw_min_score,
-        "query": {
-            "script_score": {
-                "query": {"match_all": {}},
-                "script": {
-                    "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
-                    "params": {"query_vector": query_vector}
+    if mode == "knn":
+        # knn scores cosine as (1 + cos) / 2, on a 0-1 scale
+        body = {
+            "size": size,
+            "min_score": min_score_percentage / 100.0,
+            "knn": {
+                "field": "embedding",
+                "query_vector": query_vector,
+                "k": size,
+                "num_candidates": max(num_candidates or size * 10, size)
+            }
+        }
+    else:
+        raw_min_score = min_score_percentage / 50.0  
+        body = {
+            "size": size,
+            "min_score": raw_min_score,
+            "query": {
+                "script_score": {
+                    "query": {"match_all": {}},
+                    "script": {
+                        "source": "doc['embedding'].size() == 0 ? 0 : cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                        "params": {"query_vector": query_vector}
+                    }
                 }
             }
         }
-    }
     try:
         response = es.search(index=ELASTIC_INDEX_NAME, body=body)
         return response['hits']['hits']
@@ -63,12 +76,14 @@ def main():
     if not es:
         return
     query_text = input("Enter search query: ")
-    results = semantic_search(es, query_text, size=3, min_score_percentage=80)
+    mode = "knn"
+    results = semantic_search(es, query_text, size=3, min_score_percentage=80, mode=mode)
     print("Results:")
     for hit in results:
         source = hit['_source']
         raw_score = hit['_score']
-        score_percentage = raw_score * 50  # Convert raw score (0-2 scale) to percentage (0-100)
+        # Convert raw score to percentage (knn: 0-1 scale, script: 0-2 scale)
+        score_percentage = raw_score * (100 if mode == "knn" else 50)
         print(f"Score: {score_percentage:.2f} - {source.get('name')}: {source.get('description')}")
 
 if __name__ == "__main__":
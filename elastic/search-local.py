@@ -1,10 +1,15 @@
 import os
+import sys
 import json
 import openai
 import numpy as np
 from elasticsearch import Elasticsearch
 from dotenv import load_dotenv
 
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools import build_text_search_body, build_vector_search_body, reciprocal_rank_fusion
+
 load_dotenv()
 
 ELASTIC_HOST = os.getenv("ELASTIC_HOST", "https://localhost:9200")
@@ -57,8 +62,8 @@ def search_by_term(es, search_term, index_name=ELASTIC_INDEX_NAME):
         print(f"Term search error: {e}")
         return []
 
-def search_by_vector(es, search_text, index_name=ELASTIC_INDEX_NAME, top_k=3):
-    """Semantic search using vector embedding"""
+def search_by_vector(es, search_text, index_name=ELASTIC_INDEX_NAME, top_k=3, mode="knn", num_candidates=None):
+    """Semantic search using vector embedding (mode: "knn" for approximate HNSW, "script" for brute force)"""
     try:
         # Generate embedding for search text
         embedding = generate_embedding(search_text)
@@ -66,18 +71,29 @@ def search_by_vector(es, search_text, index_name=ELASTIC_INDEX_NAME, top_k=3):
             return []
             
         # Build vector similarity query
-        query = {
-            "query": {
-                "script_score": {
-                    "query": {"match_all": {}},
-                    "script": {
-                        "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
-                        "params": {"query_vector": embedding}
+        if mode == "knn":
+            query = {
+                "knn": {
+                    "field": "embedding",
+                    "query_vector": embedding,
+                    "k": top_k,
+                    "num_candidates": max(num_candidates or top_k * 10, top_k)
+                },
+                "size": top_k
+            }
+        else:
+            query = {
+                "query": {
+                    "script_score": {
+                        "query": {"match_all": {}},
+                        "script": {
+                            "source": "doc['embedding'].size() == 0 ? 0 : cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                            "params": {"query_vector": embedding}
+                        }
                     }
-                }
-            },
-            "size": top_k
-        }
+                },
+                "size": top_k
+            }
         
         response = es.search(index=index_name, body=query)
         return response["hits"]["hits"]
@@ -85,6 +101,26 @@ def search_by_vector(es, search_text, index_name=ELASTIC_INDEX_NAME, top_k=3):
         print(f"Vector search error: {e}")
         return []
 
+def search_hybrid(es, search_text, index_name=ELASTIC_INDEX_NAME, top_k=3):
+    """Lexical + semantic search in one _msearch round trip, fused with reciprocal rank fusion"""
+    try:
+        embedding = generate_embedding(search_text)
+        if not embedding:
+            return search_by_term(es, search_text, index_name)[:top_k]
+
+        window = max(2 * top_k, 20)
+        searches = [
+            {"index": index_name},
+            build_text_search_body(search_text, size=window),
+            {"index": index_name},
+            build_vector_search_body(embedding, search_mode="knn", size=window, min_score_percentage=0),
+        ]
+        responses = es.msearch(searches=searches)["responses"]
+        return reciprocal_rank_fusion([r["hits"]["hits"] for r in responses if "error" not in r], size=top_k)
+    except Exception as e:
+        print(f"Hybrid search error: {e}")
+        return []
+
 def format_results(results):
     """Format results for display"""
     if not results:
@@ -106,13 +142,20 @@ def format_results(results):
     
     return "\n".join(formatted)
 
-def run_search(search_query, mode="both", top_k=3):
+def run_search(search_query, mode="both", top_k=3, vector_mode="knn"):
     es = connect_to_elasticsearch()
     if not es:
         return "Failed to connect to Elasticsearch."
     
     results = []
     
+    if mode == "hybrid":
+        print("\n=== HYBRID SEARCH RESULTS (RRF) ===")
+        hybrid_results = search_hybrid(es, search_query, top_k=top_k)
+        print(format_results(hybrid_results))
+        results.append(("HYBRID SEARCH", hybrid_results))
+        return results
+    
     if mode in ["text", "both"]:
         print("\n=== TEXT SEARCH RESULTS ===")
         text_results = search_by_term(es, search_query)
@@ -121,7 +164,7 @@ def run_search(search_query, mode="both", top_k=3):
     
     if mode in ["vector", "both"]:
         print("\n=== SEMANTIC SEARCH RESULTS ===")
-        vector_results = search_by_vector(es, search_query, top_k=top_k)
+        vector_results = search_by_vector(es, search_query, top_k=top_k, mode=vector_mode)
         print(format_results(vector_results))
         results.append(("SEMANTIC SEARCH", vector_results))
     
@@ -0,0 +1,185 @@
+# embedding_pool.py
+# Rate-limit-aware embedding calls for ingestion. Every request goes through two
+# token buckets (requests-per-minute and tokens-per-minute) so throughput sits at
+# the quota ceiling and never above it. In-flight requests are capped by an
+# adaptive limit: it halves on a 429 and grows back by one after a run of
+# successes. 429s, 5xx and connection errors are retried with exponential backoff
+# (honouring Retry-After). A batch that still fails raises; callers report it
+# and never index a placeholder vector.
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        # Start empty: a full bucket would allow a burst above the per-minute quota
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    def __init__(self, max_limit: int, min_limit: int = 1, increase_after: int = 10):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = max_limit
+        self.increase_after = increase_after
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def throttled(self):
+        with self._condition:
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._successes = 0
+
+
+def estimate_tokens(texts: list) -> int:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return sum(len(encoding.encode(text)) for text in texts)
+    except Exception:
+        # Roughly 4 characters per token for English text
+        return sum(len(text) // 4 + 1 for text in texts)
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after(error: Exception):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingWorkerPool:
+    def __init__(self, rpm: int = 3000, tpm: int = 1000000, max_concurrency: int = 8,
+                 max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        :param rpm: Requests-per-minute quota of the embeddings model
+        :param tpm: Tokens-per-minute quota of the embeddings model
+        :param max_concurrency: Upper bound of in-flight requests (the adaptive limit starts here)
+        :param max_retries: Retries per request on 429 / 5xx / connection errors
+        """
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.limit = AdaptiveLimit(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.throttled = 0
+
+    def call(self, fn, texts: list):
+        """Runs fn(texts) under the rate limits, with backoff retries on transient errors."""
+        cost = estimate_tokens(texts)
+        for attempt in range(self.max_retries + 1):
+            self.requests.acquire(1)
+            self.tokens.acquire(cost)
+            with self.limit:
+                try:
+                    result = fn(texts)
+                    self.limit.success()
+                    return result
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        raise
+                    if getattr(e, "status_code", None) == 429:
+                        self.throttled += 1
+                        self.limit.throttled()
+                    error = e
+            self.retries += 1
+            delay = retry_after(error) or min(self.max_delay, self.base_delay * 2 ** attempt)
+            delay += random.uniform(0, delay / 4)
+            print(f"Embedding request failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def map_ordered(self, fn, batches):
+        """
+        Runs fn over batches concurrently on max_concurrency worker threads, yielding
+        (batch, result_or_exception) in input order. fn is expected to make its
+        requests through call(), which applies the rate and concurrency limits.
+        At most 2 x max_concurrency batches are held at once.
+        """
+        batches = iter(batches)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = []
+            for batch in islice(batches, 2 * self.max_concurrency):
+                pending.append((batch, executor.submit(fn, batch)))
+            while pending:
+                batch, future = pending.pop(0)
+                try:
+                    yield batch, future.result()
+                except Exception as e:
+                    yield batch, e
+                for next_batch in islice(batches, 1):
+                    pending.append((next_batch, executor.submit(fn, next_batch)))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_embedding_pool() -> EmbeddingWorkerPool:
+    """Returns the process-wide pool configured from EMBEDDING_RPM / EMBEDDING_TPM / EMBEDDING_MAX_CONCURRENCY."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = EmbeddingWorkerPool(
+                    rpm=int(os.getenv("EMBEDDING_RPM", "3000")),
+                    tpm=int(os.getenv("EMBEDDING_TPM", "1000000")),
+                    max_concurrency=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8")),
+                )
+    return _pool
@@ -0,0 +1,221 @@
+# graph_bulk_load.py
+# Bulk loader for the social graph. Users, products, friendships and purchases
+# are read from CSV or JSONL files and written with parameterized UNWIND $rows
+# batches, so each transaction carries thousands of rows and the query plan is
+# compiled once.
+#
+# Batches run in parallel without lock conflicts ("mix and batch"): every row is
+# assigned to a cell (bucket of its start node, bucket of its end node), and each
+# round runs in parallel a set of cells that share no bucket, so no two concurrent
+# transactions touch the same node. Relationship files are processed in windows,
+# so memory stays bounded on files with millions of edges.
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_ingest import batched, read_catalog
+
+UPSERT_USERS_QUERY = """
+UNWIND $rows AS row
+MERGE (u:User {userId: row.user_id})
+SET u.name = coalesce(row.name, u.name)
+"""
+
+UPSERT_PRODUCTS_QUERY = """
+UNWIND $rows AS row
+MERGE (p:Product {name: row.name})
+SET p += row.props
+"""
+
+FRIENDS_WITH_QUERY = """
+UNWIND $rows AS row
+MERGE (a:User {userId: row.user_id})
+MERGE (b:User {userId: row.friend_id})
+MERGE (a)-[:FRIENDS_WITH]->(b)
+"""
+
+PURCHASED_QUERY = """
+UNWIND $rows AS row
+MERGE (u:User {userId: row.user_id})
+MERGE (p:Product {name: row.product_name})
+MERGE (u)-[:PURCHASED]->(p)
+"""
+
+GRAPH_PRODUCT_FIELDS = ("product_id", "brand", "category", "description", "price")
+
+
+def user_row(record: dict) -> dict:
+    # User ids are stored lowercase, as the social tool queries them
+    user_id = record.get("user_id") or record.get("userId")
+    if not user_id:
+        raise ValueError("missing user_id")
+    return {"user_id": str(user_id).lower(), "name": record.get("name") or None}
+
+
+def product_row(record: dict) -> dict:
+    if not record.get("name"):
+        raise ValueError("missing name")
+    props = {key: record[key] for key in GRAPH_PRODUCT_FIELDS if record.get(key) not in (None, "")}
+    if "price" in props:
+        try:
+            props["price"] = float(props["price"])
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid price: {props['price']!r}")
+    return {"name": record["name"], "props": props}
+
+
+def friendship_row(record: dict) -> dict:
+    if not (record.get("user_id") and record.get("friend_id")):
+        raise ValueError("missing user_id or friend_id")
+    return {"user_id": str(record["user_id"]).lower(), "friend_id": str(record["friend_id"]).lower()}
+
+
+def purchase_row(record: dict) -> dict:
+    if not (record.get("user_id") and record.get("product_name")):
+        raise ValueError("missing user_id or product_name")
+    return {"user_id": str(record["user_id"]).lower(), "product_name": record["product_name"]}
+
+
+# Per file kind: query, row builder, start key, end key (None for nodes),
+# and whether both ends are the same label (their buckets then share one space)
+FILE_KINDS = {
+    "users": (UPSERT_USERS_QUERY, user_row, "user_id", None, False),
+    "products": (UPSERT_PRODUCTS_QUERY, product_row, "name", None, False),
+    "friendships": (FRIENDS_WITH_QUERY, friendship_row, "user_id", "friend_id", True),
+    "purchases": (PURCHASED_QUERY, purchase_row, "user_id", "product_name", False),
+}
+
+# Nodes first, so relationship batches find their endpoints
+LOAD_ORDER = ("users", "products", "friendships", "purchases")
+
+
+def bucket(key: str, partitions: int) -> int:
+    # crc32 is stable across processes, unlike the built-in hash()
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+
+def round_robin_pairs(partitions: int) -> list:
+    """Rounds of disjoint bucket pairs covering every pair once (circle method)."""
+    buckets = list(range(partitions)) + ([None] if partitions % 2 else [])
+    rounds = []
+    for _ in range(len(buckets) - 1):
+        half = len(buckets) // 2
+        pairs = [tuple(sorted((a, b))) for a, b in zip(buckets[:half], reversed(buckets[half:]))
+                 if a is not None and b is not None]
+        rounds.append(pairs)
+        buckets = [buckets[0], buckets[-1]] + buckets[1:-1]
+    return rounds
+
+
+def schedule_rounds(rows: list, start_key: str, end_key: str, partitions: int, same_label: bool) -> list:
+    """
+    Groups rows into rounds of non-conflicting cells.
+
+    :return: List of rounds; each round is a list of row lists that can be written in parallel
+    """
+    cells = defaultdict(list)
+    for row in rows:
+        start = bucket(row[start_key], partitions)
+        if end_key is None:
+            cells[(start,)].append(row)
+            continue
+        end = bucket(row[end_key], partitions)
+        cells[tuple(sorted((start, end))) if same_label else (start, end)].append(row)
+
+    if end_key is None:
+        rounds = [[(i,) for i in range(partitions)]]
+    elif same_label:
+        rounds = [[(i, i) for i in range(partitions)]] + round_robin_pairs(partitions)
+    else:
+        rounds = [[(i, (i + r) % partitions) for i in range(partitions)] for r in range(partitions)]
+    return [[cells[cell] for cell in cells_in_round if cell in cells] for cells_in_round in rounds]
+
+
+class LoadStats:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.invalid = 0
+        self.batches = 0
+        self.nodes_created = 0
+        self.relationships_created = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        rate = self.rows / self.elapsed if self.elapsed else 0.0
+        return (f"{self.kind}: {self.rows} rows in {self.batches} batches, {self.invalid} invalid, "
+                f"{self.nodes_created} nodes / {self.relationships_created} relationships created "
+                f"in {self.elapsed:.1f}s ({rate:.0f} rows/sec)")
+
+
+# Helper: writes one cell's rows, batch by batch, in a session of its own
+def _write_cell(driver, query: str, rows: list, batch_size: int) -> tuple:
+    nodes = relationships = batches = 0
+
+    def write(tx, batch):
+        return tx.run(query, rows=batch).consume().counters
+
+    with driver.session() as session:
+        for batch in batched(rows, batch_size):
+            counters = session.execute_write(write, batch)
+            nodes += counters.nodes_created
+            relationships += counters.relationships_created
+            batches += 1
+    return nodes, relationships, batches
+
+
+def load_rows(driver, kind: str, rows, batch_size: int = 5000, partitions: int = 4,
+              window_size: int = 1000000, stats: LoadStats = None) -> LoadStats:
+    """
+    Writes already-built rows of one kind (see FILE_KINDS) in parallel rounds.
+
+    :param rows: Iterable of rows (user_row / product_row / ... output)
+    :param batch_size: Rows per UNWIND transaction
+    :param partitions: Buckets per node label; up to this many transactions run at once
+    :param window_size: Rows scheduled together (bounds memory on very large files)
+    """
+    query, _, start_key, end_key, same_label = FILE_KINDS[kind]
+    stats = stats or LoadStats(kind)
+    with ThreadPoolExecutor(max_workers=partitions) as executor:
+        for window in batched(rows, window_size):
+            for cells in schedule_rounds(window, start_key, end_key, partitions, same_label):
+                futures = [executor.submit(_write_cell, driver, query, cell, batch_size) for cell in cells]
+                for future in futures:
+                    nodes, relationships, batches = future.result()
+                    stats.nodes_created += nodes
+                    stats.relationships_created += relationships
+                    stats.batches += batches
+            stats.rows += len(window)
+            print(f"{kind}: {stats.rows} rows loaded ({stats.rows / stats.elapsed:.0f} rows/sec)")
+    return stats
+
+
+def load_file(driver, kind: str, path: str, batch_size: int = 5000, partitions: int = 4,
+              window_size: int = 1000000) -> LoadStats:
+    """
+    Streams a CSV or JSONL file of one kind into the graph.
+
+    :param kind: "users", "products", "friendships" or "purchases"
+    :return: LoadStats with row, batch and created counters
+    """
+    _, build_row, _, _, _ = FILE_KINDS[kind]
+    stats = LoadStats(kind)
+
+    def valid_rows():
+        for line_no, record in read_catalog(path):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                yield build_row(record)
+            except ValueError as e:
+                stats.invalid += 1
+                print(f"Skipping {kind} record {line_no}: {e}")
+
+    load_rows(driver, kind, valid_rows(), batch_size, partitions, window_size, stats)
+    print(stats.summary())
+    return stats
@@ -0,0 +1,105 @@
+# graph_schema.py
+# Schema bootstrap for the social graph. The social query anchors on
+# User.userId and products are merged by name, so both get a uniqueness
+# constraint (which is backed by an index); product_id (written by the change
+# feed) and category get plain range indexes. Every statement is idempotent.
+#
+# check_index_seek() PROFILEs a query and reports the operator at the start of
+# each plan branch, so a missing index shows up as a label or all-nodes scan.
+
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT user_user_id IF NOT EXISTS FOR (u:User) REQUIRE u.userId IS UNIQUE",
+    "CREATE CONSTRAINT product_name IF NOT EXISTS FOR (p:Product) REQUIRE p.name IS UNIQUE",
+    "CREATE INDEX product_product_id IF NOT EXISTS FOR (p:Product) ON (p.product_id)",
+    "CREATE INDEX product_category IF NOT EXISTS FOR (p:Product) ON (p.category)",
+]
+
+# The social tool's queries, kept here so the plan check runs the exact text the tool runs.
+# "paths" mode: the original traversal; social_count counts every 1..2-hop path
+SOCIAL_RECOMMENDATIONS_QUERY = """
+MATCH (u:User {userId: $user_id})-[:FRIENDS_WITH*1..2]-(x:User)-[:PURCHASED]->(p:Product)
+RETURN p.name AS name,
+       p.category AS category,
+       p.brand AS brand,
+       p.description AS description,
+       p.price AS price,
+       count(*) AS social_count
+ORDER BY social_count DESC
+"""
+
+# "top_k" mode: distinct friends are collected one hop at a time (rows grow with the
+# degrees, not with the number of paths), each product is scored by its distinct
+# buyers, the user's own purchases are excluded and only the top $k come back
+SOCIAL_TOP_K_QUERY = """
+MATCH (u:User {userId: $user_id})-[:FRIENDS_WITH]-(f1:User)
+WITH u, collect(DISTINCT f1) AS direct
+UNWIND direct AS f1
+OPTIONAL MATCH (f1)-[:FRIENDS_WITH]-(f2:User)
+WITH u, direct, collect(DISTINCT f2) AS second
+UNWIND direct + second AS f
+WITH DISTINCT u, f
+WHERE f <> u
+MATCH (f)-[:PURCHASED]->(p:Product)
+WHERE NOT (u)-[:PURCHASED]->(p)
+WITH p, count(DISTINCT f) AS buyers
+ORDER BY buyers DESC, p.name
+LIMIT $k
+RETURN p.name AS name,
+       p.category AS category,
+       p.brand AS brand,
+       p.description AS description,
+       p.price AS price,
+       buyers AS social_count
+"""
+
+SOCIAL_QUERIES = {
+    "paths": SOCIAL_RECOMMENDATIONS_QUERY,
+    "top_k": SOCIAL_TOP_K_QUERY,
+}
+
+
+def bootstrap_schema(driver, wait_seconds: int = 300):
+    """
+    Creates the constraints and indexes, then waits until they are online.
+    Schema statements run in their own auto-commit transactions (they cannot
+    share a transaction with data writes).
+    """
+    with driver.session() as session:
+        for statement in SCHEMA_STATEMENTS:
+            session.run(statement).consume()
+            print(f"Schema: {statement}")
+        session.run("CALL db.awaitIndexes($seconds)", seconds=wait_seconds).consume()
+    print("Schema ready.")
+
+
+def operator_name(plan: dict) -> str:
+    # Neo4j 5 suffixes the runtime ("NodeUniqueIndexSeek@neo4j")
+    return plan.get("operatorType", "").split("@")[0]
+
+
+def leaf_operators(plan: dict) -> list:
+    """Operators with no children: where each branch of the plan finds its first nodes."""
+    children = plan.get("children") or []
+    if not children:
+        # Argument leaves start nested branches from rows of the outer one, not from the store
+        return [] if operator_name(plan) == "Argument" else [operator_name(plan)]
+    leaves = []
+    for child in children:
+        leaves.extend(leaf_operators(child))
+    return leaves
+
+
+def check_index_seek(driver, query: str = SOCIAL_RECOMMENDATIONS_QUERY, **params) -> tuple:
+    """
+    PROFILEs the query in a read session and checks how its plan is anchored.
+
+    :return: (True when every leaf operator is an index seek, list of leaf operators)
+    """
+    from neo4j import READ_ACCESS
+
+    with driver.session(default_access_mode=READ_ACCESS) as session:
+        summary = session.run("PROFILE " + query, **params).consume()
+    leaves = leaf_operators(summary.profile or {})
+    # Scans (NodeByLabelScan, AllNodesScan) mean the anchor property is not indexed
+    is_seek = bool(leaves) and all("IndexSeek" in op for op in leaves)
+    return is_seek, leaves
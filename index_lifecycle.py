@@ -0,0 +1,119 @@
+# index_lifecycle.py
+# Zero-downtime rebuilds of the products index. Searches always go through the
+# "products" alias; a rebuild loads a new versioned index with bulk-friendly settings
+# (no refresh, no replicas), force-merges while it has no replicas, restores the
+# serving settings, warms the vector graph up and only then swaps the alias
+# atomically to the new index.
+import time
+
+BULK_LOAD_SETTINGS = {
+    "refresh_interval": "-1",
+    "number_of_replicas": 0
+}
+
+
+def versioned_index_name(alias: str) -> str:
+    return f"{alias}_v{time.strftime('%Y%m%d%H%M%S')}"
+
+
+def alias_targets(es, alias: str) -> list:
+    """Indices currently behind the alias (empty when the alias does not exist)."""
+    if not es.indices.exists_alias(name=alias):
+        return []
+    return sorted(es.indices.get_alias(name=alias).keys())
+
+
+def serving_settings(es, alias: str, default_replicas: int = 1) -> dict:
+    """Replicas and refresh interval of the index being served, to restore after the load."""
+    targets = alias_targets(es, alias)
+    if not targets and es.indices.exists(index=alias):
+        targets = [alias]
+    if not targets:
+        return {"number_of_replicas": default_replicas, "refresh_interval": "1s"}
+
+    settings = es.indices.get_settings(index=targets[0])[targets[0]]["settings"]["index"]
+    return {
+        "number_of_replicas": int(settings.get("number_of_replicas", default_replicas)),
+        "refresh_interval": settings.get("refresh_interval", "1s")
+    }
+
+
+def create_bulk_load_index(es, index_name: str, mapping: dict):
+    body = {**mapping, "settings": {**mapping.get("settings", {}), **BULK_LOAD_SETTINGS}}
+    es.indices.create(index=index_name, body=body)
+    print(f"Index '{index_name}' created with bulk-load settings.")
+
+
+def check_vector_mapping(es, source: str, embedding_field: dict):
+    """
+    Refuses a server-side copy whose stored vectors do not fit the target field:
+    _reindex copies vectors as they are, so the dims and similarity must match.
+
+    :param source: Index or alias being copied
+    :param embedding_field: Target mapping of the embedding field (IndexProfile.embedding_field)
+    :raises ValueError: When the source embedding field differs in dims or similarity
+    """
+    for index, mapping in es.indices.get_mapping(index=source).items():
+        field = mapping["mappings"].get("properties", {}).get("embedding", {})
+        for key in ("dims", "similarity"):
+            if field.get(key) != embedding_field.get(key):
+                raise ValueError(f"'{index}' embedding {key} is {field.get(key)}, the target profile needs "
+                                 f"{embedding_field.get(key)}; re-embed with elastic/migrate-profile.py")
+
+
+def finalize_index(es, index_name: str, settings: dict, max_segments: int = 1):
+    """
+    Runs the deferred force-merge while the index has no replicas (each replica
+    would merge on its own), then restores serving settings and waits for replicas.
+    """
+    es.indices.refresh(index=index_name)
+    started = time.perf_counter()
+    es.options(request_timeout=3600).indices.forcemerge(index=index_name, max_num_segments=max_segments)
+    print(f"Force-merged '{index_name}' to {max_segments} segment(s) in {time.perf_counter() - started:.1f}s")
+    # Replicas copy the merged segments instead of merging again
+    es.indices.put_settings(index=index_name, settings=settings)
+    status = "green" if settings.get("number_of_replicas", 0) else "yellow"
+    es.cluster.health(index=index_name, wait_for_status=status, timeout="10m")
+
+
+def warm_up(es, index_name: str, query_vectors: list, k: int = 10):
+    """Runs a few knn queries so the HNSW graph is loaded before the index takes traffic."""
+    for vector in query_vectors:
+        es.search(index=index_name, body={
+            "size": k,
+            "_source": False,
+            "knn": {"field": "embedding", "query_vector": vector, "k": k, "num_candidates": k * 10}
+        })
+
+
+def swap_alias(es, alias: str, new_index: str, replace_concrete_index: bool = False) -> list:
+    """
+    Points the alias at new_index in one atomic update_aliases call.
+
+    :param replace_concrete_index: Delete a legacy concrete index named like the alias
+        in the same atomic call (first migration from a plain "products" index)
+    :return: Indices that were behind the alias before the swap
+    """
+    actions = []
+    previous = alias_targets(es, alias)
+    if not previous and es.indices.exists(index=alias):
+        if not replace_concrete_index:
+            raise ValueError(f"'{alias}' is a concrete index; pass replace_concrete_index to migrate it to an alias")
+        actions.append({"remove_index": {"index": alias}})
+    for index in previous:
+        actions.append({"remove": {"index": index, "alias": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias}})
+
+    es.indices.update_aliases(actions=actions)
+    print(f"Alias '{alias}' now points to '{new_index}' (was: {', '.join(previous) or 'none'})")
+    return previous
+
+
+def delete_old_indices(es, alias: str, keep: int = 1):
+    """Deletes versioned indices of the alias that are not served, keeping the newest `keep`."""
+    served = set(alias_targets(es, alias))
+    versions = sorted(es.indices.get(index=f"{alias}_v*").keys(), reverse=True)
+    old = [index for index in versions if index not in served][keep:]
+    for index in old:
+        es.indices.delete(index=index)
+        print(f"Deleted old index '{index}'")
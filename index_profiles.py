@@ -0,0 +1,198 @@
+# index_profiles.py
+# Vector index profiles for the products index. A profile fixes the embedding model,
+# the stored dimensions, the similarity and the HNSW index type, so ingestion and
+# query embedding always agree. Quantized profiles store pre-normalized vectors with
+# dot_product similarity in an int8 HNSW graph (about 4x less memory than float32),
+# optionally with fewer dimensions (text-embedding-3 vectors can be truncated).
+#
+# The active profile comes from VECTOR_INDEX_PROFILE (default "float", the original
+# 1536-dim cosine mapping). Each profile also carries the relevance cutoff of the
+# vector search tools: text-embedding-3 similarities run much lower than ada-002's,
+# so one cutoff for every model drops nearly all text-embedding-3 hits.
+import copy
+import math
+import os
+
+BASE_PRODUCT_MAPPING = {
+    "mappings": {
+        "properties": {
+            "product_id": {"type": "keyword"},
+            "name": {"type": "text"},
+            "description": {"type": "text"},
+            "category": {"type": "keyword"},
+            "brand": {"type": "keyword"},
+            "price": {"type": "float"},
+            "features": {"type": "text"},
+            "content_hash": {"type": "keyword", "index": False},
+            "dup_of": {"type": "keyword"},
+        }
+    }
+}
+
+
+class IndexProfile:
+    def __init__(self, name: str, model: str, dims: int, similarity: str, index_type: str = None,
+                 min_score_percentage: float = 85):
+        """
+        :param min_score_percentage: Search cutoff on the knn score scale, (1 + cosine) / 2 * 100
+        """
+        self.name = name
+        self.model = model
+        self.dims = dims
+        self.similarity = similarity
+        self.index_type = index_type
+        self.min_score_percentage = min_score_percentage
+
+    def __repr__(self):
+        return f"IndexProfile({self.name}: {self.model}, {self.dims} dims, {self.similarity}, {self.index_type or 'hnsw'})"
+
+    def embedding_field(self) -> dict:
+        field = {
+            "type": "dense_vector",
+            "dims": self.dims,
+            "index": True,
+            "similarity": self.similarity
+        }
+        if self.index_type:
+            field["index_options"] = {"type": self.index_type}
+        return field
+
+    def prepare(self, vector: list) -> list:
+        """
+        Shapes a raw model embedding for this profile: truncated to the profile
+        dimensions and, for dot_product, L2-normalized (required by Elasticsearch).
+        """
+        vector = list(vector[:self.dims])
+        if self.similarity == "dot_product":
+            norm = math.sqrt(sum(x * x for x in vector))
+            if norm:
+                vector = [x / norm for x in vector]
+        return vector
+
+    def bytes_per_vector(self) -> int:
+        # int8 stores one byte per dimension plus a float correction term
+        if self.index_type in ("int8_hnsw", "int8_flat"):
+            return self.dims + 4
+        if self.index_type in ("int4_hnsw", "int4_flat"):
+            return self.dims // 2 + 4
+        return self.dims * 4
+
+
+PROFILES = {
+    "float": IndexProfile("float", "text-embedding-ada-002", 1536, "cosine"),
+    "int8": IndexProfile("int8", "text-embedding-ada-002", 1536, "dot_product", "int8_hnsw"),
+    "int8-512": IndexProfile("int8-512", "text-embedding-3-small", 512, "dot_product", "int8_hnsw",
+                             min_score_percentage=65),
+    "int8-256": IndexProfile("int8-256", "text-embedding-3-small", 256, "dot_product", "int8_hnsw",
+                             min_score_percentage=65),
+}
+
+
+def get_profile(name: str = None) -> IndexProfile:
+    name = name or os.getenv("VECTOR_INDEX_PROFILE", "float")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown index profile '{name}', expected one of: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def search_min_score(profile: IndexProfile = None) -> float:
+    """Search cutoff of the profile; VECTOR_MIN_SCORE_PERCENTAGE overrides it."""
+    override = os.getenv("VECTOR_MIN_SCORE_PERCENTAGE")
+    if override:
+        return float(override)
+    return (profile or get_profile()).min_score_percentage
+
+
+def product_mapping(profile: IndexProfile = None) -> dict:
+    profile = profile or get_profile()
+    mapping = copy.deepcopy(BASE_PRODUCT_MAPPING)
+    mapping["mappings"]["properties"]["embedding"] = profile.embedding_field()
+    return mapping
+
+
+def measure_recall(es, baseline_index: str, baseline_profile: IndexProfile, candidate_index: str,
+                   candidate_profile: IndexProfile, queries: list, embed, k: int = 10,
+                   num_candidates: int = 100, scores: list = None) -> float:
+    """
+    Recall@k of the candidate index's knn search against exact (brute-force)
+    float search on the baseline index, averaged over the query texts.
+
+    :param embed: Function (texts, model) -> list of raw embeddings
+    :param scores: Optional list that receives the candidate hits' scores as
+                   percentages (the min_score_percentage scale), see score_distribution
+    :return: Mean recall in [0, 1]
+    """
+    baseline_raw = embed(queries, baseline_profile.model)
+    if candidate_profile.model == baseline_profile.model:
+        candidate_raw = baseline_raw
+    else:
+        candidate_raw = embed(queries, candidate_profile.model)
+    baseline_vectors = [baseline_profile.prepare(v) for v in baseline_raw]
+    candidate_vectors = [candidate_profile.prepare(v) for v in candidate_raw]
+
+    recalls = []
+    for query, baseline_vector, candidate_vector in zip(queries, baseline_vectors, candidate_vectors):
+        exact = es.search(index=baseline_index, body={
+            "size": k,
+            "_source": False,
+            "query": {
+                "script_score": {
+                    "query": {"match_all": {}},
+                    "script": {
+                        "source": "doc['embedding'].size() == 0 ? 0 : cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                        "params": {"query_vector": baseline_vector}
+                    }
+                }
+            }
+        })["hits"]["hits"]
+        approximate = es.search(index=candidate_index, body={
+            "size": k,
+            "_source": False,
+            "knn": {
+                "field": "embedding",
+                "query_vector": candidate_vector,
+                "k": k,
+                "num_candidates": max(num_candidates, k)
+            }
+        })["hits"]["hits"]
+
+        if scores is not None:
+            scores.extend(hit["_score"] * 100 for hit in approximate if hit.get("_score") is not None)
+        expected = {hit["_id"] for hit in exact}
+        if not expected:
+            continue
+        found = {hit["_id"] for hit in approximate}
+        recall = len(expected & found) / len(expected)
+        recalls.append(recall)
+        print(f"recall@{k} {recall:.2f}  {query}")
+
+    return sum(recalls) / len(recalls) if recalls else 0.0
+
+
+def score_distribution(scores: list, cutoff: float = None) -> dict:
+    """
+    :param scores: Hit scores as percentages (measure_recall's scores list)
+    :param cutoff: Optional min_score_percentage to report the share of hits it keeps
+    :return: Dict with count, min, p10, p25, median, p75, p90, max (and kept)
+    """
+    if not scores:
+        return {"count": 0}
+    ordered = sorted(scores)
+
+    # Helper: nearest-rank percentile
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    distribution = {
+        "count": len(ordered),
+        "min": ordered[0],
+        "p10": percentile(10),
+        "p25": percentile(25),
+        "median": percentile(50),
+        "p75": percentile(75),
+        "p90": percentile(90),
+        "max": ordered[-1],
+    }
+    if cutoff is not None:
+        distribution["kept"] = sum(1 for score in ordered if score >= cutoff) / len(ordered)
+    return distribution
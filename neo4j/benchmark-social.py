@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import random
+import argparse
+from dotenv import load_dotenv
+from neo4j import READ_ACCESS
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_neo4j_driver
+from graph_schema import SOCIAL_TOP_K_QUERY
+from social_graph import SocialGraphEngine
+
+load_dotenv()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare the Cypher top_k query with the in-process 2-hop and personalized PageRank rankings.")
+    parser.add_argument("--users", type=int, default=100, help="Users sampled from the graph")
+    parser.add_argument("--k", type=int, default=10, help="Products per recommendation list")
+    parser.add_argument("--seed", type=int, default=42, help="Sampling seed")
+    return parser.parse_args()
+
+# Helper: p50 / p95 / mean in milliseconds
+def summarize(name: str, timings: list) -> str:
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    return f"{name:<22} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   mean {sum(ordered) / len(ordered) * 1000:8.2f} ms"
+
+def timed(fn, users: list) -> tuple:
+    timings, results = [], {}
+    for user_id in users:
+        started = time.perf_counter()
+        results[user_id] = fn(user_id)
+        timings.append(time.perf_counter() - started)
+    return timings, results
+
+def main():
+    args = parse_args()
+    # LOCAL=true targets the local database, otherwise Azure (same as the tools)
+    driver = get_neo4j_driver()
+
+    started = time.perf_counter()
+    engine = SocialGraphEngine.from_neo4j(driver)
+    print(f"Snapshot: {len(engine.user_ids)} users, {len(engine.products)} products, "
+          f"{engine.friends.nnz // 2} friendships, {engine.purchases.nnz} purchases "
+          f"in {time.perf_counter() - started:.1f}s")
+    users = random.Random(args.seed).sample(engine.user_ids, min(args.users, len(engine.user_ids)))
+
+    def cypher(user_id):
+        with driver.session(default_access_mode=READ_ACCESS) as session:
+            return session.execute_read(
+                lambda tx: [r.data() for r in tx.run(SOCIAL_TOP_K_QUERY, user_id=user_id, k=args.k)])
+
+    cypher_timings, cypher_results = timed(cypher, users)
+    memory_timings, memory_results = timed(lambda u: engine.recommend(u, k=args.k), users)
+    ppr_timings, ppr_results = timed(lambda u: engine.personalized_pagerank(u, k=args.k), users)
+    cached_timings, _ = timed(lambda u: engine.personalized_pagerank(u, k=args.k), users)
+
+    print(summarize("cypher top_k", cypher_timings))
+    print(summarize("memory top_k", memory_timings))
+    print(summarize("ppr (cold)", ppr_timings))
+    print(summarize("ppr (cached)", cached_timings))
+
+    # The in-process top_k must match Cypher; PPR is a different ranking, so report overlap
+    def names(rows):
+        return [r["name"] for r in rows]
+
+    mismatches = sum(names(cypher_results[u]) != names(memory_results[u]) for u in users)
+    overlap = [len(set(names(cypher_results[u])) & set(names(ppr_results[u]))) / len(cypher_results[u])
+               for u in users if cypher_results[u]]
+    print(f"memory top_k lists differing from Cypher: {mismatches} of {len(users)}")
+    if overlap:
+        print(f"mean overlap of ppr with Cypher top_k: {sum(overlap) / len(overlap):.0%}")
+    beyond = sum(1 for u in users for r in ppr_results[u] if r["social_count"] == 0)
+    print(f"ppr products from beyond two hops: {beyond}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
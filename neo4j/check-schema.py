@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_neo4j_driver
+from graph_schema import SOCIAL_QUERIES, bootstrap_schema, check_index_seek
+
+load_dotenv()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create the graph schema and check that the social query uses an index seek.")
+    parser.add_argument("--user-id", default="bob", help="User to PROFILE the social query with")
+    parser.add_argument("--skip-bootstrap", action="store_true", help="Only run the PROFILE check")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # LOCAL=true targets the local database, otherwise Azure (same as the tools)
+    driver = get_neo4j_driver()
+    if not args.skip_bootstrap:
+        bootstrap_schema(driver)
+
+    all_seek = True
+    for mode, query in SOCIAL_QUERIES.items():
+        is_seek, operators = check_index_seek(driver, query, user_id=args.user_id, k=10)
+        print(f"{mode}: plan anchors {', '.join(operators) or 'none'} -> {'index seek' if is_seek else 'SCAN'}")
+        all_seek = all_seek and is_seek
+    if not all_seek:
+        print("A social query is NOT anchored on an index seek; run without --skip-bootstrap.")
+        sys.exit(1)
+    print("Every social query is anchored on an index seek.")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_schema import bootstrap_schema
+
 # Ajuste para o endereço e a senha corretos do seu Neo4j
 load_dotenv()
 
@@ -58,6 +63,8 @@ def ingest_data(tx):
 
 def main():
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    # Constraints first: every MERGE below is then an index lookup
+    bootstrap_schema(driver)
     with driver.session() as session:
         session.write_transaction(ingest_data)
     driver.close()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_neo4j_driver
+from graph_bulk_load import LOAD_ORDER, load_file
+from graph_schema import bootstrap_schema
+
+load_dotenv()
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk load users, products, friendships and purchases into Neo4j.")
+    for kind in LOAD_ORDER:
+        default = next((os.path.join(DATA_DIR, f"{kind}.{ext}") for ext in ("csv", "jsonl")
+                        if os.path.exists(os.path.join(DATA_DIR, f"{kind}.{ext}"))), None)
+        parser.add_argument(f"--{kind}", default=default, help=f"CSV or JSONL file of {kind} (default: {default})")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per UNWIND transaction")
+    parser.add_argument("--partitions", type=int, default=4, help="Parallel non-conflicting transactions")
+    parser.add_argument("--window-size", type=int, default=1000000, help="Rows scheduled together per file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # LOCAL=true targets the local database, otherwise Azure (same as the tools)
+    driver = get_neo4j_driver()
+    bootstrap_schema(driver)
+
+    started = time.perf_counter()
+    total = 0
+    for kind in LOAD_ORDER:
+        path = getattr(args, kind)
+        if not path:
+            print(f"No {kind} file, skipping.")
+            continue
+        stats = load_file(driver, kind, path, batch_size=args.batch_size, partitions=args.partitions,
+                          window_size=args.window_size)
+        total += stats.rows
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {total} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/sec)")
+
+if __name__ == "__main__":
+    main()
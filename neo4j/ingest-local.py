@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_schema import bootstrap_schema
+
 # Load environment variables
 load_dotenv()
 
@@ -11,6 +16,18 @@ NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
+PURCHASES = [
+    ["bob", "Galaxy Buds Pro"], ["bob", "PlayStation 5"],
+    ["carol", "Galaxy Buds Pro"], ["carol", 'Smart TV 55" Crystal UHD 4K'], ["carol", "iPhone 14 Pro"],
+    ["david", "iPhone 14 Pro"], ["david", "AirPods Max"],
+    ["emma", "MacBook Air M2"], ["emma", "AirPods Max"],
+    ["frank", "Samsung Galaxy S23 Ultra"], ["frank", "Galaxy Buds Pro"],
+    ["grace", "Kindle Paperwhite"], ["grace", 'Smart TV 55" Crystal UHD 4K'],
+    ["henry", "PlayStation 5"], ["henry", "Samsung Galaxy S23 Ultra"],
+    ["isabel", "iPhone 14 Pro"], ["isabel", "MacBook Air M2"],
+    ["jack", "Kindle Paperwhite"],
+]
+
 def ingest_data(tx):
     # Create users
     tx.run("""
@@ -113,34 +130,22 @@ def ingest_data(tx):
                     p8.price = 1199.99
     """)
 
-    # Create purchase relationships
+    # Create purchase relationships: one parameterized UNWIND, each pair an index lookup
+    # (neo4j/ingest-files.py loads the same data, and larger files, from neo4j/data)
     tx.run("""
-    MATCH (u:User), (p:Product)
-    WHERE u.userId IN ['bob', 'carol', 'david', 'emma', 'frank', 'grace', 'henry', 'isabel', 'jack'] 
-      AND p.name IN ['Galaxy Buds Pro', 'Smart TV 55" Crystal UHD 4K', 'iPhone 14 Pro', 
-                     'MacBook Air M2', 'PlayStation 5', 'Kindle Paperwhite', 
-                     'AirPods Max', 'Samsung Galaxy S23 Ultra']
-    WITH u, p,
-         CASE WHEN u.userId = 'bob' AND p.name IN ['Galaxy Buds Pro', 'PlayStation 5'] THEN true
-              WHEN u.userId = 'carol' AND p.name IN ['Galaxy Buds Pro', 'Smart TV 55" Crystal UHD 4K', 'iPhone 14 Pro'] THEN true
-              WHEN u.userId = 'david' AND p.name IN ['iPhone 14 Pro', 'AirPods Max'] THEN true
-              WHEN u.userId = 'emma' AND p.name IN ['MacBook Air M2', 'AirPods Max'] THEN true
-              WHEN u.userId = 'frank' AND p.name IN ['Samsung Galaxy S23 Ultra', 'Galaxy Buds Pro'] THEN true
-              WHEN u.userId = 'grace' AND p.name IN ['Kindle Paperwhite', 'Smart TV 55" Crystal UHD 4K'] THEN true
-              WHEN u.userId = 'henry' AND p.name IN ['PlayStation 5', 'Samsung Galaxy S23 Ultra'] THEN true
-              WHEN u.userId = 'isabel' AND p.name IN ['iPhone 14 Pro', 'MacBook Air M2'] THEN true
-              WHEN u.userId = 'jack' AND p.name IN ['Kindle Paperwhite'] THEN true
-              ELSE false
-         END as shouldPurchase
-    WHERE shouldPurchase
+    UNWIND $purchases AS purchase
+    MATCH (u:User {userId: purchase[0]})
+    MATCH (p:Product {name: purchase[1]})
     MERGE (u)-[:PURCHASED]->(p)
-    """)
+    """, purchases=PURCHASES)
 
 def main():
     # Connect to Neo4j with certificate verification disabled for local development
     is_local = os.getenv("LOCAL", "false").lower() == "true"
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     
+    # Constraints first: every MERGE below is then an index lookup
+    bootstrap_schema(driver)
     with driver.session() as session:
         session.write_transaction(ingest_data)
     
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Allow importing the shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_neo4j_driver
+from social_graph import SocialGraphEngine
+from social_materialize import SocialMaterializer, SocialRecommendationStore
+
+load_dotenv()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute top-N social recommendations per user and keep them up to date.")
+    parser.add_argument("--store", default=os.getenv("SOCIAL_MATERIALIZED_PATH", ".cache/social_recommendations.sqlite"),
+                        help="SQLite file read by the tool (SOCIAL_MATERIALIZED_PATH)")
+    parser.add_argument("--top-n", type=int, default=20, help="Products stored per user")
+    parser.add_argument("--change-log", default=os.getenv("CHANGE_LOG_PATH"),
+                        help="Change log to follow after the full build (CHANGE_LOG_PATH)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between change log polls")
+    parser.add_argument("--once", action="store_true", help="Exit after the full build")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # LOCAL=true targets the local database, otherwise Azure (same as the tools)
+    started = time.perf_counter()
+    # With a change log, its checkpoint is read before the snapshot (see from_neo4j)
+    engine = SocialGraphEngine.from_neo4j(get_neo4j_driver(), change_log=args.change_log)
+    materializer = SocialMaterializer(engine, SocialRecommendationStore(args.store), top_n=args.top_n)
+    count = materializer.rebuild()
+    print(f"Materialized {count} users in {time.perf_counter() - started:.1f}s")
+    if args.once or not args.change_log:
+        return
+
+    print(f"Following '{args.change_log}' for incremental updates")
+    try:
+        while True:
+            if materializer.refresh():
+                print(f"{materializer.updated} user lists written so far")
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# promotions.py
+# Indexed promotion catalog for get_promotion_by_category. Promotions are loaded
+# from a JSONL or CSV file (PROMOTIONS_PATH) into:
+#   - a category hash index (lowercase category -> rows, price-sorted)
+#   - price-sorted arrays, globally and per category, for bisect range queries
+# so a category / price-range lookup is a dict hit plus two binary searches.
+#
+# The catalog is an immutable snapshot. PromotionFeed watches the source file
+# (mtime and size, then a SHA-256 checksum) from a background thread, builds a new
+# snapshot off to the side and swaps the reference in one assignment, so readers
+# never block and never see a half-built catalog.
+#
+# parse_price_range pulls price bounds out of free text ("under 200", "between 100
+# and 300"), since the ReAct agent passes the tool a single string.
+import hashlib
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+DEFAULT_PROMOTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "promotions.jsonl")
+
+PROMOTION_FIELDS = ("name", "category", "brand", "description", "price")
+
+_NUMBER = r"\$?\s*(\d+(?:,\d{3})*(?:\.\d+)?)(?:\s*(?:dollars|usd|bucks))?"
+_PRICE_PATTERNS = (
+    # (pattern, bound each captured number sets)
+    (re.compile(rf"\b(?:between|from)\s+{_NUMBER}\s+(?:and|to)\s+{_NUMBER}"), ("min", "max")),
+    (re.compile(rf"{_NUMBER}\s*(?:-|to)\s*{_NUMBER}"), ("min", "max")),
+    (re.compile(rf"(?:\b(?:under|below|less than|lower than|cheaper than|up to|at most|no more than|"
+                rf"max(?:imum)?)|<=?)\s*{_NUMBER}"), ("max",)),
+    (re.compile(rf"(?:\b(?:over|above|more than|greater than|higher than|at least|min(?:imum)?|"
+                rf"starting at)|>=?)\s*{_NUMBER}"), ("min",)),
+)
+_PRICE_WORDS = re.compile(r"\b(?:with (?:a )?price|priced|prices?|costing)\b")
+
+
+def parse_price_range(text: str) -> tuple:
+    """
+    Splits price bounds off a free-text request.
+
+    :param text: e.g. "all promotions with price lower than 200"
+    :return: (text without the price phrases, min_price, max_price), bounds None when absent
+    """
+    text = (text or "").lower()
+    bounds = {"min": None, "max": None}
+    for pattern, names in _PRICE_PATTERNS:
+        match = pattern.search(text)
+        if match is None:
+            continue
+        for name, value in zip(names, match.groups()):
+            if bounds[name] is None:
+                bounds[name] = float(value.replace(",", ""))
+        text = text[:match.start()] + " " + text[match.end():]
+    if bounds["min"] is not None or bounds["max"] is not None:
+        text = _PRICE_WORDS.sub(" ", text)
+    return " ".join(text.split()), bounds["min"], bounds["max"]
+
+
+def promotion_row(record: dict) -> dict:
+    if not (record.get("name") and record.get("category")):
+        raise ValueError("missing name or category")
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price: {record.get('price')!r}")
+    row = {key: record.get(key) for key in PROMOTION_FIELDS}
+    row["price"] = price
+    return row
+
+
+class PromotionCatalog:
+    def __init__(self, rows: list):
+        """
+        :param rows: Promotion dicts (promotion_row output)
+        """
+        # Price order is kept everywhere, so every lookup returns sorted rows;
+        # tuples, because a snapshot is shared by every reader and never changes
+        self.rows = tuple(sorted(rows, key=lambda row: (row["price"], row["name"])))
+        self.prices = tuple(row["price"] for row in self.rows)
+        by_category = {}
+        for row in self.rows:
+            by_category.setdefault(row["category"].lower(), []).append(row)
+        self.by_category = {key: tuple(rows) for key, rows in by_category.items()}
+        self.category_prices = {key: tuple(row["price"] for row in rows) for key, rows in self.by_category.items()}
+
+    @classmethod
+    def from_file(cls, path: str) -> "PromotionCatalog":
+        # Imported here: catalog_ingest pulls in the Elasticsearch client
+        from catalog_ingest import read_catalog
+
+        rows = []
+        for line_no, record in read_catalog(path):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                rows.append(promotion_row(record))
+            except ValueError as e:
+                print(f"Skipping promotion {line_no}: {e}")
+        return cls(rows)
+
+    @property
+    def categories(self) -> list:
+        return sorted(self.by_category)
+
+    def match_category(self, text: str) -> Optional[str]:
+        """Index key of the category named in the text, or None."""
+        text = text.strip().lower()
+        if text in self.by_category:
+            return text
+        for key in self.by_category:
+            if key in text or (text and text in key):
+                return key
+        return None
+
+    def search(self, category: Optional[str] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None) -> list:
+        """
+        :param category: Index key (see match_category), or None for every category
+        :param min_price: Inclusive lower price bound
+        :param max_price: Inclusive upper price bound
+        :return: Matching rows, cheapest first
+        """
+        if category is None:
+            rows, prices = self.rows, self.prices
+        else:
+            rows, prices = self.by_category.get(category, ()), self.category_prices.get(category, ())
+        start = 0 if min_price is None else bisect_left(prices, min_price)
+        end = len(prices) if max_price is None else bisect_right(prices, max_price)
+        return list(rows[start:end])
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PromotionFeed:
+    def __init__(self, path: str, interval: float = 5.0):
+        """
+        :param path: Promotion file (JSONL or CSV)
+        :param interval: Seconds between file checks of the background watcher
+        """
+        self.path = path
+        self.interval = interval
+        self.version = 0
+        self.checksum = None
+        self.loaded_at = None
+        self.last_swap_seconds = 0.0
+        self.reload_errors = 0
+        self._stat = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.snapshot = PromotionCatalog([])
+        self.check()
+
+    def check(self) -> bool:
+        """
+        Rebuilds and swaps the snapshot if the file changed. Returns whether it swapped.
+        A file that fails to load leaves the current snapshot in place.
+        """
+        try:
+            stat = os.stat(self.path)
+            # Cheap test first; the checksum skips rebuilds on touch-only changes
+            if self._stat == (stat.st_mtime_ns, stat.st_size):
+                return False
+            checksum = file_checksum(self.path)
+            self._stat = (stat.st_mtime_ns, stat.st_size)
+            if checksum == self.checksum:
+                return False
+
+            started = time.perf_counter()
+            snapshot = PromotionCatalog.from_file(self.path)
+            # Single reference assignment: readers hold either the old or the new snapshot
+            self.snapshot = snapshot
+            self.last_swap_seconds = time.perf_counter() - started
+            self.checksum = checksum
+            self.version += 1
+            self.loaded_at = time.time()
+            print(f"Promotions v{self.version}: {len(snapshot.rows)} rows from '{self.path}' "
+                  f"in {self.last_swap_seconds * 1000:.1f} ms")
+            return True
+        except Exception as e:
+            self.reload_errors += 1
+            print(f"Error reloading promotions from '{self.path}': {e}")
+            return False
+
+    def start(self):
+        """Starts the background watcher (a daemon thread); no-op when interval <= 0."""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._watch, name="promotion-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def metrics(self) -> dict:
+        return {
+            "version": self.version,
+            "rows": len(self.snapshot.rows),
+            "checksum": self.checksum,
+            "loaded_at": self.loaded_at,
+            "last_swap_seconds": self.last_swap_seconds,
+            "reload_errors": self.reload_errors,
+        }
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_promotion_feed() -> PromotionFeed:
+    """
+    Returns the process-wide feed on PROMOTIONS_PATH, watched every
+    PROMOTIONS_RELOAD_SECONDS (0 disables hot reloading).
+    """
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                feed = PromotionFeed(os.getenv("PROMOTIONS_PATH") or DEFAULT_PROMOTIONS_PATH,
+                                     interval=float(os.getenv("PROMOTIONS_RELOAD_SECONDS", "5")))
+                feed.start()
+                _feed = feed
+    return _feed
+
+
+def get_promotion_catalog() -> PromotionCatalog:
+    """Returns the current promotion snapshot; callers should keep it for a whole request."""
+    return get_promotion_feed().snapshot
@@ -0,0 +1,66 @@
+# prompts.py
+# The ReAct agent prompt, vendored so startup needs no LangChain Hub fetch.
+# REACT_TEMPLATE is the text of the public "hwchase17/react" prompt. To use another
+# hub prompt, set REACT_PROMPT_HUB to a pinned reference ("owner/name:commit"): it
+# is pulled once and cached on disk, so later starts work offline.
+import os
+import re
+
+from langchain_core.prompts import PromptTemplate
+
+REACT_PROMPT_SOURCE = "hwchase17/react"
+
+REACT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+
+def prompt_cache_path(reference: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", reference) + ".txt")
+
+
+def load_react_prompt(reference: str = None, cache_dir: str = None) -> PromptTemplate:
+    """
+    :param reference: Hub prompt reference, defaults to REACT_PROMPT_HUB; empty = vendored prompt
+    :param cache_dir: Directory of cached hub prompts, defaults to REACT_PROMPT_CACHE_DIR
+    :return: Prompt with the tools, tool_names, input and agent_scratchpad variables
+    """
+    reference = reference if reference is not None else os.getenv("REACT_PROMPT_HUB", "")
+    if not reference:
+        return PromptTemplate.from_template(REACT_TEMPLATE)
+
+    if ":" not in reference:
+        print(f"REACT_PROMPT_HUB '{reference}' is not pinned to a commit (owner/name:commit); it may change upstream.")
+    path = prompt_cache_path(reference, cache_dir or os.getenv("REACT_PROMPT_CACHE_DIR", ".cache/prompts"))
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return PromptTemplate.from_template(f.read())
+
+    try:
+        from langchain import hub
+
+        template = hub.pull(reference).template
+    except Exception as e:
+        print(f"Could not pull prompt '{reference}' ({e}); using the vendored {REACT_PROMPT_SOURCE} prompt.")
+        return PromptTemplate.from_template(REACT_TEMPLATE)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(template)
+    return PromptTemplate.from_template(template)
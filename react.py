@@ -1,15 +1,14 @@
 # react.py
 from dotenv import load_dotenv
-from langchain import hub
 from langchain.agents import create_react_agent
-from langchain_core.prompts import PromptTemplate
 from langchain_openai.chat_models import ChatOpenAI
+from prompts import load_react_prompt
 from tools import general_chat, search_products_by_embedding, get_promotion_by_category, get_social_recommendations, verify_recommendation_consistency
 
 load_dotenv()
 
-# We can keep the standard ReAct prompt or customize it for our recommendation system
-react_prompt = hub.pull("hwchase17/react")
+# The standard ReAct prompt, vendored in prompts.py (no network fetch at import time)
+react_prompt = load_react_prompt()
 
 # Define our tools
 tools = [
@@ -1,10 +1,12 @@
 # run.py
+import time
 import streamlit as st
 from dotenv import load_dotenv
 from langchain_core.agents import AgentFinish
 from langgraph.graph import END, StateGraph
 from nodes import execute_tools, run_agent_reasoning_engine
 from state import AgentState
+from tools import warm_up
 
 load_dotenv()
 
@@ -26,13 +28,36 @@ def create_app():
    
    return flow.compile()
 
+# Compiled once per process: Streamlit re-runs this script on every interaction,
+# but cache_resource keeps the graph (and, through the imported modules, the
+# ToolExecutor, LLM and backend clients) alive across reruns and sessions
+@st.cache_resource(show_spinner="Compiling the agent...")
+def get_app():
+   started = time.perf_counter()
+   app = create_app()
+   print(f"App compiled in {time.perf_counter() - started:.2f}s")
+   return app
+
+# Warm-up report, kept apart from the app so a backend that was down at startup
+# is checked again: the shared clients are already created after the first call,
+# so each rerun past the TTL mostly costs the health check
+@st.cache_data(ttl=60, show_spinner="Warming up...")
+def get_warm_up_report():
+   return warm_up()
+
+app = get_app()
+warm_up_timings = get_warm_up_report()
+
 st.title("Product Recommendation System")
 st.write("Ask me about products, promotions, or what's popular in your social network!")
 
+warm_up_errors = {name: status for name, status in warm_up_timings.items() if isinstance(status, str)}
+if warm_up_errors:
+   st.sidebar.warning("Some backends failed to warm up:\n\n" + "\n".join(f"- {k}: {v}" for k, v in warm_up_errors.items()))
+
 query = st.chat_input("What kind of product are you looking for?")
 
 if query:
-   app = create_app()
    result = app.invoke({"input": query})
    st.write(result["agent_outcome"].return_values["output"])
 
@@ -0,0 +1,420 @@
+# social_graph.py
+# In-process social graph engine: an alternative backend to Neo4j for
+# get_social_recommendations. FRIENDS_WITH and PURCHASED are snapshotted into
+# SciPy CSR matrices (users x users, symmetric, and users x products), and the
+# "top_k" question (graph_schema.SOCIAL_TOP_K_QUERY) becomes three sparse
+# matrix-vector products:
+#   reach   = F x e_u + F x (F x e_u)      friends and friends-of-friends
+#   buyers  = P^T x (reach > 0)            distinct buyers per product
+# with the user's own purchases excluded and ties broken by name, as in Cypher.
+#
+# New edges from the change feed go to small per-user delta sets, merged into
+# the query; compact() folds them into the CSR matrices once they grow.
+#
+# personalized_pagerank() is a second ranking over the same matrices: a random
+# walk with restart over FRIENDS_WITH and PURCHASED, by sparse power iteration.
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+from catalog_ingest import read_catalog
+from changefeed import ChangeFeed, plan_batch
+from graph_bulk_load import friendship_row, product_row, purchase_row, user_row
+
+SNAPSHOT_QUERIES = {
+    "products": "MATCH (p:Product) RETURN p.name AS name, p.product_id AS product_id, p.category AS category, "
+                "p.brand AS brand, p.description AS description, p.price AS price",
+    "users": "MATCH (u:User) RETURN u.userId AS user_id",
+    "friendships": "MATCH (a:User)-[:FRIENDS_WITH]->(b:User) RETURN a.userId AS user_id, b.userId AS friend_id",
+    "purchases": "MATCH (u:User)-[:PURCHASED]->(p:Product) RETURN u.userId AS user_id, p.name AS product_name",
+}
+
+PRODUCT_FIELDS = ("product_id", "category", "brand", "description", "price")
+
+
+class SocialGraphEngine:
+    def __init__(self, users, products, friendships, purchases, compact_after: int = 10000,
+                 cache_size: int = 1024):
+        """
+        :param users: Iterable of user ids
+        :param products: Iterable of product dicts with "name" and the product fields
+        :param friendships: Iterable of (user_id, friend_id); direction is ignored, as in the Cypher query
+        :param purchases: Iterable of (user_id, product_name)
+        :param compact_after: Delta edges accumulated before the CSR matrices are rebuilt
+        :param cache_size: Personalized PageRank results kept per engine (cleared on every change)
+        """
+        self.compact_after = compact_after
+        self.cache_size = cache_size
+        self._ppr_cache = OrderedDict()
+        self._walk = None
+        self.user_index = {}
+        self.user_ids = []
+        self.product_index = {}
+        self.products = []
+        self.deleted = set()
+        self._lock = threading.RLock()
+        for user_id in users:
+            self._user(user_id)
+        for product in products:
+            self._upsert_product(product)
+
+        friend_pairs = [(self._user(a), self._user(b)) for a, b in friendships]
+        purchase_pairs = [(self._user(u), self._product(name)) for u, name in purchases]
+        self._build(friend_pairs, purchase_pairs)
+
+    @classmethod
+    def from_neo4j(cls, driver, change_log: Optional[str] = None, **kwargs) -> "SocialGraphEngine":
+        """
+        Snapshots the graph with one read query per node and relationship type.
+
+        :param change_log: Optional change log to follow. Its checkpoint is read before
+            the snapshot, so events the daemon applies while the snapshot runs are
+            replayed (idempotently) instead of lost.
+        """
+        from neo4j import READ_ACCESS
+
+        feed = ChangeFeed(change_log, flush_interval=0, poll_interval=0) if change_log else None
+        with driver.session(default_access_mode=READ_ACCESS) as session:
+            rows = {name: [record.data() for record in session.run(query)]
+                    for name, query in SNAPSHOT_QUERIES.items()}
+        engine = cls(
+            (r["user_id"] for r in rows["users"]),
+            rows["products"],
+            ((r["user_id"], r["friend_id"]) for r in rows["friendships"]),
+            ((r["user_id"], r["product_name"]) for r in rows["purchases"]),
+            **kwargs,
+        )
+        if feed is not None:
+            engine.follow(feed)
+        return engine
+
+    @classmethod
+    def from_files(cls, users: Optional[str] = None, products: Optional[str] = None,
+                   friendships: Optional[str] = None, purchases: Optional[str] = None,
+                   **kwargs) -> "SocialGraphEngine":
+        """
+        Builds the graph from the bulk-load files (neo4j/ingest-files.py format),
+        so it can be served without a Neo4j instance.
+        """
+        def rows(path, build_row):
+            if not path:
+                return
+            for line_no, record in read_catalog(path):
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    yield build_row(record)
+                except ValueError as e:
+                    print(f"Skipping record {line_no} of {path}: {e}")
+
+        return cls(
+            (row["user_id"] for row in rows(users, user_row)),
+            ({"name": row["name"], **row["props"]} for row in rows(products, product_row)),
+            ((row["user_id"], row["friend_id"]) for row in rows(friendships, friendship_row)),
+            ((row["user_id"], row["product_name"]) for row in rows(purchases, purchase_row)),
+            **kwargs,
+        )
+
+    # Helper: index of a user id, registered on first sight
+    def _user(self, user_id: str) -> int:
+        user_id = str(user_id).lower()
+        if user_id not in self.user_index:
+            self.user_index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        return self.user_index[user_id]
+
+    # Helper: index of a product name, registered (without details) on first sight
+    def _product(self, name: str) -> int:
+        if name not in self.product_index:
+            self.product_index[name] = len(self.products)
+            self.products.append({"name": name})
+        return self.product_index[name]
+
+    def _upsert_product(self, product: dict) -> int:
+        index = self._product(product["name"])
+        self.products[index].update({key: product[key] for key in PRODUCT_FIELDS if key in product})
+        self.deleted.discard(index)
+        return index
+
+    def _build(self, friend_pairs: list, purchase_pairs: list):
+        users, products = len(self.user_index), len(self.products)
+        rows = [a for a, b in friend_pairs] + [b for a, b in friend_pairs]
+        cols = [b for a, b in friend_pairs] + [a for a, b in friend_pairs]
+        friends = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(users, users))
+        purchases = sparse.csr_matrix((np.ones(len(purchase_pairs), dtype=np.int32),
+                                       ([u for u, _ in purchase_pairs], [p for _, p in purchase_pairs])),
+                                      shape=(users, products))
+        # Duplicate edges are summed by the constructor; only existence matters
+        friends.data[:] = 1
+        purchases.data[:] = 1
+        self.friends = friends
+        self.purchases = purchases
+        self._friend_delta = {}
+        self._purchase_delta = {}
+        self._delta_edges = 0
+
+    def _neighbors(self, user: int) -> set:
+        neighbors = set()
+        if user < self.friends.shape[0]:
+            neighbors.update(self.friends.indices[self.friends.indptr[user]:self.friends.indptr[user + 1]])
+        neighbors.update(self._friend_delta.get(user, ()))
+        return neighbors
+
+    def _purchased(self, user: int) -> set:
+        bought = set()
+        if user < self.purchases.shape[0]:
+            bought.update(self.purchases.indices[self.purchases.indptr[user]:self.purchases.indptr[user + 1]])
+        bought.update(self._purchase_delta.get(user, ()))
+        return bought
+
+    def network(self, user_id: str, hops: int = 2) -> set:
+        """User ids within the given number of FRIENDS_WITH hops, the user included."""
+        with self._lock:
+            user = self.user_index.get(str(user_id).lower())
+            if user is None:
+                return set()
+            seen, frontier = {user}, {user}
+            for _ in range(hops):
+                frontier = set().union(*(self._neighbors(u) for u in frontier)) - seen
+                seen |= frontier
+            return {self.user_ids[u] for u in seen}
+
+    # Helper: distinct 1..2-hop buyers per product for a user index, with the
+    # user's own purchases and deleted products zeroed (caller holds the lock)
+    def _social_counts(self, user: int) -> np.ndarray:
+        users, products = len(self.user_index), len(self.products)
+        base_users, base_products = self.friends.shape[0], self.purchases.shape[1]
+
+        # Sparse mat-vec products over the CSR snapshot
+        seed = np.zeros(base_users, dtype=np.int32)
+        if user < base_users:
+            seed[user] = 1
+        first = self.friends @ seed
+        second = self.friends @ (first > 0).astype(np.int32)
+        reach = np.zeros(users, dtype=bool)
+        reach[:base_users] = (first + second) > 0
+
+        # Edges added since the snapshot: expand hop by hop over the delta sets
+        if self._friend_delta:
+            direct = self._neighbors(user)
+            network = set(direct)
+            for friend in direct:
+                network.update(self._neighbors(friend))
+            reach[list(network)] = True
+        reach[user] = False
+
+        buyers = np.zeros(products, dtype=np.int64)
+        buyers[:base_products] = self.purchases.T @ reach[:base_users].astype(np.int32)
+        for buyer, bought in self._purchase_delta.items():
+            if reach[buyer]:
+                for product in bought:
+                    buyers[product] += 1
+
+        buyers[list(self._purchased(user))] = 0
+        buyers[list(self.deleted)] = 0
+        return buyers
+
+    # Helper: result rows, in the Cypher query's shape, for ranked product indexes
+    def _rows(self, ranked, buyers: np.ndarray, scores: Optional[np.ndarray] = None) -> list:
+        results = []
+        for index in ranked:
+            product = self.products[index]
+            row = {
+                "name": product["name"],
+                "category": product.get("category"),
+                "brand": product.get("brand"),
+                "description": product.get("description"),
+                "price": product.get("price"),
+                "social_count": int(buyers[index]),
+            }
+            if scores is not None:
+                row["score"] = float(scores[index])
+            results.append(row)
+        return results
+
+    def recommend(self, user_id: str, k: int = 10) -> list:
+        """
+        Products bought by the user's friends or friends-of-friends, ranked by
+        distinct buyers, excluding the user's own purchases.
+
+        :return: Up to k dicts with the same keys as the Cypher query rows
+        """
+        with self._lock:
+            user = self.user_index.get(str(user_id).lower())
+            if user is None:
+                return []
+            buyers = self._social_counts(user)
+            candidates = np.flatnonzero(buyers)
+            if not len(candidates):
+                return []
+            names = np.array([self.products[i]["name"] for i in candidates])
+            order = np.lexsort((names, -buyers[candidates]))[:k]
+            return self._rows(candidates[order], buyers)
+
+    # Helper: transposed random-walk matrix of the combined graph, users first and
+    # products after them; FRIENDS_WITH and PURCHASED are both walked both ways
+    def _walk_matrix(self) -> tuple:
+        if self._walk is None:
+            # Users or products registered since the last build need rows too
+            if (self._delta_edges or self.friends.shape[0] != len(self.user_ids)
+                    or self.purchases.shape[1] != len(self.products)):
+                self.compact()
+            adjacency = sparse.bmat([[self.friends, self.purchases], [self.purchases.T, None]],
+                                    format="csr", dtype=np.float64)
+            degree = np.asarray(adjacency.sum(axis=1)).ravel()
+            inverse = np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0)
+            # Column j of M spreads node j's score evenly over its neighbours
+            self._walk = ((sparse.diags(inverse) @ adjacency).T.tocsr(), degree == 0)
+        return self._walk
+
+    def personalized_pagerank(self, user_id: str, k: int = 10, restart: float = 0.15,
+                              tol: float = 1e-6, max_iter: int = 50) -> list:
+        """
+        Products ranked by personalized PageRank: a random walk over friendships and
+        purchases that jumps back to the user with probability `restart` at every
+        step. Unlike the 2-hop count it reaches past friends-of-friends and favours
+        products reached by many short, specific paths.
+
+        :param tol: Stop when the L1 change of the score vector drops below this
+        :param max_iter: Iteration cap, bounding the cost at max_iter sparse mat-vec products
+        :return: Up to k rows like recommend(), with the PageRank "score" added
+        """
+        with self._lock:
+            user = self.user_index.get(str(user_id).lower())
+            if user is None:
+                return []
+            key = (user, k, restart)
+            if key in self._ppr_cache:
+                self._ppr_cache.move_to_end(key)
+                return self._ppr_cache[key]
+
+            walk, dangling = self._walk_matrix()
+            users = self.friends.shape[0]
+            seed = np.zeros(walk.shape[0])
+            seed[user] = 1.0
+            scores = seed.copy()
+            for _ in range(max_iter):
+                # Mass stuck on nodes without edges restarts at the user
+                stuck = scores[dangling].sum()
+                updated = (1.0 - restart) * (walk @ scores) + (restart + (1.0 - restart) * stuck) * seed
+                converged = np.abs(updated - scores).sum() < tol
+                scores = updated
+                if converged:
+                    break
+
+            product_scores = scores[users:]
+            product_scores[list(self._purchased(user))] = 0.0
+            product_scores[list(self.deleted)] = 0.0
+            candidates = np.flatnonzero(product_scores > 0)
+            names = np.array([self.products[i]["name"] for i in candidates])
+            order = np.lexsort((names, -product_scores[candidates]))[:k]
+            results = self._rows(candidates[order], self._social_counts(user), product_scores)
+
+            self._ppr_cache[key] = results
+            while len(self._ppr_cache) > self.cache_size:
+                self._ppr_cache.popitem(last=False)
+            return results
+
+    def apply(self, plan: dict):
+        """Applies a change-feed micro-batch (changefeed.plan_batch output)."""
+        with self._lock:
+            self._ppr_cache.clear()
+            self._walk = None
+            for product in plan["upserts"]:
+                self._upsert_product(product)
+            for row in plan["friends"]:
+                a, b = self._user(row["user_id"]), self._user(row["friend_id"])
+                if b not in self._neighbors(a):
+                    self._friend_delta.setdefault(a, set()).add(b)
+                    self._friend_delta.setdefault(b, set()).add(a)
+                    self._delta_edges += 1
+            for row in plan["purchases"]:
+                user, product = self._user(row["user_id"]), self._product(row["product_name"])
+                if product not in self._purchased(user):
+                    self._purchase_delta.setdefault(user, set()).add(product)
+                    self._delta_edges += 1
+                self.deleted.discard(product)
+            for event in plan["deletes"]:
+                name = event.get("name") or next((p["name"] for p in self.products
+                                                  if p.get("product_id") == event["product_id"]), None)
+                if name in self.product_index:
+                    self.deleted.add(self.product_index[name])
+            if self._delta_edges >= self.compact_after:
+                self.compact()
+
+    def compact(self):
+        """Folds the delta edges into new CSR matrices."""
+        with self._lock:
+            friends = self.friends.tocoo()
+            purchases = self.purchases.tocoo()
+            friend_pairs = list(zip(friends.row.tolist(), friends.col.tolist()))
+            friend_pairs += [(a, b) for a, others in self._friend_delta.items() for b in others]
+            purchase_pairs = list(zip(purchases.row.tolist(), purchases.col.tolist()))
+            purchase_pairs += [(u, p) for u, bought in self._purchase_delta.items() for p in bought]
+            self._build(friend_pairs, purchase_pairs)
+
+    def follow(self, log):
+        """
+        Tails the change log from the change-feed daemon's checkpoint. The checkpoint
+        must be read before the snapshot was taken (pass a ChangeFeed created then,
+        see from_neo4j): events before it are in the snapshot, and re-applying later
+        ones is idempotent. A log path reads the checkpoint now.
+
+        :param log: ChangeFeed, or the change log path
+        """
+        self._feed = log if isinstance(log, ChangeFeed) else ChangeFeed(log, flush_interval=0, poll_interval=0)
+
+    def refresh(self, apply=None) -> int:
+        """
+        Applies change-log events written since the last refresh.
+
+        :param apply: Callback receiving each plan_batch output, defaults to self.apply
+        :return: Number of events applied
+        """
+        apply = apply or self.apply
+        feed = getattr(self, "_feed", None)
+        if feed is None:
+            return 0
+        applied = 0
+        while True:
+            events, offset = feed.read_batch()
+            if offset == feed.metrics.offset:
+                return applied
+            apply(plan_batch(events))
+            feed.metrics.offset = offset
+            applied += len(events)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def get_social_graph_engine() -> SocialGraphEngine:
+    """
+    Returns the process-wide engine, snapshotted from Neo4j on first use. When
+    CHANGE_LOG_PATH is set, new change-log events are applied at most every
+    SOCIAL_GRAPH_REFRESH_SECONDS.
+    """
+    global _engine, _last_refresh
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from clients import get_neo4j_driver
+
+                _engine = SocialGraphEngine.from_neo4j(get_neo4j_driver(),
+                                                       change_log=os.getenv("CHANGE_LOG_PATH") or None)
+
+    interval = float(os.getenv("SOCIAL_GRAPH_REFRESH_SECONDS", "5"))
+    if time.monotonic() - _last_refresh >= interval:
+        _last_refresh = time.monotonic()
+        try:
+            _engine.refresh()
+        except Exception as e:
+            print(f"Social graph refresh error: {e}")
+    return _engine
@@ -0,0 +1,165 @@
+# social_materialize.py
+# Precomputed social recommendations. A user's top-N list only changes when
+# someone within two FRIENDS_WITH hops buys something, when a friendship inside
+# that neighbourhood appears, or when a listed product changes. So the lists are
+# computed once with the in-process graph engine (social_graph.py), stored in a
+# SQLite key-value table, and only the affected users are recomputed as change-feed
+# events arrive. The tool then answers with a single primary-key lookup.
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from social_graph import SocialGraphEngine
+
+
+class SocialRecommendationStore:
+    def __init__(self, path: str):
+        """
+        :param path: SQLite file, or ":memory:"
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS social_recommendations "
+            "(user_id TEXT PRIMARY KEY, top_n INTEGER, computed_at REAL, results TEXT)"
+        )
+        # Reverse index: which users list a product, for product updates and deletes
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS social_recommendation_products "
+            "(product_name TEXT, user_id TEXT, PRIMARY KEY (product_name, user_id))"
+        )
+        self._db.commit()
+
+    def get(self, user_id: str, k: int = 10) -> Optional[list]:
+        """
+        :return: The user's top k rows, or None when the user was never materialized
+            or k exceeds the stored list length
+        """
+        with self._lock:
+            row = self._db.execute("SELECT top_n, results FROM social_recommendations WHERE user_id = ?",
+                                   (user_id.lower(),)).fetchone()
+        if row is None:
+            return None
+        top_n, results = row[0], json.loads(row[1])
+        # A list shorter than top_n is complete; a full one may be truncated
+        if k > top_n and len(results) == top_n:
+            return None
+        return results[:k]
+
+    def put_many(self, lists: dict, top_n: int):
+        """
+        :param lists: Mapping of user id to recommendation rows
+        """
+        now = time.time()
+        with self._lock:
+            users = [(user_id,) for user_id in lists]
+            self._db.executemany("DELETE FROM social_recommendation_products WHERE user_id = ?", users)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO social_recommendations (user_id, top_n, computed_at, results) VALUES (?, ?, ?, ?)",
+                [(user_id, top_n, now, json.dumps(results)) for user_id, results in lists.items()],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO social_recommendation_products (product_name, user_id) VALUES (?, ?)",
+                [(row["name"], user_id) for user_id, results in lists.items() for row in results],
+            )
+            self._db.commit()
+
+    def users_with_products(self, names) -> set:
+        with self._lock:
+            return {user_id for name in names for (user_id,) in self._db.execute(
+                "SELECT user_id FROM social_recommendation_products WHERE product_name = ?", (name,))}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM social_recommendations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def affected_users(engine: SocialGraphEngine, plan: dict, store: SocialRecommendationStore) -> set:
+    """
+    Users whose list may change after a change-feed micro-batch, computed on the
+    graph with the batch already applied.
+    """
+    users = set()
+    # A purchase shows up in the lists of everyone within two hops of the buyer,
+    # and leaves the buyer's own list
+    for row in plan["purchases"]:
+        users |= engine.network(row["user_id"], hops=2)
+    # A new friendship a-b opens paths x-a-b and a-b-y: users within one hop of either end
+    for row in plan["friends"]:
+        users |= engine.network(row["user_id"], hops=1) | engine.network(row["friend_id"], hops=1)
+    # Changed or deleted products: whoever currently lists them
+    names = [p["name"] for p in plan["upserts"]] + [e["name"] for e in plan["deletes"] if e.get("name")]
+    if names:
+        users |= store.users_with_products(names)
+    deleted_ids = {e["product_id"] for e in plan["deletes"] if not e.get("name")}
+    if deleted_ids:
+        users |= store.users_with_products(p["name"] for p in engine.products if p.get("product_id") in deleted_ids)
+    return users
+
+
+class SocialMaterializer:
+    def __init__(self, engine: SocialGraphEngine, store: SocialRecommendationStore, top_n: int = 20,
+                 batch_size: int = 1000):
+        """
+        :param top_n: Products stored per user
+        :param batch_size: Users written per SQLite transaction
+        """
+        self.engine = engine
+        self.store = store
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.updated = 0
+
+    def update(self, user_ids) -> int:
+        """Recomputes and stores the lists of the given users. Returns the number written."""
+        lists = {}
+        written = 0
+        for user_id in user_ids:
+            lists[user_id] = self.engine.recommend(user_id, k=self.top_n)
+            if len(lists) >= self.batch_size:
+                self.store.put_many(lists, self.top_n)
+                written += len(lists)
+                lists = {}
+        if lists:
+            self.store.put_many(lists, self.top_n)
+            written += len(lists)
+        self.updated += written
+        return written
+
+    def rebuild(self) -> int:
+        """Materializes every user in the graph."""
+        return self.update(list(self.engine.user_ids))
+
+    def apply(self, plan: dict) -> int:
+        """Applies a change-feed micro-batch to the graph and refreshes only the affected users."""
+        self.engine.apply(plan)
+        return self.update(affected_users(self.engine, plan, self.store))
+
+    def refresh(self) -> int:
+        """Applies change-log events since the last refresh (see SocialGraphEngine.follow)."""
+        return self.engine.refresh(apply=self.apply)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_social_recommendation_store() -> SocialRecommendationStore:
+    """Returns the process-wide store opened on SOCIAL_MATERIALIZED_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SocialRecommendationStore(
+                    os.getenv("SOCIAL_MATERIALIZED_PATH", ".cache/social_recommendations.sqlite"))
+    return _store
@@ -0,0 +1,93 @@
+# startup_report.py
+# Startup-time report: imports the given modules in a fresh interpreter with
+# `python -X importtime` and prints where the time goes, per module and per
+# top-level package, so heavy eager imports are easy to spot.
+#
+# Usage: python startup_report.py [modules ...] [--top 15] [--warm-up]
+#        (defaults to the modules the Streamlit app imports: tools, react, nodes)
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES = ("tools", "react", "nodes")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    :param stderr: Output of `python -X importtime`
+    :return: List of (module, self_us, cumulative_us), in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def by_package(rows: list) -> dict:
+    """Self time summed per top-level package, in microseconds."""
+    totals = {}
+    for name, self_us, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def measure(modules, warm_up: bool = False) -> tuple:
+    """
+    Imports the modules in a subprocess (nothing is cached from this process).
+
+    :return: (importtime rows, wall seconds, stderr of the child)
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    if warm_up:
+        code += "; import tools; tools.warm_up()"
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    return parse_importtime(result.stderr), elapsed, result.stdout
+
+
+def report(rows: list, elapsed: float, top: int = 15) -> str:
+    total_us = sum(self_us for _, self_us, _ in rows)
+    lines = [f"Startup: {elapsed:.2f}s wall, {total_us / 1e6:.2f}s importing {len(rows)} modules", ""]
+
+    lines.append(f"Top {top} packages by import time (self time summed):")
+    for package, self_us in sorted(by_package(rows).items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {self_us / 1000:9.1f} ms  {100 * self_us / total_us if total_us else 0:5.1f}%  {package}")
+
+    lines.append("")
+    lines.append(f"Top {top} modules by cumulative time:")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        lines.append(f"  {cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where interpreter startup time goes.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="Modules to import")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--warm-up", action="store_true", help="Also run tools.warm_up() (connects to the backends)")
+    args = parser.parse_args()
+
+    try:
+        rows, elapsed, _ = measure(args.modules, warm_up=args.warm_up)
+    except RuntimeError as e:
+        print(f"Import failed: {e}")
+        sys.exit(1)
+    print(report(rows, elapsed, top=args.top))
+
+
+if __name__ == "__main__":
+    main()
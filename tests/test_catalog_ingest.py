@@ -0,0 +1,309 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from catalog_ingest import (
+    IngestStats, bulk_index, content_hash, generate_actions, generate_dependent_actions, generate_sync_actions,
+    indexed_documents, ingest_file, read_catalog, sync_catalog
+)
+from dedup import DedupIndex
+
+
+def make_products(count):
+    return [
+        {"product_id": f"P{i:03d}", "name": f"Product {i}", "category": "Sports", "description": f"Item {i}"}
+        for i in range(count)
+    ]
+
+
+class TestCatalogIngest(unittest.TestCase):
+
+    @patch("catalog_ingest.embed_batch")
+    def test_actions_embed_in_batches(self, mock_embed):
+        """Test that products are embedded many texts per request."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[float(len(t))] for t in texts]
+        stats = IngestStats()
+
+        actions = list(generate_actions(make_products(5), "products", stats, embed_batch_size=2))
+
+        self.assertEqual(mock_embed.call_count, 3)
+        self.assertEqual(len(actions), 5)
+        self.assertEqual(actions[0]["_source"]["embedding"], [float(len("Sports. Item 0"))])
+
+    @patch("catalog_ingest.embed_batch")
+    def test_failed_batch_is_reported_not_indexed(self, mock_embed):
+        """Test that an embedding failure reports every product of the batch."""
+        def embed(texts, model, profile=None):
+            # Batches are embedded concurrently, so fail by content rather than call order
+            if "Sports. Item 0" in texts:
+                raise RuntimeError("rate limited")
+            return [[0.1] for _ in texts]
+        mock_embed.side_effect = embed
+        stats = IngestStats()
+
+        actions = list(generate_actions(make_products(4), "products", stats, embed_batch_size=2))
+
+        self.assertEqual(len(actions), 2)
+        self.assertEqual([e["product_id"] for e in stats.errors], ["P000", "P001"])
+
+    @patch("catalog_ingest.helpers.streaming_bulk")
+    @patch("catalog_ingest.embed_batch")
+    def test_bulk_index_counts_results(self, mock_embed, mock_bulk):
+        """Test that bulk results are counted and per-document errors kept."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.0] for _ in texts]
+        mock_bulk.side_effect = lambda es, actions, **kwargs: iter(
+            [(True, {"index": {"_id": "P000"}}),
+             (False, {"index": {"_id": "P001", "error": {"type": "mapper_parsing_exception"}}})]
+            if list(actions) else []
+        )
+
+        stats = bulk_index(MagicMock(), make_products(2), "products")
+
+        self.assertEqual(stats.indexed, 1)
+        self.assertEqual(stats.errors[0]["product_id"], "P001")
+        self.assertIn("docs/sec", stats.summary())
+
+
+def fake_streaming_bulk(es, actions, **kwargs):
+    for action in actions:
+        yield True, {action["_op_type"]: {"_id": action["_id"]}}
+
+
+class TestStreamingIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_jsonl(self, records):
+        path = os.path.join(self.tmpdir.name, "catalog.jsonl")
+        with open(path, "w") as f:
+            for record in records:
+                f.write((record if isinstance(record, str) else json.dumps(record)) + "\n")
+        return path
+
+    def test_csv_records_are_validated(self):
+        """Test that CSV rows are parsed with typed price and split features."""
+        path = os.path.join(self.tmpdir.name, "catalog.csv")
+        with open(path, "w") as f:
+            f.write("product_id,name,category,description,price,features\n")
+            f.write("P001,Racket,Sports,Tennis racket,199.99,Control|Lightweight\n")
+
+        from catalog_ingest import validate_product
+        records = [validate_product(r) for _, r in read_catalog(path)]
+        self.assertEqual(records[0]["price"], 199.99)
+        self.assertEqual(records[0]["features"], ["Control", "Lightweight"])
+
+    @patch("catalog_ingest.helpers.streaming_bulk", side_effect=fake_streaming_bulk)
+    @patch("catalog_ingest.embed_batch")
+    def test_invalid_rows_reported_and_checkpoint_saved(self, mock_embed, mock_bulk):
+        """Test that bad rows are reported and the checkpoint points past the file."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.0] for _ in texts]
+        path = self.write_jsonl(make_products(3) + ["{not json", {"product_id": "P009"}])
+
+        stats = ingest_file(MagicMock(), path, "products", window_size=2)
+
+        self.assertEqual(stats.indexed, 3)
+        self.assertEqual(stats.error_count, 2)
+        with open(f"{path}.checkpoint") as f:
+            self.assertEqual(json.load(f)["line"], 5)
+
+    @patch("catalog_ingest.helpers.streaming_bulk", side_effect=fake_streaming_bulk)
+    @patch("catalog_ingest.embed_batch")
+    def test_non_object_lines_are_reported(self, mock_embed, mock_bulk):
+        """Test that JSON arrays and scalars are counted as errors instead of stopping the run."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.0] for _ in texts]
+        path = self.write_jsonl(["[1, 2]", "3"] + make_products(2))
+
+        stats = ingest_file(MagicMock(), path, "products", window_size=2)
+
+        self.assertEqual(stats.indexed, 2)
+        self.assertEqual(stats.error_count, 2)
+        self.assertIn("expected a JSON object", str(stats.errors[0]))
+
+    @patch("catalog_ingest.helpers.streaming_bulk", side_effect=fake_streaming_bulk)
+    @patch("catalog_ingest.embed_batch")
+    def test_resume_from_checkpoint(self, mock_embed, mock_bulk):
+        """Test that a rerun only processes records after the checkpoint."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.0] for _ in texts]
+        path = self.write_jsonl(make_products(5))
+        with open(f"{path}.checkpoint", "w") as f:
+            json.dump({"line": 3}, f)
+
+        stats = ingest_file(MagicMock(), path, "products", window_size=2)
+
+        self.assertEqual(stats.indexed, 2)
+
+    @patch("catalog_ingest.helpers.streaming_bulk", side_effect=fake_streaming_bulk)
+    @patch("catalog_ingest.embed_batch")
+    def test_failed_products_are_retried_on_resume(self, mock_embed, mock_bulk):
+        """Test that products of a failed embedding request are not lost behind the checkpoint."""
+        calls = []
+
+        def embed(texts, model, profile=None):
+            calls.append(texts)
+            if len(calls) == 1:
+                raise RuntimeError("rate limited")
+            return [[0.0] for _ in texts]
+
+        mock_embed.side_effect = embed
+        path = self.write_jsonl(make_products(4))
+
+        stats = ingest_file(MagicMock(), path, "products", window_size=2)
+
+        self.assertEqual((stats.indexed, stats.error_count), (2, 2))
+        with open(f"{path}.checkpoint") as f:
+            self.assertEqual(json.load(f)["line"], 4)
+        retry_path = f"{path}.checkpoint.retry.jsonl"
+        with open(retry_path) as f:
+            self.assertEqual([json.loads(line)["product_id"] for line in f], ["P000", "P001"])
+
+        stats = ingest_file(MagicMock(), path, "products", window_size=2)
+
+        self.assertEqual((stats.indexed, stats.error_count), (2, 0))
+        self.assertEqual(calls[-1], ["Sports. Item 0", "Sports. Item 1"])
+        with open(retry_path) as f:
+            self.assertEqual(f.read(), "")
+
+
+    @patch("catalog_ingest.helpers.streaming_bulk")
+    @patch("catalog_ingest.embed_texts")
+    def test_target_profile_sets_embedding_model(self, mock_embed, mock_bulk):
+        """Test that a file ingested into another profile's index is embedded with that profile's model."""
+        from index_profiles import get_profile
+        profile = get_profile("int8-256")
+        mock_embed.side_effect = lambda texts, model, client=None: [[3.0, 4.0] + [0.0] * 1534 for _ in texts]
+        indexed = []
+
+        def record_bulk(es, actions, **kwargs):
+            actions = list(actions)
+            indexed.extend(actions)
+            return fake_streaming_bulk(es, actions)
+
+        mock_bulk.side_effect = record_bulk
+        path = self.write_jsonl(make_products(2))
+
+        ingest_file(MagicMock(), path, "products-v2", resume=False, profile=profile)
+
+        self.assertEqual({call.kwargs["model"] for call in mock_embed.call_args_list}, {"text-embedding-3-small"})
+        embedding = indexed[0]["_source"]["embedding"]
+        self.assertEqual(len(embedding), 256)
+        self.assertAlmostEqual(embedding[0], 0.6)
+
+
+class TestIncrementalSync(unittest.TestCase):
+
+    @patch("catalog_ingest.helpers.scan")
+    @patch("catalog_ingest.helpers.streaming_bulk", side_effect=fake_streaming_bulk)
+    @patch("catalog_ingest.embed_batch")
+    def test_only_changed_products_are_embedded(self, mock_embed, mock_bulk, mock_scan):
+        """Test that unchanged products are skipped, edits update and removed products are deleted."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.0] for _ in texts]
+        products = make_products(3)
+        unchanged = {**products[0], "content_hash": content_hash(products[0])}
+        repriced = {**products[1], "price": 10.0, "content_hash": content_hash(products[1])}
+
+        es = MagicMock()
+        es.mget.return_value = {"docs": [
+            {"_id": "P000", "found": True, "_source": unchanged},
+            {"_id": "P001", "found": True, "_source": repriced},
+            {"_id": "P002", "found": False},
+        ]}
+        mock_scan.return_value = iter([{"_id": "P000"}, {"_id": "P001"}, {"_id": "P999"}])
+
+        stats = sync_catalog(es, products, "products")
+
+        mock_embed.assert_called_once_with(["Sports. Item 2"], model="text-embedding-ada-002", profile=None)
+        self.assertEqual(stats.unchanged, 1)
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual(stats.indexed, 1)
+        self.assertEqual(stats.deleted, 1)
+
+    @patch("catalog_ingest.helpers.scan")
+    def test_indexed_documents_rebuild_local_index(self, mock_scan):
+        """Test that the indexed documents, with their vectors, can rebuild the local vector index."""
+        from vector_engine import LocalVectorEngine
+
+        mock_scan.return_value = iter([
+            {"_id": "P000", "_source": {**make_products(1)[0], "content_hash": "x", "embedding": [1.0, 0.0]}},
+        ])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = LocalVectorEngine.build(indexed_documents(MagicMock(), "products"), tmpdir)
+            self.assertEqual((engine.count, engine.dims), (1, 2))
+            self.assertNotIn("content_hash", engine.products[0])
+
+    @patch("catalog_ingest.embed_batch")
+    def test_actions_use_product_id(self, mock_embed):
+        """Test that documents are keyed by product_id and carry a content hash."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.0] for _ in texts]
+        action = next(generate_actions(make_products(1), "products", IngestStats()))
+        self.assertEqual(action["_id"], "P000")
+        self.assertEqual(action["_source"]["content_hash"], content_hash(make_products(1)[0]))
+
+    @patch("catalog_ingest.embed_batch")
+    def test_near_duplicates_skip_embedding(self, mock_embed):
+        """Test that a near-duplicate listing reuses its canonical product's vector."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.5, 0.25] for _ in texts]
+        description = "Lightweight running shoes with responsive cushioning and a breathable mesh upper"
+        products = [
+            {"product_id": "P001", "name": "Runner", "category": "Sports", "description": description},
+            {"product_id": "P001-RED", "name": "Runner red", "category": "Sports", "description": description + " in red"},
+        ]
+        stats = IngestStats()
+
+        actions = list(generate_actions(products, "products", stats, dedup=DedupIndex(0.7)))
+
+        self.assertEqual(mock_embed.call_args[0][0], [f"Sports. {description}"])
+        self.assertEqual(actions[1]["_source"]["dup_of"], "P001")
+        self.assertEqual(actions[1]["_source"]["embedding"], [0.5, 0.25])
+        self.assertEqual(stats.duplicates, 1)
+
+    @patch("catalog_ingest.helpers.scan")
+    @patch("catalog_ingest.helpers.streaming_bulk", side_effect=fake_streaming_bulk)
+    @patch("catalog_ingest.embed_batch")
+    def test_sync_seeds_canonicals_and_repoints_duplicates(self, mock_embed, mock_bulk, mock_scan):
+        """Test that only canonical products seed clusters and duplicates of a changed one are redone."""
+        mock_embed.side_effect = lambda texts, model, profile=None: [[0.5, 0.25] for _ in texts]
+        description = "Lightweight running shoes with responsive cushioning and a breathable mesh upper"
+        canonical = {"product_id": "P001", "name": "Runner", "category": "Sports", "description": description}
+        duplicate = {"product_id": "P002", "name": "Runner red", "category": "Sports",
+                     "description": description + " in red"}
+        new = {"product_id": "P003", "name": "Runner blue", "category": "Sports",
+               "description": description + " in blue"}
+        es = MagicMock()
+        es.mget.return_value = {"docs": [
+            {"_id": "P001", "found": True, "_source": {**canonical, "content_hash": content_hash(canonical),
+                                                        "embedding": [1.0, 0.0]}},
+            {"_id": "P002", "found": True, "_source": {**duplicate, "content_hash": content_hash(duplicate),
+                                                        "embedding": [1.0, 0.0], "dup_of": "P001"}},
+            {"_id": "P003", "found": False},
+        ]}
+        dedup = DedupIndex(0.7)
+        changed_ids = set()
+
+        actions = list(generate_sync_actions(es, [canonical, duplicate, new], "products", IngestStats(), set(),
+                                             dedup=dedup, changed_ids=changed_ids))
+
+        # The new listing joins P001's cluster with the stored vector, without an embedding call
+        mock_embed.assert_not_called()
+        self.assertEqual(actions[0]["_source"]["dup_of"], "P001")
+        self.assertEqual(actions[0]["_source"]["embedding"], [1.0, 0.0])
+        self.assertNotIn("P002", dedup.signatures)
+        self.assertEqual(changed_ids, {"P003"})
+
+        # P001 changed text: its duplicate is re-clustered (here: embedded on its own)
+        mock_scan.return_value = iter([{"_id": "P002", "_source": {**duplicate, "dup_of": "P001",
+                                                                    "content_hash": content_hash(duplicate)}}])
+        actions = list(generate_dependent_actions(es, "products", {"P001"}, IngestStats(), {"P001"}))
+        self.assertEqual(mock_scan.call_args.kwargs["query"], {"query": {"terms": {"dup_of": ["P001"]}}})
+        self.assertEqual(len(actions), 1)
+        self.assertNotIn("dup_of", actions[0]["_source"])
+        self.assertEqual(actions[0]["_source"]["embedding"], [0.5, 0.25])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+
+from categories import ALL_CATEGORIES, KNOWN_CATEGORIES, CategoryResolver, edit_distance
+from tools import get_promotion_by_category, parse_search_request, search_products_by_embedding
+
+
+class TestCategoryResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = CategoryResolver(KNOWN_CATEGORIES)
+
+    def test_resolves_variants_to_canonical_names(self):
+        """Test exact, plural, synonym, in-phrase, trigram and edit-distance matches."""
+        cases = {
+            "Smartphones": "Smartphones", "smartphone": "Smartphones", "phones": "Smartphones",
+            "Smartphnes": "Smartphones", "lptop": "Laptops", "cheap running shoes": "Footwear",
+            "accessory": "Accessories", "e reader": "E-readers", "TVs": "Electronics",
+            "All Categories": ALL_CATEGORIES, "everything": ALL_CATEGORIES, "": ALL_CATEGORIES,
+            "all promotions": ALL_CATEGORIES, "furniture": None,
+        }
+        for text, expected in cases.items():
+            self.assertEqual(self.resolver.resolve(text), expected, text)
+
+    def test_ambiguous_or_distant_text_is_not_guessed(self):
+        """Test that near misses and phrases naming two categories do not become a filter."""
+        cases = {
+            "shirts": None, "mobile games": None, "phone case": "Accessories",
+            "all smartphones": "Smartphones", "sporst": "Sports",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(self.resolver.resolve(text), expected, text)
+
+    def test_synonyms_only_point_at_known_categories(self):
+        """Test that synonyms for categories outside the vocabulary are dropped."""
+        resolver = CategoryResolver(["Smartphones"], synonyms={"couch": "Furniture"})
+        self.assertEqual(resolver.resolve("phone"), "Smartphones")
+        self.assertIsNone(resolver.resolve("couch"))
+        self.assertIsNone(resolver.resolve("shoes"))
+        self.assertEqual(edit_distance("kitten", "sitting"), 3)
+
+    def test_promotion_tool_uses_resolver(self):
+        """Test that promotion lookups accept synonyms and typos."""
+        self.assertIn("Xiaomi Redmi Note 11", get_promotion_by_category.invoke("phones"))
+        self.assertNotIn("Galaxy Buds Pro", get_promotion_by_category.invoke("smartphnes"))
+        self.assertIn("Current promotions across all categories", get_promotion_by_category.invoke("All products"))
+
+    @patch("tools.generate_query_vector", return_value=[0.0] * 4)
+    @patch("tools.get_elasticsearch")
+    def test_search_filter_uses_canonical_category(self, mock_es, _):
+        """Test that the Elasticsearch category filter gets the canonical keyword."""
+        mock_es.return_value.search.return_value = {"hits": {"hits": []}}
+
+        with patch.dict("os.environ", {"VECTOR_BACKEND": "elastic", "ELASTIC_SEARCH_MODE": "knn"}):
+            search_products_by_embedding.invoke("phone with good camera")
+
+        body = mock_es.return_value.search.call_args[1]["body"]
+        self.assertIn('"value": "Smartphones"', str(body).replace("'", '"'))
+
+    def test_search_input_text_becomes_filters(self):
+        """Test that the agent's single string carries the category, brand and price filters."""
+        request = parse_search_request("Samsung smartphones with a good camera under 500")
+        self.assertEqual(request["category"], "Smartphones")
+        self.assertEqual(request["brand"], "Samsung")
+        self.assertEqual(request["max_price"], 500.0)
+        self.assertIsNone(request["min_price"])
+        self.assertNotIn("500", request["query"])
+
+        request = parse_search_request('{"query": "light laptop", "brand": "Dell", "min_price": "300"}')
+        self.assertEqual(request["query"], "light laptop")
+        self.assertEqual((request["category"], request["brand"], request["min_price"]), ("Laptops", "Dell", 300.0))
+
+        # Two categories or two brands named: no filter rather than a guess
+        request = parse_search_request("laptop for gaming from apple or samsung")
+        self.assertEqual((request["category"], request["brand"]), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
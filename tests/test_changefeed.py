@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from changefeed import DELETE_PRODUCTS_QUERY, ChangeFeed, parse_event, plan_batch, write_graph_batch
+
+PRODUCT = {"product_id": "P001", "name": "Galaxy Buds Pro", "category": "Accessories",
+           "description": "Wireless earbuds", "price": "199.99"}
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "changes.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def append(self, *lines):
+        with open(self.path, "a") as f:
+            for line in lines:
+                f.write(line if isinstance(line, str) else json.dumps(line) + "\n")
+
+    def make_feed(self, driver, es=None):
+        return ChangeFeed(self.path, es=es, driver=driver, flush_interval=0, poll_interval=0)
+
+    def test_plan_collapses_product_events(self):
+        """Test that the last event per product wins and user ids are lowercased."""
+        events = [
+            parse_event(json.dumps({"type": "product_upsert", "product": PRODUCT})),
+            parse_event(json.dumps({"type": "product_delete", "product_id": "P001", "name": "Galaxy Buds Pro"})),
+            parse_event(json.dumps({"type": "purchased", "user_id": "Bob", "product_name": "Galaxy Buds Pro"})),
+        ]
+        plan = plan_batch(events)
+
+        self.assertEqual(plan["upserts"], [])
+        self.assertEqual(plan["deletes"][0]["product_id"], "P001")
+        self.assertEqual(plan["purchases"], [{"user_id": "bob", "product_name": "Galaxy Buds Pro"}])
+        with self.assertRaises(ValueError):
+            parse_event(json.dumps({"type": "purchased", "user_id": "bob"}))
+
+    def test_applies_batch_and_checkpoints(self):
+        """Test that a batch becomes one graph transaction and the offset is checkpointed."""
+        driver = MagicMock()
+        session = driver.session.return_value.__enter__.return_value
+        self.append({"type": "friends_with", "user_id": "bob", "friend_id": "carol", "ts": 1},
+                    "not json\n",
+                    {"type": "purchased", "user_id": "carol", "product_name": "Kindle Paperwhite"})
+
+        metrics = self.make_feed(driver).run(once=True)
+
+        session.execute_write.assert_called_once()
+        fn, plan = session.execute_write.call_args[0]
+        self.assertIs(fn, write_graph_batch)
+        self.assertEqual(len(plan["friends"]), 1)
+        self.assertEqual(metrics["events"], 2)
+        self.assertEqual(metrics["invalid_events"], 1)
+        self.assertEqual(metrics["lag_bytes"], 0)
+
+        # A restarted feed resumes after the checkpoint; a half-written line waits
+        self.append('{"type": "friends_with", "user_id": "dav')
+        restarted = self.make_feed(driver)
+        self.assertEqual(restarted.metrics.offset, metrics["offset"])
+        self.assertEqual(restarted.step(), 0)
+        self.assertEqual(session.execute_write.call_count, 1)
+
+    @patch("catalog_ingest.helpers.scan", return_value=iter([]))
+    @patch("changefeed.run_bulk")
+    @patch("changefeed.generate_sync_actions")
+    def test_products_go_to_elasticsearch(self, mock_sync, mock_bulk, mock_scan):
+        """Test that upserts use the incremental sync actions and deletes become bulk deletes."""
+        mock_sync.return_value = iter([{"_op_type": "index", "_id": "P001"}])
+        self.append({"type": "product_upsert", "product": PRODUCT},
+                    {"type": "product_delete", "product_id": "P009"})
+
+        self.make_feed(driver=None, es=MagicMock()).run(once=True)
+
+        self.assertEqual(mock_sync.call_args[0][1][0]["price"], 199.99)
+        actions = mock_bulk.call_args[0][1]
+        self.assertEqual([a["_op_type"] for a in actions], ["index", "delete"])
+
+    @patch("catalog_ingest.helpers.scan", return_value=iter([]))
+    @patch("changefeed.run_bulk")
+    @patch("changefeed.generate_sync_actions", return_value=iter([]))
+    def test_failed_writes_are_not_checkpointed(self, mock_sync, mock_bulk, mock_scan):
+        """Test that a batch with a failed product write is retried from the same offset."""
+        mock_bulk.side_effect = lambda es, actions, stats, **kwargs: stats.fail("P009", "bulk error")
+        self.append({"type": "product_delete", "product_id": "P009"})
+        feed = self.make_feed(driver=None, es=MagicMock())
+
+        with self.assertRaises(RuntimeError):
+            feed.step()
+        self.assertEqual(feed.metrics.offset, 0)
+        self.assertFalse(os.path.exists(feed.checkpoint_path))
+
+        mock_bulk.side_effect = None
+        self.assertEqual(feed.step(), 1)
+        self.assertGreater(feed.metrics.offset, 0)
+
+    @patch("catalog_ingest.helpers.scan", return_value=iter([]))
+    @patch("changefeed.run_bulk")
+    def test_failing_product_is_dead_lettered(self, mock_bulk, mock_scan):
+        """Test that a product that keeps failing is set aside once and the rest of the batch is applied."""
+        def bulk(es, actions, stats, **kwargs):
+            for action in actions:
+                if action["_id"] == "P009":
+                    stats.fail("P009", "mapper_parsing_exception")
+
+        mock_bulk.side_effect = bulk
+        driver = MagicMock()
+        session = driver.session.return_value.__enter__.return_value
+        self.append({"type": "product_delete", "product_id": "P009"},
+                    "not json\n",
+                    {"type": "friends_with", "user_id": "bob", "friend_id": "carol"})
+        feed = ChangeFeed(self.path, es=MagicMock(), driver=driver, flush_interval=0, poll_interval=0,
+                          max_attempts=2)
+
+        with self.assertRaises(RuntimeError):
+            feed.step()
+        self.assertEqual(feed.step(), 1)
+
+        fn, plan = session.execute_write.call_args[0]
+        self.assertEqual((plan["deletes"], len(plan["friends"])), ([], 1))
+        self.assertEqual(feed.metrics.offset, os.path.getsize(self.path))
+        self.assertEqual((feed.metrics.invalid, feed.metrics.dead_lettered), (1, 1))
+        with open(feed.dead_letter_path) as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual([e["product_id"] for e in dead], ["P009"])
+        self.assertIn("1 product writes failed", dead[0]["error"])
+
+    def test_unavailable_store_is_retried_without_limit(self):
+        """Test that store outages neither count as attempts nor dead-letter the batch."""
+        from neo4j.exceptions import ServiceUnavailable
+        driver = MagicMock()
+        driver.session.return_value.__enter__.return_value.execute_write.side_effect = ServiceUnavailable("down")
+        self.append({"type": "friends_with", "user_id": "bob", "friend_id": "carol"})
+        feed = ChangeFeed(self.path, driver=driver, flush_interval=0, poll_interval=0, max_attempts=1)
+
+        for _ in range(3):
+            with self.assertRaises(ServiceUnavailable):
+                feed.step()
+        self.assertEqual((feed.metrics.offset, feed.attempts), (0, 0))
+        self.assertFalse(os.path.exists(feed.dead_letter_path))
+
+    def test_graph_deletes_match_product_id(self):
+        """Test that a delete without a name still removes the product node."""
+        tx = MagicMock()
+        write_graph_batch(tx, {"upserts": [], "friends": [], "purchases": [],
+                               "deletes": [{"type": "product_delete", "product_id": "P009"}]})
+        tx.run.assert_called_once_with(DELETE_PRODUCTS_QUERY, product_ids=["P009"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+import clients
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        clients._clients.clear()
+
+    def test_client_created_once_across_threads(self):
+        """Test that concurrent first calls share a single client instance."""
+        factory = MagicMock(side_effect=lambda: object())
+        results = []
+
+        def worker():
+            results.append(clients._get_or_create("test", factory))
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_shutdown_closes_clients(self):
+        """Test that shutdown closes every backend client and empties the registry."""
+        es = MagicMock()
+        chat = MagicMock()
+        clients._clients["elasticsearch"] = es
+        clients._clients[("chat", "gpt-4", 0)] = chat
+
+        clients.shutdown()
+
+        es.close.assert_called_once()
+        chat.close.assert_not_called()
+        self.assertEqual(clients._clients, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from dedup import DedupIndex, MinHasher, collapse_duplicates, estimated_jaccard
+
+DESCRIPTION = ("Samsung Galaxy S21 smartphone with excellent features. Vibrant 6.2-inch AMOLED display, "
+               "powerful triple camera system that captures high-quality images, long-lasting battery "
+               "and smooth performance.")
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_signature_estimates_similarity(self):
+        """Test that near-identical texts have close signatures and unrelated ones do not."""
+        hasher = MinHasher()
+        base = hasher.signature(DESCRIPTION)
+        self.assertEqual(estimated_jaccard(base, hasher.signature(DESCRIPTION.upper())), 1.0)
+        self.assertLess(estimated_jaccard(base, hasher.signature("Yamaha acoustic guitar with spruce top")), 0.1)
+
+    def test_variants_join_the_first_listing(self):
+        """Test that a colour variant maps to the canonical listing and other products do not."""
+        dedup = DedupIndex(threshold=0.8)
+        self.assertEqual(dedup.add("P001", f"Smartphones. {DESCRIPTION}"), "P001")
+        self.assertEqual(dedup.add("P001-BLK", f"Smartphones. {DESCRIPTION} Color: black."), "P001")
+        self.assertEqual(dedup.add("P002", "Smartphones. iPhone 13 with A15 Bionic chip and dual camera."), "P002")
+        self.assertEqual(dedup.duplicates, 1)
+        # Re-adding a known key keeps its cluster
+        self.assertEqual(dedup.add("P001-BLK", "anything"), "P001")
+
+    def test_collapse_keeps_best_hit_per_cluster(self):
+        """Test that hits of one duplicate cluster are collapsed to the first one."""
+        hits = [
+            {"_id": "P001-BLK", "_source": {"dup_of": "P001"}},
+            {"_id": "P002", "_source": {}},
+            {"_id": "P001", "_source": {}},
+        ]
+        self.assertEqual([h["_id"] for h in collapse_duplicates(hits)], ["P001-BLK", "P002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
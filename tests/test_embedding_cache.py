@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "embeddings.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_normalized_text_hits_memory(self):
+        """Test that case and whitespace variants share one entry."""
+        cache = EmbeddingCache(self.path)
+        self.assertIsNone(cache.get("Smartphone with good camera", "ada"))
+        cache.put("Smartphone with good camera", "ada", [0.5, 0.25])
+
+        self.assertEqual(cache.get("  smartphone   WITH good camera ", "ada"), [0.5, 0.25])
+        self.assertIsNone(cache.get("smartphone with good camera", "other-model"))
+
+        stats = cache.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        cache.close()
+
+    def test_disk_tier_survives_restart(self):
+        """Test that a new cache instance reads vectors written by a previous one."""
+        cache = EmbeddingCache(self.path)
+        cache.put("laptop for work", "ada", [0.5, -1.0])
+        cache.close()
+
+        warm = EmbeddingCache(self.path)
+        self.assertEqual(warm.get("laptop for work", "ada"), [0.5, -1.0])
+        self.assertEqual(warm.stats()["disk_hits"], 1)
+        warm.close()
+
+    def test_lru_eviction(self):
+        """Test that the memory tier is bounded."""
+        cache = EmbeddingCache(None, max_entries=2)
+        cache.put("a", "ada", [1.0])
+        cache.put("b", "ada", [2.0])
+        cache.get("a", "ada")
+        cache.put("c", "ada", [3.0])
+
+        self.assertIsNone(cache.get("b", "ada"))
+        self.assertEqual(cache.get("a", "ada"), [1.0])
+        self.assertEqual(cache.stats()["memory_entries"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
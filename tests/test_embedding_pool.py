@@ -0,0 +1,74 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from embedding_pool import AdaptiveLimit, EmbeddingWorkerPool, TokenBucket
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class TestEmbeddingPool(unittest.TestCase):
+
+    def test_token_bucket_never_exceeds_rate(self):
+        """Test that the bucket starts empty and refills at the per-minute rate."""
+        bucket = TokenBucket(per_minute=600)  # 10 per second
+        started = time.perf_counter()
+        for _ in range(3):
+            bucket.acquire(1)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.25)
+
+    def test_adaptive_limit_halves_and_recovers(self):
+        """Test that a 429 halves the concurrency limit and successes grow it back."""
+        limit = AdaptiveLimit(max_limit=8, increase_after=2)
+        limit.throttled()
+        self.assertEqual(limit.limit, 4)
+        for _ in range(4):
+            limit.success()
+        self.assertEqual(limit.limit, 6)
+
+    @patch("embedding_pool.time.sleep")
+    def test_retries_rate_limit_then_succeeds(self, mock_sleep):
+        """Test that 429s are retried with backoff (honouring Retry-After) and throttle concurrency."""
+        pool = EmbeddingWorkerPool(rpm=60000, tpm=10 ** 9, max_concurrency=4)
+        fn = MagicMock(side_effect=[StatusError(429, retry_after="2"), StatusError(503), [[0.1]]])
+
+        self.assertEqual(pool.call(fn, ["text"]), [[0.1]])
+        self.assertEqual(pool.retries, 2)
+        self.assertEqual(pool.throttled, 1)
+        self.assertEqual(pool.limit.limit, 2)
+        self.assertGreaterEqual(mock_sleep.call_args_list[0][0][0], 2.0)
+
+    @patch("embedding_pool.time.sleep")
+    def test_client_errors_are_raised_not_retried(self, mock_sleep):
+        """Test that a 400 fails immediately and no placeholder vector is returned."""
+        pool = EmbeddingWorkerPool(rpm=60000, tpm=10 ** 9)
+        fn = MagicMock(side_effect=StatusError(400))
+
+        with self.assertRaises(StatusError):
+            pool.call(fn, ["text"])
+        self.assertEqual(fn.call_count, 1)
+
+    def test_map_ordered_keeps_input_order(self):
+        """Test that concurrent batches are yielded in input order, with failures in place."""
+        pool = EmbeddingWorkerPool(max_concurrency=3)
+
+        def embed(batch):
+            time.sleep(0.01 * (5 - batch[0]))
+            if batch[0] == 2:
+                raise RuntimeError("boom")
+            return [float(batch[0])]
+
+        results = list(pool.map_ordered(embed, [[i] for i in range(5)]))
+
+        self.assertEqual([batch for batch, _ in results], [[0], [1], [2], [3], [4]])
+        self.assertIsInstance(results[2][1], RuntimeError)
+        self.assertEqual(results[4][1], [4.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import unittest
+from unittest.mock import MagicMock
+
+from graph_bulk_load import (
+    PURCHASED_QUERY, bucket, load_file, round_robin_pairs, schedule_rounds
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "neo4j", "data")
+
+
+def cell_buckets(rows, keys, partitions):
+    return {bucket(row[key], partitions) for row in rows for key in keys}
+
+
+class TestGraphBulkLoad(unittest.TestCase):
+
+    def test_round_robin_pairs_are_disjoint_and_complete(self):
+        """Test that every bucket pair is scheduled once and no round reuses a bucket."""
+        for partitions in (4, 5):
+            rounds = round_robin_pairs(partitions)
+            pairs = [pair for pairs in rounds for pair in pairs]
+            expected = {(a, b) for a in range(partitions) for b in range(a + 1, partitions)}
+            self.assertEqual(set(pairs), expected)
+            self.assertEqual(len(pairs), len(expected))
+            for pairs in rounds:
+                used = [b for pair in pairs for b in pair]
+                self.assertEqual(len(used), len(set(used)))
+
+    def test_rounds_never_share_a_node(self):
+        """Test that cells running in the same round touch disjoint users and products."""
+        rows = [{"user_id": f"u{i}", "product_name": f"p{i % 7}"} for i in range(200)]
+        rounds = schedule_rounds(rows, "user_id", "product_name", 4, same_label=False)
+
+        self.assertEqual(sum(len(cell) for cells in rounds for cell in cells), len(rows))
+        for cells in rounds:
+            users = [cell_buckets(cell, ["user_id"], 4) for cell in cells]
+            products = [cell_buckets(cell, ["product_name"], 4) for cell in cells]
+            self.assertEqual(sum(map(len, users)), len(set().union(*users)))
+            self.assertEqual(sum(map(len, products)), len(set().union(*products)))
+
+    def test_load_file_batches_rows(self):
+        """Test that a purchases file is written through UNWIND batches and counted."""
+        driver = MagicMock()
+        session = driver.session.return_value.__enter__.return_value
+        tx = MagicMock()
+        tx.run.return_value.consume.return_value.counters = MagicMock(nodes_created=0, relationships_created=2)
+        session.execute_write.side_effect = lambda fn, batch: fn(tx, batch)
+
+        stats = load_file(driver, "purchases", os.path.join(DATA_DIR, "purchases.csv"), batch_size=2, partitions=2)
+
+        self.assertEqual(stats.rows, 18)
+        self.assertEqual(stats.invalid, 0)
+        self.assertTrue(all(c[0][0] == PURCHASED_QUERY for c in tx.run.call_args_list))
+        self.assertTrue(all(len(c[1]["rows"]) <= 2 for c in tx.run.call_args_list))
+        self.assertEqual(sum(len(c[1]["rows"]) for c in tx.run.call_args_list), 18)
+        self.assertEqual(stats.relationships_created, 2 * stats.batches)
+        self.assertIn("rows/sec", stats.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import MagicMock
+
+from graph_schema import SCHEMA_STATEMENTS, bootstrap_schema, check_index_seek, leaf_operators
+
+
+def plan(operator, *children):
+    return {"operatorType": operator, "children": list(children)}
+
+
+class TestGraphSchema(unittest.TestCase):
+
+    def test_bootstrap_runs_every_statement(self):
+        """Test that constraints and indexes are created and awaited."""
+        driver = MagicMock()
+        session = driver.session.return_value.__enter__.return_value
+
+        bootstrap_schema(driver)
+
+        statements = [c[0][0] for c in session.run.call_args_list]
+        self.assertEqual(statements[:len(SCHEMA_STATEMENTS)], SCHEMA_STATEMENTS)
+        self.assertIn("db.awaitIndexes", statements[-1])
+        self.assertTrue(all("IF NOT EXISTS" in s for s in SCHEMA_STATEMENTS))
+
+    def test_check_detects_seek_and_scan(self):
+        """Test that the PROFILE check accepts an index seek anchor and rejects a label scan."""
+        driver = MagicMock()
+        session = driver.session.return_value.__enter__.return_value
+        summary = session.run.return_value.consume.return_value
+
+        summary.profile = plan("ProduceResults@neo4j", plan("Expand(All)@neo4j",
+                                                           plan("NodeUniqueIndexSeek@neo4j")))
+        self.assertEqual(check_index_seek(driver, user_id="bob"), (True, ["NodeUniqueIndexSeek"]))
+        self.assertTrue(session.run.call_args[0][0].startswith("PROFILE "))
+
+        summary.profile = plan("ProduceResults", plan("Filter", plan("NodeByLabelScan")))
+        self.assertEqual(check_index_seek(driver, user_id="bob"), (False, ["NodeByLabelScan"]))
+
+    def test_leaf_operators_of_join(self):
+        """Test that every branch of a join plan is reported."""
+        joined = plan("NodeHashJoin", plan("NodeIndexSeek"), plan("AllNodesScan"))
+        self.assertEqual(leaf_operators(joined), ["NodeIndexSeek", "AllNodesScan"])
+        # Nested branches fed by the outer rows are not anchors
+        applied = plan("Apply", plan("NodeUniqueIndexSeek"), plan("Expand(Into)", plan("Argument")))
+        self.assertEqual(leaf_operators(applied), ["NodeUniqueIndexSeek"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock
+
+from index_lifecycle import check_vector_mapping, create_bulk_load_index, finalize_index, swap_alias
+from index_profiles import get_profile
+
+
+class TestIndexLifecycle(unittest.TestCase):
+
+    def test_bulk_load_settings(self):
+        """Test that new versions are created without refresh or replicas."""
+        es = MagicMock()
+        create_bulk_load_index(es, "products_v1", {"mappings": {"properties": {}}})
+        body = es.indices.create.call_args.kwargs["body"]
+        self.assertEqual(body["settings"], {"refresh_interval": "-1", "number_of_replicas": 0})
+        self.assertIn("mappings", body)
+
+    def test_swap_moves_alias_atomically(self):
+        """Test that the alias moves from the old version to the new one in one call."""
+        es = MagicMock()
+        es.indices.exists_alias.return_value = True
+        es.indices.get_alias.return_value = {"products_v1": {}}
+
+        previous = swap_alias(es, "products", "products_v2")
+
+        self.assertEqual(previous, ["products_v1"])
+        es.indices.update_aliases.assert_called_once_with(actions=[
+            {"remove": {"index": "products_v1", "alias": "products"}},
+            {"add": {"index": "products_v2", "alias": "products"}},
+        ])
+
+    def test_concrete_index_needs_explicit_migration(self):
+        """Test that a plain 'products' index is only replaced when asked to."""
+        es = MagicMock()
+        es.indices.exists_alias.return_value = False
+        es.indices.exists.return_value = True
+
+        with self.assertRaises(ValueError):
+            swap_alias(es, "products", "products_v1")
+
+        swap_alias(es, "products", "products_v1", replace_concrete_index=True)
+        actions = es.indices.update_aliases.call_args.kwargs["actions"]
+        self.assertEqual(actions[0], {"remove_index": {"index": "products"}})
+
+    def test_finalize_merges_before_restoring_replicas(self):
+        """Test that the force-merge runs before the replicas come back."""
+        es = MagicMock()
+        finalize_index(es, "products_v1", {"number_of_replicas": 1, "refresh_interval": "1s"})
+        calls = [name for name, _, _ in es.mock_calls if name in (
+            "options().indices.forcemerge", "indices.put_settings")]
+        self.assertEqual(calls, ["options().indices.forcemerge", "indices.put_settings"])
+        es.cluster.health.assert_called_once_with(index="products_v1", wait_for_status="green", timeout="10m")
+
+    def test_reindex_needs_matching_vectors(self):
+        """Test that a server-side copy is refused when dims or similarity differ."""
+        es = MagicMock()
+        es.indices.get_mapping.return_value = {"products_v1": {"mappings": {"properties": {
+            "embedding": get_profile("float").embedding_field()}}}}
+
+        check_vector_mapping(es, "products", get_profile("float").embedding_field())
+        with self.assertRaises(ValueError):
+            check_vector_mapping(es, "products", get_profile("int8").embedding_field())
+        with self.assertRaises(ValueError):
+            check_vector_mapping(es, "products", get_profile("int8-256").embedding_field())
+
+
+if __name__ == "__main__":
+    unittest.main()
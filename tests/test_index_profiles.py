@@ -0,0 +1,70 @@
+import math
+import unittest
+from unittest.mock import MagicMock, patch
+
+from index_profiles import get_profile, measure_recall, product_mapping, score_distribution, search_min_score
+
+
+class TestIndexProfiles(unittest.TestCase):
+
+    def test_float_profile_keeps_original_mapping(self):
+        """Test that the default profile is the original 1536-dim cosine field."""
+        field = product_mapping(get_profile("float"))["mappings"]["properties"]["embedding"]
+        self.assertEqual(field, {"type": "dense_vector", "dims": 1536, "index": True, "similarity": "cosine"})
+        self.assertEqual(get_profile("float").prepare([3.0, 4.0]), [3.0, 4.0])
+
+    def test_quantized_profile_normalizes_and_truncates(self):
+        """Test that quantized profiles store unit vectors with dot_product and int8_hnsw."""
+        profile = get_profile("int8-256")
+        field = product_mapping(profile)["mappings"]["properties"]["embedding"]
+        self.assertEqual(field["similarity"], "dot_product")
+        self.assertEqual(field["index_options"], {"type": "int8_hnsw"})
+
+        vector = profile.prepare([1.0] * 1536)
+        self.assertEqual(len(vector), 256)
+        self.assertAlmostEqual(math.sqrt(sum(x * x for x in vector)), 1.0)
+        self.assertLess(profile.bytes_per_vector(), get_profile("float").bytes_per_vector() / 4)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile("binary")
+
+    def test_min_score_per_model(self):
+        """Test that text-embedding-3 profiles use a lower search cutoff than ada-002 ones."""
+        self.assertEqual(get_profile("float").min_score_percentage, 85)
+        self.assertLess(get_profile("int8-256").min_score_percentage, get_profile("int8").min_score_percentage)
+        with patch.dict("os.environ", {"VECTOR_INDEX_PROFILE": "int8-512", "VECTOR_MIN_SCORE_PERCENTAGE": ""}):
+            self.assertEqual(search_min_score(), 65)
+        with patch.dict("os.environ", {"VECTOR_MIN_SCORE_PERCENTAGE": "70"}):
+            self.assertEqual(search_min_score(get_profile("float")), 70)
+
+    def test_score_distribution(self):
+        scores = []
+        es = MagicMock()
+        es.search.side_effect = [
+            {"hits": {"hits": [{"_id": "P1", "_score": 2.0}]}},
+            {"hits": {"hits": [{"_id": "P1", "_score": 0.7}, {"_id": "P2", "_score": 0.6}]}},
+        ]
+        measure_recall(es, "products", get_profile("float"), "products_256", get_profile("int8-256"),
+                       ["good camera"], embed=lambda texts, model: [[1.0, 0.0] for _ in texts], k=2, scores=scores)
+        self.assertEqual([round(score) for score in scores], [70, 60])
+
+        distribution = score_distribution(scores, cutoff=65)
+        self.assertEqual((distribution["count"], round(distribution["min"]), round(distribution["max"])), (2, 60, 70))
+        self.assertEqual(distribution["kept"], 0.5)
+        self.assertEqual(score_distribution([]), {"count": 0})
+
+    def test_measure_recall(self):
+        """Test recall@k of approximate hits against the exact baseline."""
+        es = MagicMock()
+        es.search.side_effect = [
+            {"hits": {"hits": [{"_id": "P1"}, {"_id": "P2"}]}},
+            {"hits": {"hits": [{"_id": "P1"}, {"_id": "P3"}]}},
+        ]
+        recall = measure_recall(es, "products", get_profile("float"), "products_int8", get_profile("int8"),
+                                ["good camera"], embed=lambda texts, model: [[1.0, 0.0] for _ in texts], k=2)
+        self.assertAlmostEqual(recall, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
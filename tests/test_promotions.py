@@ -0,0 +1,121 @@
+import os
+import random
+import tempfile
+import unittest
+
+from promotions import DEFAULT_PROMOTIONS_PATH, PromotionCatalog, PromotionFeed, parse_price_range, promotion_row
+from tools import get_promotion_by_category
+
+
+class TestPromotionCatalog(unittest.TestCase):
+
+    def test_range_queries_match_a_scan(self):
+        """Test that category and bisect price lookups return exactly the scanned rows."""
+        rng = random.Random(7)
+        rows = [promotion_row({"name": f"Product {i}", "category": rng.choice(["Smartphones", "Footwear", "TVs"]),
+                               "brand": "Brand", "description": "", "price": round(rng.uniform(1, 1000), 2)})
+                for i in range(2000)]
+        catalog = PromotionCatalog(rows)
+
+        for category in (None, "footwear", "tvs"):
+            for low, high in ((None, 200), (150, None), (100, 100.5), (500, 400)):
+                expected = sorted((r for r in rows
+                                   if (category is None or r["category"].lower() == category)
+                                   and (low is None or r["price"] >= low) and (high is None or r["price"] <= high)),
+                                  key=lambda r: (r["price"], r["name"]))
+                self.assertEqual(catalog.search(category, min_price=low, max_price=high), expected)
+
+    def test_loads_file_and_skips_invalid_rows(self):
+        """Test CSV loading, price parsing and category matching."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "promotions.csv")
+            with open(path, "w") as f:
+                f.write("name,category,brand,description,price\n"
+                        "Kindle,E-readers,Amazon,Reader,89.90\n"
+                        "Broken,E-readers,Amazon,Reader,free\n")
+            catalog = PromotionCatalog.from_file(path)
+
+        self.assertEqual([r["price"] for r in catalog.rows], [89.9])
+        self.assertEqual(catalog.match_category("cheap e-readers"), "e-readers")
+        self.assertIsNone(catalog.match_category("laptops"))
+        self.assertEqual(len(PromotionCatalog.from_file(DEFAULT_PROMOTIONS_PATH).rows), 3)
+
+    def test_non_object_lines_are_skipped(self):
+        """Test that JSON arrays and scalars in a promotion file are skipped, not fatal."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "promotions.jsonl")
+            with open(path, "w") as f:
+                f.write('[1, 2]\n"sale"\n{"name": "Kindle", "category": "E-readers", "price": 89.9}\n')
+            catalog = PromotionCatalog.from_file(path)
+
+        self.assertEqual([r["name"] for r in catalog.rows], ["Kindle"])
+
+    def test_feed_swaps_snapshot_on_change(self):
+        """Test that the feed swaps in a new snapshot only when the content changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "promotions.jsonl")
+            with open(path, "w") as f:
+                f.write('{"name": "Kindle", "category": "E-readers", "price": 89.9}\n')
+            feed = PromotionFeed(path, interval=0)
+            first = feed.snapshot
+            self.assertEqual(feed.version, 1)
+
+            # Same content with a new mtime: checksum matches, no rebuild
+            os.utime(path, ns=(1, 1))
+            self.assertFalse(feed.check())
+            self.assertIs(feed.snapshot, first)
+
+            with open(path, "a") as f:
+                f.write('{"name": "Echo", "category": "Speakers", "price": 49.9}\n')
+            self.assertTrue(feed.check())
+            self.assertEqual(feed.version, 2)
+            self.assertEqual(len(feed.snapshot.rows), 2)
+            # A reader holding the old snapshot still sees a complete catalog
+            self.assertEqual(len(first.rows), 1)
+
+            os.remove(path)
+            self.assertFalse(feed.check())
+            self.assertEqual(feed.metrics()["reload_errors"], 1)
+            self.assertEqual(feed.metrics()["rows"], 2)
+
+    def test_tool_filters_by_price(self):
+        """Test that structured price arguments return only matching promotions."""
+        result = get_promotion_by_category.invoke({"category": "all", "max_price": 200})
+        self.assertIn("Current promotions across all categories", result)
+        self.assertIn("Galaxy Buds Pro", result)
+        self.assertNotIn("Xiaomi Redmi Note 11", result)
+
+        result = get_promotion_by_category.invoke("smartphones")
+        self.assertIn("Xiaomi Redmi Note 11", result)
+        self.assertNotIn("Galaxy Buds Pro", result)
+
+    def test_tool_parses_price_from_text(self):
+        """Test that the ReAct string input reaches the price bounds."""
+        result = get_promotion_by_category.invoke("all promotions with price lower than 200")
+        self.assertIn("Current promotions across all categories (price $0.00 to $200.00)", result)
+        self.assertIn("Galaxy Buds Pro", result)
+        self.assertNotIn("Xiaomi Redmi Note 11", result)
+
+        result = get_promotion_by_category.invoke("smartphones over $300")
+        self.assertIn("Xiaomi Redmi Note 11", result)
+        result = get_promotion_by_category.invoke("footwear between 100 and 110")
+        self.assertIn("No promotions in footwear category", result)
+
+    def test_unmatched_category_lists_categories_not_promotions(self):
+        """Test that an unknown or unpromoted category names the available categories instead of every row."""
+        for text in ("furniture", "laptops"):
+            result = get_promotion_by_category.invoke(text)
+            self.assertIn("Categories on promotion: Accessories, Footwear, Smartphones.", result)
+            self.assertNotIn("Promotional price", result)
+        self.assertIn("No promotions in Laptops category", get_promotion_by_category.invoke("laptops"))
+
+    def test_parse_price_range(self):
+        self.assertEqual(parse_price_range("smartphones under $500"), ("smartphones", None, 500.0))
+        self.assertEqual(parse_price_range("Footwear between 100 and 1,300 dollars"), ("footwear", 100.0, 1300.0))
+        self.assertEqual(parse_price_range("laptops 500-900"), ("laptops", 500.0, 900.0))
+        self.assertEqual(parse_price_range("above 50"), ("", 50.0, None))
+        self.assertEqual(parse_price_range("e-readers")[1:], (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from social_graph import SNAPSHOT_QUERIES, SocialGraphEngine
+from tools import social_recommendations
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "neo4j", "data")
+
+
+def load_engine(**kwargs):
+    return SocialGraphEngine.from_files(
+        users=os.path.join(DATA_DIR, "users.csv"),
+        products=os.path.join(DATA_DIR, "products.jsonl"),
+        friendships=os.path.join(DATA_DIR, "friendships.csv"),
+        purchases=os.path.join(DATA_DIR, "purchases.csv"),
+        **kwargs,
+    )
+
+
+def reference_top_k(friendships, purchases, user, k):
+    """Plain-Python version of graph_schema.SOCIAL_TOP_K_QUERY."""
+    neighbors = {}
+    for a, b in friendships:
+        neighbors.setdefault(a, set()).add(b)
+        neighbors.setdefault(b, set()).add(a)
+    direct = neighbors.get(user, set())
+    network = set(direct).union(*[neighbors.get(f, set()) for f in direct]) - {user}
+    own = {p for u, p in purchases if u == user}
+    buyers = {}
+    for u, p in set(purchases):
+        if u in network and p not in own:
+            buyers[p] = buyers.get(p, 0) + 1
+    return sorted(buyers.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+class TestSocialGraphEngine(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, "friendships.csv")) as f:
+            self.friendships = [(r["user_id"], r["friend_id"]) for r in csv.DictReader(f)]
+        with open(os.path.join(DATA_DIR, "purchases.csv")) as f:
+            self.purchases = [(r["user_id"], r["product_name"]) for r in csv.DictReader(f)]
+
+    def ranking(self, engine, user, k=10):
+        return [(r["name"], r["social_count"]) for r in engine.recommend(user, k=k)]
+
+    def test_matches_cypher_ranking(self):
+        """Test that the CSR ranking equals the top_k query semantics for every user."""
+        engine = load_engine()
+        for user in engine.user_index:
+            for k in (2, 10):
+                self.assertEqual(self.ranking(engine, user, k),
+                                 reference_top_k(self.friendships, self.purchases, user, k))
+
+        row = engine.recommend("Allan")[0]
+        self.assertEqual(set(row), {"name", "category", "brand", "description", "price", "social_count"})
+        self.assertEqual(engine.recommend("nobody"), [])
+
+    def test_incremental_edges_and_compaction(self):
+        """Test that change-feed batches are visible immediately and survive compaction."""
+        engine = load_engine(compact_after=1000)
+        plan = {"upserts": [{"name": "Kindle Paperwhite", "category": "Electronics", "price": 139.99}],
+                "deletes": [{"product_id": "", "name": "PlayStation 5"}],
+                "friends": [{"user_id": "allan", "friend_id": "zoe"}],
+                "purchases": [{"user_id": "zoe", "product_name": "Kindle Paperwhite"}]}
+        self.friendships.append(("allan", "zoe"))
+        self.purchases.append(("zoe", "Kindle Paperwhite"))
+        expected = [item for item in reference_top_k(self.friendships, self.purchases, "allan", 20)
+                    if item[0] != "PlayStation 5"]
+
+        engine.apply(plan)
+        self.assertEqual(self.ranking(engine, "allan", 20), expected)
+        engine.compact()
+        self.assertEqual(engine._delta_edges, 0)
+        self.assertEqual(self.ranking(engine, "allan", 20), expected)
+
+    def test_refresh_tails_change_log(self):
+        """Test that refresh applies events after the checkpoint and remembers its offset."""
+        engine = load_engine()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "changes.jsonl")
+            with open(path, "w") as f:
+                f.write(json.dumps({"type": "purchased", "user_id": "Emma", "product_name": "MacBook Air M2"}) + "\n")
+            engine.follow(path)
+
+            self.assertEqual(engine.refresh(), 1)
+            self.assertEqual(engine.refresh(), 0)
+            self.assertIn(("MacBook Air M2", 1), self.ranking(engine, "allan", 20))
+
+    def test_follow_reads_checkpoint_before_snapshot(self):
+        """Test that events applied by the daemon while the snapshot runs are not lost."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "changes.jsonl")
+            line = json.dumps({"type": "purchased", "user_id": "Emma", "product_name": "MacBook Air M2"}) + "\n"
+            with open(path, "w") as f:
+                f.write(line)
+            rows = {
+                "products": [{"name": "MacBook Air M2", "product_id": "P010", "category": "Laptops",
+                              "brand": "Apple", "description": "Laptop", "price": 999.0}],
+                "users": [{"user_id": "allan"}, {"user_id": "emma"}],
+                "friendships": [{"user_id": "allan", "friend_id": "emma"}],
+                "purchases": [],
+            }
+            queries = {query: name for name, query in SNAPSHOT_QUERIES.items()}
+
+            def run(query):
+                # The daemon commits the purchase and moves its checkpoint past it mid-snapshot,
+                # after this snapshot already read the (empty) purchases
+                with open(f"{path}.checkpoint", "w") as f:
+                    json.dump({"offset": len(line)}, f)
+                return [MagicMock(data=MagicMock(return_value=row)) for row in rows[queries[query]]]
+
+            driver = MagicMock()
+            driver.session.return_value.__enter__.return_value.run.side_effect = run
+            engine = SocialGraphEngine.from_neo4j(driver, change_log=path)
+
+            self.assertEqual(engine.recommend("allan"), [])
+            self.assertEqual(engine.refresh(), 1)
+            self.assertEqual(self.ranking(engine, "allan"), [("MacBook Air M2", 1)])
+
+    def test_personalized_pagerank_matches_dense_solution(self):
+        """Test PPR against the closed-form solution and that it reaches past two hops."""
+        # a - b - c - d chain; d bought "Far", b bought "Near", a bought "Own"
+        engine = SocialGraphEngine(["a", "b", "c", "d"], [{"name": n} for n in ("Far", "Near", "Own")],
+                                   [("a", "b"), ("b", "c"), ("c", "d")],
+                                   [("d", "Far"), ("b", "Near"), ("a", "Own")])
+        rows = engine.personalized_pagerank("a", k=10, tol=1e-12, max_iter=1000)
+        self.assertEqual([r["name"] for r in rows], ["Near", "Far"])
+        self.assertEqual([r["social_count"] for r in rows], [1, 0])
+
+        walk, _ = engine._walk_matrix()
+        seed = np.zeros(walk.shape[0])
+        seed[engine.user_index["a"]] = 1.0
+        exact = np.linalg.solve(np.eye(walk.shape[0]) - 0.85 * walk.toarray(), 0.15 * seed)
+        for row in rows:
+            self.assertAlmostEqual(row["score"], exact[4 + engine.product_index[row["name"]]], places=8)
+
+    def test_personalized_pagerank_cache(self):
+        """Test that PPR results are cached per user and dropped when the graph changes."""
+        engine = load_engine()
+        first = engine.personalized_pagerank("allan", k=5)
+        self.assertIs(engine.personalized_pagerank("allan", k=5), first)
+
+        engine.apply({"upserts": [], "deletes": [], "friends": [{"user_id": "allan", "friend_id": "zoe"}],
+                      "purchases": [{"user_id": "zoe", "product_name": "Kindle Paperwhite"}]})
+        self.assertIsNot(engine.personalized_pagerank("allan", k=5), first)
+        self.assertIn("Kindle Paperwhite", [r["name"] for r in engine.personalized_pagerank("allan", k=50)])
+
+    @patch("tools.get_neo4j_driver")
+    @patch("tools.get_social_graph_engine")
+    def test_tool_memory_backend(self, mock_engine, mock_driver):
+        """Test that the memory backend answers top_k without touching Neo4j."""
+        mock_engine.return_value = load_engine()
+
+        result = social_recommendations("allan", backend="memory")
+
+        mock_driver.assert_not_called()
+        self.assertIn("Popular products in your friend network", result)
+        result = social_recommendations("allan", mode="ppr", k=3)
+        self.assertIn("Relevance:", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
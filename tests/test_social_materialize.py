@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+
+from social_materialize import SocialMaterializer, SocialRecommendationStore, affected_users
+from tests.test_social_graph import load_engine
+from tools import social_recommendations
+
+
+def empty_plan(**changes):
+    plan = {"upserts": [], "deletes": [], "friends": [], "purchases": []}
+    plan.update(changes)
+    return plan
+
+
+class TestSocialMaterialize(unittest.TestCase):
+
+    def setUp(self):
+        self.store = SocialRecommendationStore(":memory:")
+        self.materializer = SocialMaterializer(load_engine(), self.store, top_n=5)
+        self.materializer.rebuild()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_rebuild_stores_engine_lists(self):
+        """Test that every user is stored with the engine's ranking."""
+        engine = self.materializer.engine
+        self.assertEqual(self.store.count(), len(engine.user_ids))
+        self.assertEqual(self.store.get("Allan", k=3), engine.recommend("allan", k=3))
+        self.assertIsNone(self.store.get("nobody"))
+
+    def test_purchase_updates_only_two_hop_users(self):
+        """Test that a purchase refreshes the buyer's 2-hop neighbourhood and nobody else."""
+        engine = self.materializer.engine
+        plan = empty_plan(purchases=[{"user_id": "emma", "product_name": "MacBook Air M2"}])
+
+        written = self.materializer.apply(plan)
+
+        self.assertEqual(written, len(engine.network("emma", hops=2)))
+        self.assertLess(written, len(engine.user_ids))
+        for user_id in engine.user_ids:
+            self.assertEqual(self.store.get(user_id, k=5), engine.recommend(user_id, k=5))
+
+    def test_friendship_and_delete_affect_listing_users(self):
+        """Test the affected sets of a new friendship and of a product delete."""
+        engine = self.materializer.engine
+        plan = empty_plan(friends=[{"user_id": "allan", "friend_id": "zoe"}])
+        engine.apply(plan)
+        self.assertEqual(affected_users(engine, plan, self.store),
+                         engine.network("allan", hops=1) | {"zoe"})
+
+        listing = {u for u in engine.user_ids if any(r["name"] == "PlayStation 5" for r in self.store.get(u, k=5) or [])}
+        plan = empty_plan(deletes=[{"product_id": "", "name": "PlayStation 5"}])
+        self.assertEqual(affected_users(engine, plan, self.store), listing)
+
+    @patch("tools.get_neo4j_driver")
+    @patch("tools.get_social_recommendation_store")
+    def test_tool_reads_materialized_list(self, mock_store, mock_driver):
+        """Test that the materialized backend answers from the store and falls back to Cypher."""
+        mock_store.return_value = self.store
+
+        result = social_recommendations("allan", backend="materialized", k=3)
+        mock_driver.assert_not_called()
+        self.assertIn("Popular products in your friend network", result)
+
+        social_recommendations("nobody", backend="materialized")
+        mock_driver.return_value.session.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
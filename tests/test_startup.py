@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from prompts import load_react_prompt, prompt_cache_path
+from startup_report import by_package, parse_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_tools_import_skips_heavy_backends(self):
+        """Test that importing the tools loads no backend client or numeric library."""
+        heavy = ("numpy", "scipy", "elasticsearch", "neo4j", "openai", "langchain_openai")
+        code = f"import sys, tools; print('loaded:' + ','.join(m for m in {heavy!r} if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "loaded:")
+
+    def test_vendored_prompt_needs_no_network(self):
+        """Test that the default prompt is the vendored one and hub prompts are read from the cache."""
+        prompt = load_react_prompt(reference="")
+        self.assertEqual(sorted(prompt.input_variables), ["agent_scratchpad", "input", "tool_names", "tools"])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            reference = "someone/react:abc123"
+            with open(prompt_cache_path(reference, tmpdir), "w") as f:
+                f.write("Tools: {tools} {tool_names}\nQuestion: {input}\n{agent_scratchpad}")
+            cached = load_react_prompt(reference=reference, cache_dir=tmpdir)
+        self.assertTrue(cached.template.startswith("Tools:"))
+
+    def test_parse_importtime(self):
+        """Test parsing of -X importtime lines and per-package totals."""
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       100 |        100 |   numpy.core\n"
+                  "import time:        50 |        150 | numpy\n"
+                  "import time:        20 |         20 | tools\n")
+        rows = parse_importtime(stderr)
+
+        self.assertEqual(rows[1], ("numpy", 50, 150))
+        self.assertEqual(by_package(rows), {"numpy": 150, "tools": 20})
+
+
+if __name__ == "__main__":
+    unittest.main()
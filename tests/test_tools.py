@@ -1,15 +1,134 @@
+import os
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from tools import (
     search_products_by_embedding,
     get_social_recommendations,
+    social_recommendations,
     get_promotion_by_category,
     general_chat,
-    verify_recommendation_consistency
+    verify_recommendation_consistency,
+    build_vector_search_body,
+    build_filter_clauses,
+    build_hybrid_search_body,
+    reciprocal_rank_fusion,
+    warm_up
 )
- 
+
+SMARTPHONES = [
+    {"name": "Samsung Galaxy S21", "category": "Smartphones", "brand": "Samsung", "price": 799.99,
+     "description": "Smartphone with a vibrant 6.2-inch AMOLED display and triple camera"},
+    {"name": "iPhone 13", "category": "Smartphones", "brand": "Apple", "price": 899.99,
+     "description": "Smartphone with A15 Bionic chip and dual camera"},
+    {"name": "Xiaomi Redmi Note 11", "category": "Smartphones", "brand": "Xiaomi", "price": 500.99,
+     "description": "Smartphone with 6.4 inch display and quad camera"},
+]
+
+
 class TestProductRecommendationTools(unittest.TestCase):
+
+    @patch.dict("os.environ", {"VECTOR_BACKEND": "elastic", "ELASTIC_SEARCH_MODE": "knn"})
+    @patch("tools.generate_query_vector", return_value=[0.1, 0.2])
+    @patch("tools.get_elasticsearch")
+    def test_search_products_by_embedding(self, mock_es, mock_vector):
+        """Test that product search formats the Elasticsearch hits."""
+        mock_es.return_value.search.return_value = {"hits": {"hits": [
+            {"_id": "P001", "_source": SMARTPHONES[0]},
+            {"_id": "P002", "_source": SMARTPHONES[1]},
+            {"_id": "P003", "_source": SMARTPHONES[2]},
+        ]}}
+
+        result = search_products_by_embedding.invoke("smartphone with good camera")
+
+        body = mock_es.return_value.search.call_args.kwargs["body"]
+        self.assertEqual(body["knn"]["query_vector"], [0.1, 0.2])
+        self.assertIn("Samsung Galaxy S21", result)
+        self.assertIn("iPhone 13", result)
+        self.assertIn("Xiaomi Redmi Note 11", result)
+        self.assertIn("$799.99", result)
+        self.assertIn("$899.99", result)
+        self.assertIn("$500.99", result)
+        self.assertIn("AMOLED display", result)
+        self.assertIn("A15 Bionic", result)
+        for label in ("Name:", "Category:", "Brand:", "Description:", "Price:"):
+            self.assertIn(label, result)
+
+    @patch.dict("os.environ", {"SOCIAL_BACKEND": "neo4j", "SOCIAL_QUERY_MODE": "top_k"})
+    @patch("tools.get_neo4j_driver")
+    def test_get_social_recommendations(self, mock_driver):
+        """Test that social recommendations format the Cypher rows."""
+        session = mock_driver.return_value.session.return_value.__enter__.return_value
+        session.execute_read.return_value = [
+            {"name": "Galaxy Buds Pro", "category": "Accessories", "brand": "Samsung",
+             "description": "Wireless earbuds", "price": 199.99, "social_count": 3},
+            {"name": "Smart TV 55\" Crystal UHD 4K", "category": "Electronics", "brand": "Samsung",
+             "description": "Smart TV", "price": 649.99, "social_count": 2},
+        ]
+
+        result = get_social_recommendations.invoke("default_user")
+
+        self.assertIn("Popular products in your friend network", result)
+        self.assertIn("Galaxy Buds Pro", result)
+        self.assertIn("Smart TV", result)
+        self.assertIn("Social: 3 friends or friends-of-friends purchased this", result)
+        self.assertIn("- Electronics: 1 products", result)
+
+        session.execute_read.return_value = []
+        self.assertIn("No products found in the social network of user 'test_user'",
+                      get_social_recommendations.invoke("test_user"))
+
+    def test_get_promotion_by_category(self):
+        """Test that promotion search returns expected results."""
+        # Test with "all" categories
+        all_result = get_promotion_by_category.invoke("all")
+         
+        # Should include all promotions
+        self.assertIn("Current promotions across all categories", all_result)
+        self.assertIn("Xiaomi Redmi Note 11", all_result)
+        self.assertIn("Galaxy Buds Pro", all_result)
+        self.assertIn("Nike Air Zoom", all_result)
+         
+        # Test with specific category - the current implementation is always returning all promotions
+        # so we're just testing that it returns results that include our smartphone
+        smartphone_result = get_promotion_by_category.invoke("smartphones")
+        self.assertIn("Xiaomi Redmi Note 11", smartphone_result)
+         
+        # Test with non-existent category
+        nonexistent_result = get_promotion_by_category.invoke("laptops")
+         
+        # Non-existent categories name the categories on promotion instead of listing every promotion
+        self.assertIn("Smartphones", nonexistent_result)
+        self.assertNotIn("Xiaomi Redmi Note 11", nonexistent_result)
      
+    @patch("tools.get_chat_model")
+    def test_general_chat(self, mock_chat):
+        """Test that general chat sends the user's message to the chat model."""
+        mock_chat.return_value.invoke.return_value = MagicMock(content="Hello! Looking for a new product?")
+
+        result = general_chat.invoke("Hello there")
+
+        self.assertEqual(result, "Hello! Looking for a new product?")
+        self.assertIn('The user said: "Hello there"', mock_chat.return_value.invoke.call_args[0][0])
+        mock_chat.assert_called_with("gpt-3.5-turbo-1106", temperature=0.7)
+
+    @patch("tools.get_chat_model")
+    def test_verify_recommendation_consistency(self, mock_chat):
+        """Test that verification sends the recommendation data to the chat model."""
+        mock_chat.return_value.invoke.return_value = MagicMock(content="Based on your requirements, iPhone 13.")
+        test_data = "iPhone 13 with good camera"
+
+        result = verify_recommendation_consistency.invoke(test_data)
+
+        self.assertEqual(result, "Based on your requirements, iPhone 13.")
+        self.assertIn(test_data, mock_chat.return_value.invoke.call_args[0][0])
+        mock_chat.assert_called_with("gpt-3.5-turbo-1106", temperature=0)
+
+
+# The original end-to-end checks against the live backends and chat model
+@unittest.skipUnless(os.getenv("INTEGRATION_TESTS", "false").lower() == "true",
+                     "needs Elasticsearch, Neo4j and OpenAI (set INTEGRATION_TESTS=true)")
+class TestToolsIntegration(unittest.TestCase):
+
     def test_search_products_by_embedding(self):
         """Test that product search returns expected results."""
         # Test with a simple query
@@ -54,28 +173,6 @@ class TestProductRecommendationTools(unittest.TestCase):
         result_with_user = get_social_recommendations.invoke("test_user")
         self.assertIn("Popular products in your friend network", result_with_user)
      
-    def test_get_promotion_by_category(self):
-        """Test that promotion search returns expected results."""
-        # Test with "all" categories
-        all_result = get_promotion_by_category.invoke("all")
-         
-        # Should include all promotions
-        self.assertIn("Current promotions across all categories", all_result)
-        self.assertIn("Xiaomi Redmi Note 11", all_result)
-        self.assertIn("Galaxy Buds Pro", all_result)
-        self.assertIn("Nike Air Zoom", all_result)
-         
-        # Test with specific category - the current implementation is always returning all promotions
-        # so we're just testing that it returns results that include our smartphone
-        smartphone_result = get_promotion_by_category.invoke("smartphones")
-        self.assertIn("Xiaomi Redmi Note 11", smartphone_result)
-         
-        # Test with non-existent category
-        nonexistent_result = get_promotion_by_category.invoke("laptops")
-         
-        # Ensure we get some results even for non-existent categories
-        self.assertIn("Xiaomi Redmi Note 11", nonexistent_result)
-     
     def test_general_chat(self):
         """Test that general chat provides appropriate responses."""
         # Test greeting
@@ -100,5 +197,119 @@ class TestProductRecommendationTools(unittest.TestCase):
         self.assertIn(test_data, result)
         self.assertIn("Based on your requirements", result)
  
+
+class TestVectorSearchBody(unittest.TestCase):
+
+    def test_knn_body_maps_min_score(self):
+        """Test that knn mode uses the HNSW query and a 0-1 min_score."""
+        body = build_vector_search_body([0.1, 0.2], search_mode="knn", size=5, min_score_percentage=85)
+        self.assertNotIn("query", body)
+        self.assertEqual(body["knn"]["k"], 5)
+        self.assertEqual(body["knn"]["num_candidates"], 50)
+        self.assertAlmostEqual(body["min_score"], 0.85)
+
+    def test_script_body_keeps_raw_scale(self):
+        """Test that script mode keeps the brute-force query on the 0-2 scale."""
+        body = build_vector_search_body([0.1, 0.2], search_mode="script", min_score_percentage=85)
+        self.assertIn("script_score", body["query"])
+        self.assertAlmostEqual(body["min_score"], 1.7)
+
+    def test_filters_are_prefilters(self):
+        """Test that category and price filters go inside the vector query."""
+        filters = build_filter_clauses(category="Smartphones", max_price=200)
+        self.assertEqual(filters[1], {"range": {"price": {"lte": 200}}})
+
+        knn_body = build_vector_search_body([0.1], search_mode="knn", filters=filters)
+        self.assertEqual(knn_body["knn"]["filter"], {"bool": {"filter": filters}})
+
+        script_body = build_vector_search_body([0.1], search_mode="script", filters=filters)
+        self.assertEqual(script_body["query"]["script_score"]["query"], {"bool": {"filter": filters}})
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            build_vector_search_body([0.1], search_mode="fuzzy")
+
+class TestHybridSearch(unittest.TestCase):
+
+    def test_reciprocal_rank_fusion(self):
+        """Test that documents ranked by both retrievers rise to the top."""
+        text_hits = [{"_id": "P003", "_source": {}}, {"_id": "P001", "_source": {}}]
+        vector_hits = [{"_id": "P001", "_source": {}}, {"_id": "P002", "_source": {}}]
+
+        fused = reciprocal_rank_fusion([text_hits, vector_hits], size=2)
+
+        self.assertEqual([hit["_id"] for hit in fused], ["P001", "P003"])
+        self.assertAlmostEqual(fused[0]["_score"], 1 / 62 + 1 / 61)
+
+    def test_weighted_body_has_both_retrievers(self):
+        """Test that the weighted hybrid body carries the BM25 query and the knn clause."""
+        body = build_hybrid_search_body("good camera", [0.1], size=5,
+                                        filters=build_filter_clauses(category="Smartphones"))
+        self.assertIn("multi_match", body["query"]["bool"]["must"])
+        self.assertEqual(body["knn"]["boost"], 0.7)
+        self.assertEqual(body["knn"]["filter"], {"bool": {"filter": body["query"]["bool"]["filter"]}})
+
+
+class TestSocialRecommendations(unittest.TestCase):
+
+    @patch("tools.get_neo4j_driver")
+    def test_uses_shared_driver_and_read_session(self, mock_driver):
+        """Test that the tool reads through a read-routed session and never closes the driver."""
+        from neo4j import READ_ACCESS
+        session = mock_driver.return_value.session.return_value.__enter__.return_value
+        session.execute_read.return_value = [{
+            "name": "Galaxy Buds Pro", "category": "Accessories", "brand": "Samsung",
+            "description": "Wireless earbuds", "price": 199.99, "social_count": 2
+        }]
+
+        result = get_social_recommendations.invoke("user_id='Allan'")
+
+        mock_driver.return_value.session.assert_called_once_with(default_access_mode=READ_ACCESS)
+        mock_driver.return_value.close.assert_not_called()
+        self.assertIn("Galaxy Buds Pro", result)
+
+    @patch("tools.get_neo4j_driver")
+    def test_top_k_mode_runs_bounded_query(self, mock_driver):
+        """Test that top_k mode runs the distinct-buyer query with the LIMIT parameter."""
+        from graph_schema import SOCIAL_TOP_K_QUERY
+        session = mock_driver.return_value.session.return_value.__enter__.return_value
+        session.execute_read.side_effect = lambda fn: fn(tx)
+        tx = MagicMock()
+        tx.run.return_value = []
+
+        social_recommendations("bob", mode="top_k", k=3)
+
+        tx.run.assert_called_once_with(SOCIAL_TOP_K_QUERY, user_id="bob", k=3)
+        self.assertIn("Error", social_recommendations("bob", mode="bogus"))
+
+
+class TestWarmUp(unittest.TestCase):
+
+    @patch("tools.get_chat_model")
+    @patch("tools.health_check")
+    def test_warm_up_reports_each_resource(self, mock_health, mock_chat):
+        """Test that warm-up times every resource and surfaces backend failures."""
+        mock_health.return_value = {"elasticsearch": "ok", "neo4j": "error: refused", "openai": "ok"}
+        mock_chat.side_effect = RuntimeError("no key")
+
+        timings = warm_up()
+
+        self.assertIsInstance(timings["promotions"], float)
+        self.assertIsInstance(timings["categories"], float)
+        self.assertEqual(timings["neo4j"], "error: refused")
+        self.assertEqual(timings["chat_models"], "error: no key")
+
+    @patch.dict("os.environ", {"SOCIAL_BACKEND": "materialized"})
+    @patch("tools.get_social_recommendation_store")
+    @patch("tools.get_chat_model")
+    @patch("tools.health_check", return_value={})
+    def test_warm_up_opens_materialized_store(self, mock_health, mock_chat, mock_store):
+        """Test that the materialized social backend is opened during warm-up."""
+        timings = warm_up()
+
+        mock_store.assert_called_once_with()
+        self.assertIsInstance(timings["social_materialized"], float)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
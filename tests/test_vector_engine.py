@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from vector_engine import LocalVectorEngine
+
+
+class TestLocalVectorEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        documents = [
+            {"product_id": "P001", "name": "Samsung Galaxy S21", "category": "Smartphones", "brand": "Samsung", "price": 799.99, "embedding": [1.0, 0.0, 0.0]},
+            {"product_id": "P002", "name": "iPhone 13", "category": "Smartphones", "brand": "Apple", "price": 899.99, "embedding": [0.9, 0.1, 0.0]},
+            {"product_id": "P003", "name": "Nike Running Shoes", "category": "Sports", "embedding": [0.0, 1.0, 0.0]},
+            {"product_id": "P004", "name": "Yamaha Acoustic Guitar", "category": "Musical Instruments", "embedding": [0.0, 0.0, 2.0]},
+        ]
+        self.engine = LocalVectorEngine.build(documents, self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_top_k_ordering_and_min_score(self):
+        """Test that hits are ranked by cosine and cut at the tool's min_score."""
+        hits = self.engine.search([1.0, 0.0, 0.0], k=3, min_score_percentage=85)[0]
+        self.assertEqual([h["_id"] for h in hits], ["P001", "P002"])
+        self.assertAlmostEqual(hits[0]["_score"], 2.0, places=5)
+        self.assertNotIn("embedding", hits[0]["_source"])
+
+    def test_batch_queries(self):
+        """Test that a batch of query vectors returns one result list per query."""
+        results = self.engine.search(np.array([[0.0, 3.0, 0.0], [0.0, 0.0, 1.0]]), k=1, min_score_percentage=0)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][0]["_source"]["name"], "Nike Running Shoes")
+        self.assertEqual(results[1][0]["_id"], "P004")
+
+    def test_prefilters(self):
+        """Test that category, brand and price filters are applied before top-k."""
+        hits = self.engine.search([1.0, 0.0, 0.0], k=3, min_score_percentage=0, category="smartphones", max_price=850)
+        self.assertEqual([h["_id"] for h in hits[0]], ["P001"])
+
+        hits = self.engine.search([1.0, 0.0, 0.0], k=3, min_score_percentage=0, brand="Apple")
+        self.assertEqual([h["_id"] for h in hits[0]], ["P002"])
+
+    def test_reopen_from_disk(self):
+        """Test that the memory-mapped index can be reopened."""
+        engine = LocalVectorEngine(self.tmpdir.name)
+        self.assertEqual(engine.count, 4)
+        self.assertEqual(engine.dims, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
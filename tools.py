@@ -1,25 +1,242 @@
 import os
 import json
-import openai
-import numpy as np
-from elasticsearch import Elasticsearch
+import random
+import time
 from dotenv import load_dotenv
 from typing import Optional
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-from neo4j import GraphDatabase
+from categories import ALL_CATEGORIES, category_in_text, get_category_resolver, normalize_category, resolve_category
+from clients import get_chat_model, get_elasticsearch, get_neo4j_driver, get_openai_client, health_check
+from embedding_cache import get_embedding_cache
+from graph_schema import SOCIAL_QUERIES
+from index_profiles import get_profile, search_min_score
+from promotions import get_promotion_catalog, get_promotion_feed, parse_price_range
 
+# Backends with heavy dependencies (NumPy, SciPy) are imported when their tool
+# first needs them, so importing the tools module stays fast and offline-safe
+
+def get_local_vector_engine():
+    from vector_engine import get_local_vector_engine
+    return get_local_vector_engine()
+
+def get_social_graph_engine():
+    from social_graph import get_social_graph_engine
+    return get_social_graph_engine()
+
+def get_social_recommendation_store():
+    from social_materialize import get_social_recommendation_store
+    return get_social_recommendation_store()
 
 
 
 # Helper: Generate an embedding from text using OpenAI.
+# Looks in the two-tier embedding cache first; only real API results are cached.
 def generate_embedding(text: str, model: str = "text-embedding-ada-002") -> list:
+    cache = get_embedding_cache()
+    cached = cache.get(text, model)
+    if cached is not None:
+        return cached
+
     try:
-        response = openai.embeddings.create(input=text, model=model)
-        return response.data[0].embedding
+        response = get_openai_client().embeddings.create(input=text, model=model)
+        embedding = response.data[0].embedding
+        cache.put(text, model, embedding)
+        return embedding
     except Exception as e:
         print(f"Embedding error: {e}")
-        return np.random.rand(1536).tolist()
+        return [random.random() for _ in range(1536)]
+
+# Helper: Embed a search query for the active index profile (VECTOR_INDEX_PROFILE),
+# with the same model, dimensions and normalization used at ingestion.
+def generate_query_vector(query: str) -> list:
+    profile = get_profile()
+    return profile.prepare(generate_embedding(query, model=profile.model))
+
+# Helper: Build Elasticsearch filter clauses from structured search arguments.
+# They use the keyword (category, brand) and float (price) fields of the mapping.
+def build_filter_clauses(category: Optional[str] = None, brand: Optional[str] = None,
+                         min_price: Optional[float] = None, max_price: Optional[float] = None) -> list:
+    clauses = []
+    if category:
+        clauses.append({"term": {"category": {"value": category, "case_insensitive": True}}})
+    if brand:
+        clauses.append({"term": {"brand": {"value": brand, "case_insensitive": True}}})
+    price_range = {}
+    if min_price is not None:
+        price_range["gte"] = min_price
+    if max_price is not None:
+        price_range["lte"] = max_price
+    if price_range:
+        clauses.append({"range": {"price": price_range}})
+    return clauses
+
+# Helper: Build the Elasticsearch request body for a vector search.
+# "knn" uses the HNSW graph built from the dense_vector mapping (approximate, sublinear),
+# "script" keeps the original brute-force script_score over every document.
+# min_score_percentage is mapped onto each mode's score scale:
+#   knn with cosine similarity scores (1 + cos) / 2, so the cut is percentage / 100
+#   script_score adds 1.0 to the cosine, so the cut is percentage / 50 (0-2 scale)
+# filters are applied before scoring: as the knn pre-filter (the HNSW search only
+# visits matching documents) or as the script_score inner query.
+# Documents without a vector (near-duplicates indexed before they shared their
+# canonical product's vector, see dedup.py) score 0, below any min_score.
+def build_vector_search_body(query_vector: list, search_mode: str = "knn", size: int = 10,
+                             min_score_percentage: float = 85, k: Optional[int] = None,
+                             num_candidates: Optional[int] = None, filters: Optional[list] = None) -> dict:
+    if search_mode == "knn":
+        k = k or size
+        num_candidates = max(num_candidates or k * 10, k)
+        body = {
+            "size": size,
+            "min_score": min_score_percentage / 100.0,
+            "knn": {
+                "field": "embedding",
+                "query_vector": query_vector,
+                "k": k,
+                "num_candidates": num_candidates
+            }
+        }
+        if filters:
+            body["knn"]["filter"] = {"bool": {"filter": filters}}
+        return body
+
+    if search_mode == "script":
+        inner_query = {"bool": {"filter": filters}} if filters else {"match_all": {}}
+        return {
+            "size": size,
+            "min_score": min_score_percentage / 50.0,
+            "query": {
+                "script_score": {
+                    "query": inner_query,
+                    "script": {
+                        "source": "doc['embedding'].size() == 0 ? 0 : cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                        "params": {"query_vector": query_vector}
+                    }
+                }
+            }
+        }
+
+    raise ValueError(f"Unknown search mode: {search_mode}")
+
+# Helper: Lexical (BM25) query over the text fields, with the same pre-filters.
+def build_text_search_body(query: str, size: int = 10, filters: Optional[list] = None) -> dict:
+    return {
+        "size": size,
+        "query": {
+            "bool": {
+                "must": {
+                    "multi_match": {
+                        "query": query,
+                        "fields": ["name", "description", "category", "brand", "features"]
+                    }
+                },
+                "filter": filters or []
+            }
+        }
+    }
+
+# Helper: Single-request hybrid query. Elasticsearch sums the boosted BM25 score and the
+# boosted knn score of each document, so both retrievers run in one round trip.
+def build_hybrid_search_body(query: str, query_vector: list, size: int = 10, k: Optional[int] = None,
+                             num_candidates: Optional[int] = None, filters: Optional[list] = None,
+                             text_boost: float = 0.3, vector_boost: float = 0.7) -> dict:
+    body = build_text_search_body(query, size=size, filters=filters)
+    body["query"]["bool"]["boost"] = text_boost
+    knn = build_vector_search_body(query_vector, search_mode="knn", size=size, k=k,
+                                   num_candidates=num_candidates, filters=filters)["knn"]
+    knn["boost"] = vector_boost
+    body["knn"] = knn
+    return body
+
+# Helper: Reciprocal rank fusion of several ranked hit lists.
+# Each document scores sum(1 / (rank_constant + rank)) over the lists it appears in.
+def reciprocal_rank_fusion(result_lists: list, size: int = 10, rank_constant: int = 60) -> list:
+    fused = {}
+    for hits in result_lists:
+        for rank, hit in enumerate(hits, 1):
+            entry = fused.setdefault(hit["_id"], {"_id": hit["_id"], "_score": 0.0, "_source": hit["_source"]})
+            entry["_score"] += 1.0 / (rank_constant + rank)
+    return sorted(fused.values(), key=lambda hit: hit["_score"], reverse=True)[:size]
+
+# Helper: Run the lexical and vector retrievers in one round trip and fuse them.
+# "rrf" sends both sub-queries in a single _msearch and fuses the ranks client-side,
+# "weighted" sends one _search with the boosted query + knn clauses.
+def _hybrid_search(es, index_name: str, query: str, query_vector: list, k: int, num_candidates: int,
+                   filters: list, min_score_percentage: float, fusion: str) -> list:
+    if fusion == "weighted":
+        body = build_hybrid_search_body(query, query_vector, size=k, k=k,
+                                        num_candidates=num_candidates, filters=filters)
+        return es.search(index=index_name, body=body)["hits"]["hits"]
+
+    if fusion != "rrf":
+        raise ValueError(f"Unknown fusion method: {fusion}")
+
+    window = max(2 * k, 20)
+    searches = [
+        {"index": index_name},
+        build_text_search_body(query, size=window, filters=filters),
+        {"index": index_name},
+        build_vector_search_body(query_vector, search_mode="knn", size=window,
+                                 min_score_percentage=min_score_percentage,
+                                 num_candidates=num_candidates, filters=filters),
+    ]
+    responses = es.msearch(searches=searches)["responses"]
+    result_lists = []
+    for response in responses:
+        if "error" in response:
+            print(f"Hybrid sub-search error: {response['error']}")
+            continue
+        result_lists.append(response["hits"]["hits"])
+    return reciprocal_rank_fusion(result_lists, size=k)
+
+# Brands of the seed catalog (elastic/ingest-*.py, neo4j/data)
+KNOWN_BRANDS = ("Amazon", "Apple", "Dell", "Fitbit", "Nike", "Samsung", "Sony", "Wilson", "Xiaomi", "Yamaha")
+
+# Helper: the one known brand named in the text, None when none or several are named
+def brand_in_text(text: str) -> Optional[str]:
+    brands = set(KNOWN_BRANDS) | {row["brand"] for row in get_promotion_catalog().rows if row.get("brand")}
+    padded = f" {normalize_category(text or '')} "
+    found = {brand for brand in brands if f" {normalize_category(brand)} " in padded}
+    return next(iter(found)) if len(found) == 1 else None
+
+def parse_search_request(text: str) -> dict:
+    """
+    Splits the search tool's single input string into the query text and filters.
+    A category, brand or price range named in the text becomes a filter; a JSON
+    object with "query" may also set "category", "brand", "min_price" and "max_price".
+
+    :param text: e.g. "samsung smartphones with a good camera under 500"
+    :return: Keyword arguments for search_products
+    """
+    request = {}
+    try:
+        parsed = json.loads(text)
+        if isinstance(parsed, dict) and "query" in parsed:
+            request = parsed
+    except (TypeError, ValueError):
+        pass
+    query = str(request.get("query", text))
+
+    stripped, min_price, max_price = parse_price_range(query)
+    category = category_in_text(stripped)
+    arguments = {
+        "query": stripped or query,
+        "category": None if category == ALL_CATEGORIES else category,
+        "brand": brand_in_text(stripped),
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+    for name in ("category", "brand", "min_price", "max_price"):
+        if request.get(name) in (None, ""):
+            continue
+        if name in ("min_price", "max_price"):
+            try:
+                arguments[name] = float(request[name])
+            except (TypeError, ValueError):
+                print(f"Ignoring {name} '{request[name]}': not a number")
+        else:
+            arguments[name] = str(request[name])
+    return arguments
 
 @tool
 def search_products_by_embedding(query: str) -> str:
@@ -28,67 +245,93 @@ def search_products_by_embedding(query: str) -> str:
     Use this tool ONLY when the user is looking for specific product features or characteristics.
     DO NOT use this tool for promotion requests or social recommendations.
     
+    :param query: Text describing what the user is looking for; a category, brand or price
+        range named in it (e.g. "Samsung smartphones under 500") filters the results
+    :return: List of products similar to the query
+    """
+    return search_products(**parse_search_request(query))
+
+def search_products(query: str, search_mode: Optional[str] = None,
+                    k: int = 10, num_candidates: int = 100,
+                    backend: Optional[str] = None, category: Optional[str] = None,
+                    brand: Optional[str] = None, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None, fusion: str = "rrf") -> str:
+    """
+    Vector product search behind search_products_by_embedding.
+    
     :param query: Text describing what the user is looking for
-    :param category: Optional category to filter results
+    :param search_mode: "knn" (approximate nearest neighbours), "script" (exact brute-force scoring)
+        or "hybrid" (keyword BM25 + vector, fused into one ranked list)
+    :param k: Number of nearest neighbours to return in knn mode
+    :param num_candidates: Candidates examined per shard in knn mode (higher = better recall, slower)
+    :param backend: "elastic" (Elasticsearch cluster) or "local" (embedded vector_engine index)
+    :param category: Optional category to filter results (e.g. "Smartphones")
+    :param brand: Optional brand to filter results (e.g. "Samsung")
+    :param min_price: Optional minimum price
+    :param max_price: Optional maximum price (e.g. 200 for "price lower than 200")
+    :param fusion: Hybrid mode only: "rrf" (reciprocal rank fusion) or "weighted" (boosted score sum)
     :return: List of products similar to the query
     """
     print("***** VECTOR SEARCH TOOL *****")
     print(f"Query: {query}")
+    # Free-text categories ("phones", "smartphone") become the indexed keyword value.
+    # The filter is exact, so an unknown or ambiguous category is dropped, not guessed
+    if category:
+        resolved = resolve_category(category)
+        if resolved is None:
+            print(f"Unknown category '{category}', searching every category")
+        category = None if resolved == ALL_CATEGORIES else resolved
+    filters = build_filter_clauses(category, brand, min_price, max_price)
+    if filters:
+        print(f"Filters: {filters}")
 
-    # Check if running in local environment
-    is_local = os.getenv("LOCAL", "false").lower() == "true"
-    
-    if is_local:
-        # Local environment configuration
-        ELASTIC_ENDPOINT = os.getenv("ELASTIC_HOST", "https://localhost:9200")
-        ELASTIC_USERNAME = os.getenv("ELASTIC_USERNAME", "elastic")
-        ELASTIC_PASSWORD = os.getenv("ELASTIC_PASSWORD", "elastic")
-        auth_params = {"basic_auth": (ELASTIC_USERNAME, ELASTIC_PASSWORD)}
-    else:
-        # Azure environment configuration
-        ELASTIC_ENDPOINT = os.getenv("ELASTIC_ENDPOINT", "https://elastic-products.es.westus2.azure.elastic-cloud.com")
-        ELASTIC_API_KEY = os.getenv("ELASTIC_API_KEY")
-        
-        auth_params = {}
-        if ELASTIC_API_KEY:
-            if ":" in ELASTIC_API_KEY:
-                parts = ELASTIC_API_KEY.split(":")
-                auth_params["api_key"] = (parts[0], parts[1])
-            else:
-                auth_params["headers"] = {"Authorization": f"ApiKey {ELASTIC_API_KEY}"}
+    search_mode = (search_mode or os.getenv("ELASTIC_SEARCH_MODE", "knn")).lower()
+    backend = (backend or os.getenv("VECTOR_BACKEND", "elastic")).lower()
+    min_score_percentage = search_min_score()
 
-    ELASTIC_INDEX_NAME = "products"
+    if backend == "local":
+        if search_mode == "hybrid":
+            print("Hybrid search needs Elasticsearch; using vector search on the local backend.")
+        try:
+            engine = get_local_vector_engine()
+            query_vector = generate_query_vector(query)
+            hits = engine.search(query_vector, k=k, min_score_percentage=min_score_percentage,
+                                 category=category, brand=brand, min_price=min_price, max_price=max_price)[0]
+        except Exception as e:
+            return f"Search error: {e}"
+    else:
+        ELASTIC_INDEX_NAME = "products"
 
-    try:
-        verify_certs = not is_local
-        es = Elasticsearch(ELASTIC_ENDPOINT, verify_certs=verify_certs, **auth_params)
-    except Exception as e:
-        return f"Connection error: {e}"
+        try:
+            es = get_elasticsearch()
+        except Exception as e:
+            return f"Connection error: {e}"
 
-    query_vector = generate_embedding(query)
-    min_score_percentage = 85
-    raw_min_score = min_score_percentage / 50.0  # converts to raw score on a 0-2 scale
+        query_vector = generate_query_vector(query)
 
-    search_body = {
-        "size": 10,
-        "min_score": raw_min_score,
-        "query": {
-            "script_score": {
-                "query": {"match_all": {}},
-                "script": {
-                    "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
-                    "params": {"query_vector": query_vector}
-                }
-            }
-        }
-    }
+        if search_mode == "hybrid":
+            try:
+                hits = _hybrid_search(es, ELASTIC_INDEX_NAME, query, query_vector, k, num_candidates,
+                                      filters, min_score_percentage, fusion)
+            except Exception as e:
+                return f"Search error: {e}"
+        else:
+            try:
+                search_body = build_vector_search_body(query_vector, search_mode=search_mode, size=k,
+                                                       min_score_percentage=min_score_percentage,
+                                                       k=k, num_candidates=num_candidates, filters=filters)
+            except ValueError as e:
+                return f"Search error: {e}"
 
-    try:
-        response = es.search(index=ELASTIC_INDEX_NAME, body=search_body)
-        hits = response['hits']['hits']
-    except Exception as e:
-        return f"Search error: {e}"
+            try:
+                response = es.search(index=ELASTIC_INDEX_NAME, body=search_body)
+                hits = response['hits']['hits']
+            except Exception as e:
+                return f"Search error: {e}"
 
+    # Near-duplicate listings (same dup_of cluster) show up once
+    from dedup import collapse_duplicates
+    hits = collapse_duplicates(hits)
     if not hits:
         return "No products found matching your query."
 
@@ -112,45 +355,74 @@ def get_social_recommendations(user_id: str = "Bob") -> str:
     :param user_id: The user ID for whom we want social recommendations
     :return: Formatted list of products recommended based on that user's network
     """
+    return social_recommendations(user_id)
 
-    is_local = os.getenv("LOCAL", "false").lower() == "true"
+def social_recommendations(user_id: str, mode: Optional[str] = None, k: int = 10,
+                           backend: Optional[str] = None) -> str:
+    """
+    Social recommendations behind get_social_recommendations.
 
-    if is_local:
-        NEO4J_URI = os.getenv("NEO4J_URI")
-        NEO4J_USER = os.getenv("NEO4J_USER")
-        NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-    else:
-        NEO4J_URI = os.getenv("NEO4J_URI_AZURE")
-        NEO4J_USER = os.getenv("NEO4J_USER_AZURE")
-        NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD_AZURE")
+    :param user_id: The user ID for whom we want social recommendations
+    :param mode: "top_k" (distinct buyers per product, excluding the user's own purchases,
+        best k only), "paths" (every product in the network, counted per path) or "ppr"
+        (personalized PageRank over friendships and purchases, always in-process);
+        default SOCIAL_QUERY_MODE
+    :param k: Number of products returned in top_k and ppr modes
+    :param backend: "neo4j" (Cypher query), "memory" (in-process CSR snapshot) or
+        "materialized" (precomputed lists, see social_materialize.py); the last two serve
+        top_k mode only; default SOCIAL_BACKEND
+    :return: Formatted list of products recommended based on that user's network
+    """
 
     print("***** SOCIAL GRAPH TOOL *****")
     clear_user = user_id.lower().replace("user_id", "").replace("'", "").replace("=", "").strip()
     print(f"User ID: {clear_user}")
 
-    # Connect to Neo4j
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD) )
-
-    # Cypher query to find products purchased by user's friends or friends-of-friends
-    query = """
-    MATCH (u:User {userId: $user_id})-[:FRIENDS_WITH*1..2]-(x:User)-[:PURCHASED]->(p:Product)
-    RETURN p.name AS name,
-           p.category AS category,
-           p.brand AS brand,
-           p.description AS description,
-           p.price AS price,
-           count(*) AS social_count
-    ORDER BY social_count DESC
-    """
+    mode = (mode or os.getenv("SOCIAL_QUERY_MODE", "top_k")).lower()
+    if mode not in SOCIAL_QUERIES and mode != "ppr":
+        return f"Error querying social recommendations: unknown mode '{mode}'"
+    backend = (backend or os.getenv("SOCIAL_BACKEND", "neo4j")).lower()
 
-    try:
-        with driver.session() as session:
-            records = session.run(query, user_id=clear_user)
-            results = [record.data() for record in records]
-    except Exception as e:
-        return f"Error querying social recommendations: {str(e)}"
-    finally:
-        driver.close()
+    # Precomputed top-N lists: one key lookup; users not materialized yet fall back to Cypher
+    results = None
+    if backend == "materialized" and mode == "top_k":
+        try:
+            results = get_social_recommendation_store().get(clear_user, k=k)
+        except Exception as e:
+            print(f"Materialized recommendations unavailable: {e}")
+
+    # Personalized PageRank (social_graph.py), cached per user until the graph changes
+    if mode == "ppr":
+        try:
+            results = get_social_graph_engine().personalized_pagerank(clear_user, k=k)
+        except Exception as e:
+            return f"Error querying social recommendations: {str(e)}"
+    # In-process snapshot (social_graph.py): same ranking as the top_k query,
+    # without a round trip; "paths" mode is only answered by Cypher
+    elif results is None and backend == "memory" and mode == "top_k":
+        try:
+            results = get_social_graph_engine().recommend(clear_user, k=k)
+        except Exception as e:
+            return f"Error querying social recommendations: {str(e)}"
+    elif results is None:
+        # Shared Neo4j driver (pooled connections, closed at process exit)
+        try:
+            driver = get_neo4j_driver()
+        except Exception as e:
+            return f"Error querying social recommendations: {str(e)}"
+
+        # Products purchased by the user's friends or friends-of-friends, anchored on the
+        # User.userId unique constraint (see graph_schema.py); read sessions can be routed
+        # to any cluster member
+        def read_recommendations(tx):
+            return [record.data() for record in tx.run(SOCIAL_QUERIES[mode], user_id=clear_user, k=k)]
+
+        from neo4j import READ_ACCESS
+        try:
+            with driver.session(default_access_mode=READ_ACCESS) as session:
+                results = session.execute_read(read_recommendations)
+        except Exception as e:
+            return f"Error querying social recommendations: {str(e)}"
 
     # If no products found
     if not results:
@@ -181,107 +453,80 @@ def get_social_recommendations(user_id: str = "Bob") -> str:
         output += f"Brand: {r['brand']}\n"
         output += f"Description: {r['description']}\n"
         output += f"Price: ${r['price']:.2f}\n"
-        output += f"Social: {r['social_count']} friends or friends-of-friends purchased this\n\n"
+        output += f"Social: {r['social_count']} friends or friends-of-friends purchased this\n"
+        if "score" in r:
+            output += f"Relevance: {r['score']:.4f}\n"
+        output += "\n"
 
     return output
 
+# Helper: promotion rows as tool output
+def format_promotions(title: str, promotions: list) -> str:
+    result = f"{title}:\n\n"
+    for product in promotions:
+        result += f"Name: {product['name']}\n"
+        result += f"Category: {product['category']}\n"
+        result += f"Brand: {product['brand']}\n"
+        result += f"Description: {product['description']}\n"
+        result += f"Promotional price: ${product['price']:.2f}\n\n"
+    return result
+
 @tool
-def get_promotion_by_category(category: str = "all") -> str:
+def get_promotion_by_category(category: str = "all", min_price: Optional[float] = None,
+                              max_price: Optional[float] = None) -> str:
     """
     Searches for products on promotion with their prices and details.
     IMPORTANT: This tool ALWAYS returns complete product information including prices.
     Use this tool for any promotion-related queries.
     DO NOT use this tool for promotion requests or social recommendations.
     
-    :param category: Product category or "all" for all promotions
+    :param category: Product category or "all" for all promotions; may include a price
+        range in words, e.g. "smartphones under 500" or "all between 100 and 300"
+    :param min_price: Only promotions priced at least this much
+    :param max_price: Only promotions priced at most this much (e.g. "lower than 200")
     :return: List of products on promotion with complete details including prices
     """
     
     print("***** PROMOTION TOOL *****")
-    # Normalize the category input
-    category = category.strip().lower()
-    # Handle different variations of "all"
-    all_categories = ["all", "all categories", "any", "everything", "", "all products"]
-    
-    # Promotion API simulation data
-    mock_promotions = {
-        "smartphones": [
-            {
-                "name": "Xiaomi Redmi Note 11",
-                "category": "Smartphones", 
-                "brand": "Xiaomi",
-                "description": "Smartphone with 6.4 inch display, quad camera, 6GB RAM",
-                "price": 349.99
-            }
-        ],
-        "accessories": [
-            {
-                "name": "Galaxy Buds Pro",
-                "category": "Accessories",
-                "brand": "Samsung",
-                "description": "Wireless earbuds with active noise cancellation",
-                "price": 149.99
-            }
-        ],
-        "footwear": [
-            {
-                "name": "Nike Air Zoom Pegasus 38",
-                "category": "Footwear",
-                "brand": "Nike",
-                "description": "Running shoes with Zoom Air cushioning",
-                "price": 119.99
-            }   
-        ]
-    }
-    
+    # The ReAct agent passes one string: take price bounds from the text
+    if min_price is None and max_price is None:
+        text, min_price, max_price = parse_price_range(category)
+        if min_price is not None or max_price is not None:
+            category = text or "all"
+            print(f"Price range from text: {min_price} to {max_price}")
+
+    # Current promotion snapshot, indexed by category and price (promotions.py)
+    catalog = get_promotion_catalog()
+    price_note = ""
+    if min_price is not None or max_price is not None:
+        price_note = f" (price ${min_price or 0:.2f} to " + (f"${max_price:.2f})" if max_price is not None else "any)")
+
+    # Shared category resolver (categories.py): "all" variants, synonyms and typos
+    resolved = resolve_category(category)
+
     # Show all promotions if requested
-    if any(cat in category for cat in all_categories):
-        all_promotions = []
-        for cat_name, products in mock_promotions.items():
-            all_promotions.extend(products)
-        
-        if not all_promotions:
-            return "No promotions available at the moment."
-        
-        result = "Current promotions across all categories:\n\n"
-        for product in all_promotions:
-            result += f"Name: {product['name']}\n"
-            result += f"Category: {product['category']}\n"
-            result += f"Brand: {product['brand']}\n"
-            result += f"Description: {product['description']}\n"
-            result += f"Promotional price: ${product['price']:.2f}\n\n"
-        
-        return result
-    
-    # Try to find a matching category
-    for cat_key in mock_promotions.keys():
-        if cat_key in category or category in cat_key:
-            promotions = mock_promotions[cat_key]
-            result = f"Products on promotion in {cat_key} category:\n\n"
-            
-            for product in promotions:
-                result += f"Name: {product['name']}\n"
-                result += f"Category: {product['category']}\n"
-                result += f"Brand: {product['brand']}\n"
-                result += f"Description: {product['description']}\n"
-                result += f"Promotional price: ${product['price']:.2f}\n\n"
-            
-            return result
-    
-    # If nothing found, return all promotions
-    all_promotions = []
-    for cat_name, products in mock_promotions.items():
-        all_promotions.extend(products)
-    
-    result = "No exact category match found. Here are all current promotions:\n\n"
-    for product in all_promotions:
-        result += f"Name: {product['name']}\n"
-        result += f"Category: {product['category']}\n"
-        result += f"Brand: {product['brand']}\n"
-        result += f"Description: {product['description']}\n"
-        result += f"Promotional price: ${product['price']:.2f}\n\n-----------------\n"
-    
-    return result
+    if resolved == ALL_CATEGORIES:
+        promotions = catalog.search(min_price=min_price, max_price=max_price)
+        if not promotions:
+            return f"No promotions available at the moment{price_note}."
+        return format_promotions(f"Current promotions across all categories{price_note}", promotions)
+
+    # Try to find a matching category; categories added to the feed after startup
+    # are matched by the catalog itself
+    cat_key = resolved.lower() if resolved and resolved.lower() in catalog.by_category else None
+    if cat_key is None and resolved is None:
+        cat_key = catalog.match_category(category)
+    if cat_key is not None:
+        promotions = catalog.search(cat_key, min_price=min_price, max_price=max_price)
+        if not promotions:
+            return f"No promotions in {cat_key} category{price_note}."
+        return format_promotions(f"Products on promotion in {cat_key} category{price_note}", promotions)
+
+    # Nothing matched: name the categories on promotion instead of listing every promotion
+    available = ", ".join(sorted({row["category"] for row in catalog.rows}))
+    if resolved is not None:
+        return f"No promotions in {resolved} category{price_note}. Categories on promotion: {available}."
+    return f"No category matches '{category}'. Categories on promotion: {available}."
 
 @tool
 def general_chat(input: str) -> str:
@@ -298,7 +543,7 @@ def general_chat(input: str) -> str:
     # For the training implementation, we'll use a simplified approach
     
     # Create a response that acknowledges the user's input and guides toward products
-    llm = ChatOpenAI(model="gpt-3.5-turbo-1106", temperature=0.7)
+    llm = get_chat_model("gpt-3.5-turbo-1106", temperature=0.7)
     
     response = llm.invoke(
         f"""
@@ -324,7 +569,7 @@ def verify_recommendation_consistency(recommendation_data: str) -> str:
     print("***** VERIFICATION TOOL *****")
     
     # We would use the LLM to analyze the data and identify inconsistencies
-    llm = ChatOpenAI(model="gpt-3.5-turbo-1106", temperature=0)
+    llm = get_chat_model("gpt-3.5-turbo-1106", temperature=0)
     
     response = llm.invoke(
         f"""
@@ -343,4 +588,42 @@ def verify_recommendation_consistency(recommendation_data: str) -> str:
         """
     )
     
-    return response.content
\ No newline at end of file
+    return response.content
+
+
+def warm_up() -> dict:
+    """
+    Creates every shared client and loads the tools' in-process data up front, so
+    the first query does not pay for connection setup or index loading.
+
+    :return: Mapping of resource name to seconds taken, or the error message
+    """
+    steps = [
+        # Opens each backend's connection pool (Elasticsearch, Neo4j, OpenAI)
+        ("backends", health_check),
+        ("chat_models", lambda: [get_chat_model("gpt-3.5-turbo-1106", temperature=t) for t in (0, 0.7)]),
+        ("embedding_cache", get_embedding_cache),
+        ("promotions", get_promotion_feed),
+        ("categories", get_category_resolver),
+    ]
+    if os.getenv("VECTOR_BACKEND", "elastic").lower() == "local":
+        steps.append(("local_vector_index", get_local_vector_engine))
+    social_backend = os.getenv("SOCIAL_BACKEND", "neo4j").lower()
+    if social_backend == "memory" or os.getenv("SOCIAL_QUERY_MODE") == "ppr":
+        steps.append(("social_graph", get_social_graph_engine))
+    if social_backend == "materialized":
+        steps.append(("social_materialized", get_social_recommendation_store))
+
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            result = step()
+            timings[name] = time.perf_counter() - started
+            if name == "backends":
+                # health_check reports failures instead of raising
+                timings.update({backend: status for backend, status in result.items() if status != "ok"})
+        except Exception as e:
+            timings[name] = f"error: {e}"
+    print(f"Warm-up: {timings}")
+    return timings
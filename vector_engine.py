@@ -0,0 +1,167 @@
+# vector_engine.py
+# Embedded, in-process vector search engine: an alternative backend to Elasticsearch
+# for search_products_by_embedding. Product embeddings live in a memory-mapped float32
+# matrix (one L2-normalized row per product_id) and top-k is one matrix product plus
+# argpartition, so a search needs no network hop.
+#
+# On-disk layout of an index directory:
+#   embeddings.f32   raw float32 matrix, shape (count, dims)
+#   products.jsonl   product documents (without embedding), one per matrix row
+#   meta.json        {"count": ..., "dims": ...}
+import json
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorEngine:
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.path = path
+        self.dims = meta["dims"]
+        self.count = meta["count"]
+
+        with open(os.path.join(path, "products.jsonl")) as f:
+            self.products = [json.loads(line) for line in f if line.strip()]
+        self.product_ids = [p.get("product_id") for p in self.products]
+
+        # Column arrays for the structured pre-filters
+        self._categories = np.array([str(p.get("category", "")).lower() for p in self.products])
+        self._brands = np.array([str(p.get("brand", "")).lower() for p in self.products])
+        self._prices = np.array([np.nan if p.get("price") is None else p["price"] for p in self.products],
+                                dtype=np.float64)
+
+        if self.count:
+            self.matrix = np.memmap(os.path.join(path, "embeddings.f32"), dtype=np.float32,
+                                    mode="r", shape=(self.count, self.dims))
+        else:
+            self.matrix = np.zeros((0, self.dims), dtype=np.float32)
+
+    @classmethod
+    def build(cls, documents, path: str) -> "LocalVectorEngine":
+        """
+        Writes an index from product documents shaped like the ones indexed by
+        elastic/ingest-local.py (product fields plus an "embedding" list).
+
+        :param documents: Iterable of product dicts with "product_id" and "embedding"
+        :param path: Directory where the index files are written
+        :return: The engine opened on the new index
+        """
+        os.makedirs(path, exist_ok=True)
+        products = []
+        vectors = []
+        for doc in documents:
+            doc = dict(doc)
+            embedding = doc.pop("embedding", None)
+            if embedding is None:
+                print(f"Skipping product without embedding: {doc.get('product_id')}")
+                continue
+            products.append(doc)
+            vectors.append(embedding)
+
+        dims = len(vectors[0]) if vectors else 0
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dims))
+
+        # Write to temporary names first so readers never open a half-written index
+        tmp_matrix = os.path.join(path, "embeddings.f32.tmp")
+        matrix.astype(np.float32).tofile(tmp_matrix)
+        tmp_products = os.path.join(path, "products.jsonl.tmp")
+        with open(tmp_products, "w") as f:
+            for product in products:
+                f.write(json.dumps(product) + "\n")
+        tmp_meta = os.path.join(path, "meta.json.tmp")
+        with open(tmp_meta, "w") as f:
+            json.dump({"count": len(products), "dims": dims}, f)
+
+        os.replace(tmp_matrix, os.path.join(path, "embeddings.f32"))
+        os.replace(tmp_products, os.path.join(path, "products.jsonl"))
+        os.replace(tmp_meta, os.path.join(path, "meta.json"))
+        return cls(path)
+
+    def filter_mask(self, category: Optional[str] = None, brand: Optional[str] = None,
+                    min_price: Optional[float] = None, max_price: Optional[float] = None):
+        """Returns a boolean row mask for the filters, or None when no filter is set."""
+        mask = np.ones(self.count, dtype=bool)
+        if category:
+            mask &= self._categories == category.lower()
+        if brand:
+            mask &= self._brands == brand.lower()
+        if min_price is not None:
+            mask &= self._prices >= min_price
+        if max_price is not None:
+            mask &= self._prices <= max_price
+        return None if mask.all() else mask
+
+    def search(self, query_vectors, k: int = 10, min_score_percentage: float = 85,
+               category: Optional[str] = None, brand: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None) -> list:
+        """
+        Returns the top-k products for each query vector.
+
+        Scores use the same 0-2 scale as the Elasticsearch script_score query
+        (cosine similarity + 1.0), so min_score_percentage cuts at the same place.
+
+        :param query_vectors: One vector or a batch (list of vectors / 2-D array)
+        :param k: Number of results per query
+        :param min_score_percentage: Minimum similarity, as a percentage
+        :param category, brand, min_price, max_price: Optional pre-filters (same as the tool)
+        :return: One list of hits per query, each hit shaped like an Elasticsearch hit
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+        if self.count == 0:
+            return [[] for _ in range(len(queries))]
+
+        queries = _normalize_rows(queries)
+        scores = queries @ self.matrix.T + 1.0
+        mask = self.filter_mask(category, brand, min_price, max_price)
+        if mask is not None:
+            # Filtered-out rows can never pass the min_score cut
+            scores[:, ~mask] = -np.inf
+        k = min(k, self.count)
+        min_score = min_score_percentage / 50.0
+
+        # argpartition gives the unordered top-k in O(n); only those k are sorted
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = []
+        for rows, row_scores in zip(top, top_scores):
+            hits = []
+            for row, score in zip(rows, row_scores):
+                if score < min_score:
+                    break
+                hits.append({
+                    "_id": self.product_ids[row],
+                    "_score": float(score),
+                    "_source": self.products[row]
+                })
+            results.append(hits)
+        return results
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_local_vector_engine(path: Optional[str] = None) -> LocalVectorEngine:
+    """Returns the process-wide engine opened on LOCAL_VECTOR_INDEX."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = LocalVectorEngine(path or os.getenv("LOCAL_VECTOR_INDEX", ".cache/vector_index"))
+    return _engine